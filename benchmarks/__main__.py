@@ -0,0 +1,88 @@
+"""
+Runs the benchmarks without asv, for a quick offline check.
+
+Usage: `python -m benchmarks [name ...]`, where each name selects the
+benchmarks whose full name (for example `serialisers.Render.time_render`)
+contains it. All benchmarks are run if no names are given.
+
+`time_` benchmarks report the mean time per call, `track_` benchmarks report
+the value they return and `peakmem_` benchmarks report the peak memory
+allocated during a single call, as measured by :py:mod:`tracemalloc`.
+"""
+
+import importlib, inspect, itertools, sys, timeit, tracemalloc
+
+MODULES = ['construction', 'serialisers', 'citation', 'model_memory']
+
+
+def _param_sets(cls):
+    """Returns every combination of the parameters of a benchmark class
+
+    :rtype: list of tuple
+    """
+    params = getattr(cls, 'params', None)
+    if params is None:
+        return [()]
+    if not params or not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _run(instance, method, params):
+    """Runs a single benchmark method
+
+    :return: The measured value and its unit
+    :rtype: tuple
+    """
+    function = getattr(instance, method)
+    if method.startswith('time_'):
+        number, total = timeit.Timer(lambda: function(*params)).autorange()
+        return total / number * 1e3, 'ms'
+    if method.startswith('peakmem_'):
+        tracemalloc.start()
+        try:
+            function(*params)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return peak / 1024, 'KiB'
+    return function(*params), getattr(instance, 'unit', '')
+
+
+def benchmarks(names=()):
+    """Finds the benchmarks to run
+
+    :param names: Parts of the full names of the benchmarks to run
+    :type names: list of str
+
+    :return: The full name, class and method name of each benchmark
+    :rtype: generator of tuple
+    """
+    for module_name in MODULES:
+        module = importlib.import_module('benchmarks.' + module_name)
+        for class_name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            for method in sorted(vars(cls)):
+                if not method.startswith(('time_', 'track_', 'peakmem_')):
+                    continue
+                full_name = '{}.{}.{}'.format(module_name, class_name, method)
+                if not names or any(name in full_name for name in names):
+                    yield full_name, cls, method
+
+
+def main(names):
+    for full_name, cls, method in benchmarks(names):
+        for params in _param_sets(cls):
+            instance = cls()
+            if hasattr(instance, 'setup'):
+                instance.setup(*params)
+            value, unit = _run(instance, method, params)
+            print('{}({}): {:.3f} {}'.format(full_name,
+                    ', '.join('{}'.format(param) for param in params),
+                    value, unit))
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
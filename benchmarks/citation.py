@@ -0,0 +1,55 @@
+"""
+Benchmarks for building citation strings for records with many authors, such
+as large cruise or consortium datasets.
+
+Run with `python -m benchmarks.citation`.
+"""
+
+import datetime, timeit, datasetmd, datasetmd.templates.citationstring
+
+
+def record(authors):
+    """Creates a record with many authors, each affiliated with one or two of
+    a pool of organisations half the size of the number of authors
+
+    :param authors: The number of authors
+    :type authors: int
+
+    :rtype: DatasetMD
+    """
+    affiliations = max(authors // 2, 1)
+    organisations = [datasetmd.Organisation(name='Organisation {}'.format(i),
+                                                country='Ireland')
+                        for i in range(affiliations)]
+    people = [datasetmd.Person(given_name='Given{}'.format(i),
+                            family_name='Family{}'.format(i),
+                            affiliation=[organisations[i % affiliations],
+                                organisations[(i * 7) % affiliations]])
+                for i in range(authors)]
+    return datasetmd.DatasetMD(
+                base=datasetmd.Base(title='A dataset with many authors'),
+                citation=datasetmd.Citation(authors=people,
+                            doi='10.1234/abcd',
+                            doi_publication_date=datetime.date(2021, 1, 1),
+                            doi_publisher=organisations[0]))
+
+
+class CitationString:
+    """Time taken to build the citation string for a record"""
+    params = [10, 100, 1000]
+    param_names = ['authors']
+
+    def setup(self, authors):
+        self.md = record(authors)
+
+    def time_citation_string(self, authors):
+        datasetmd.templates.citationstring.template(self.md)
+
+
+if __name__ == '__main__':
+    for authors in CitationString.params:
+        md = record(authors)
+        number, total = timeit.Timer(
+            lambda: datasetmd.templates.citationstring.template(md)).autorange()
+        print('{:>6} authors: {:10.1f} us per citation'.format(authors,
+                                                    total / number * 1e6))
@@ -0,0 +1,25 @@
+"""
+Benchmarks for constructing the model objects of a record.
+
+Run with `python -m benchmarks construction`.
+"""
+
+from benchmarks import records
+
+
+class Construct:
+    """Time and peak memory to construct each shape of record"""
+    params = [list(records.SHAPES)]
+    param_names = ['shape']
+
+    def setup(self, shape):
+        self.create = records.SHAPES[shape]
+        # Builds the shared generator and its vocabularies, so that only the
+        # construction of the record itself is measured
+        self.create()
+
+    def time_construct(self, shape):
+        self.create()
+
+    def peakmem_construct(self, shape):
+        self.create()
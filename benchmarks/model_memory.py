@@ -0,0 +1,144 @@
+"""
+Memory benchmarks for the metadata model classes. Each benchmark measures the
+memory used by a large number of instances of a slotted model class, and of
+an equivalent class with a per-instance `__dict__`, to show the saving from
+`__slots__`.
+
+Run with `python -m benchmarks.model_memory`.
+"""
+
+import datetime, tracemalloc, datasetmd
+
+INSTANCES = 100000
+
+
+def _fields(cls):
+    """Returns the names of all of the slots of a class and its bases
+
+    :param cls: A slotted model class
+    :type cls: type
+
+    :rtype: list of str
+    """
+    return [field for klass in reversed(cls.__mro__)
+                    for field in getattr(klass, '__slots__', ())]
+
+
+def _unslotted(cls, factory):
+    """Creates a factory for an equivalent of `cls` which keeps its
+    attributes in a per-instance `__dict__`, as the model classes did before
+    they were slotted
+
+    :param cls: A slotted model class
+    :type cls: type
+    :param factory: A function taking `cls` and returning an instance
+    :type factory: function
+
+    :return: A function taking the class with a `__dict__` and returning an
+            instance of it, and the class itself
+    :rtype: tuple
+    """
+    fields = _fields(cls)
+
+    def __init__(self, source):
+        for field in fields:
+            setattr(self, field, getattr(source, field, None))
+
+    unslotted = type('Unslotted{}'.format(cls.__name__), (object,),
+                                                {'__init__': __init__})
+    return unslotted, lambda klass: klass(factory(cls))
+
+
+def _factories():
+    """Returns functions creating a typical instance of each model class
+
+    :return: Pairs of model class and a function taking the class to create
+            an instance
+    :rtype: list of tuple
+    """
+    term_set = datasetmd.DefinedTermSet(term_code='SDN:P01::',
+                    title='BODC Parameter Usage Vocabulary',
+                    url='http://vocab.nerc.ac.uk/collection/P01/current/')
+    organisation = datasetmd.Organisation(name='Marine Institute',
+                                            country='Ireland')
+    return [
+        (datasetmd.Base, lambda cls: cls(identifier='id', title='title',
+                                    created=datetime.date(2021, 1, 1))),
+        (datasetmd.Feature, lambda cls: cls(crs_epsg_code=4326,
+                                    latitude_northernmost=55.5,
+                                    latiude_southernmost=51.2,
+                                    longitude_easternmost=-5.4,
+                                    longitude_westernmost=-11.0)),
+        (datasetmd.Organisation, lambda cls: cls(name='Marine Institute',
+                                    country='Ireland')),
+        (datasetmd.WebAddress, lambda cls: cls(url='https://www.marine.ie')),
+        (datasetmd.Citation, lambda cls: cls(doi='10.1234/abcd')),
+        (datasetmd.Person, lambda cls: cls(given_name='Adam',
+                                    family_name='Leadbetter',
+                                    affiliation=[organisation])),
+        (datasetmd.DefinedTerm, lambda cls: cls(in_defined_term_set=term_set,
+                                    title='Temperature', url='http://term')),
+        (datasetmd.DefinedTermSet, lambda cls: cls(title='P01',
+                                    url='http://vocab')),
+        (datasetmd.ObservedProperty, lambda cls: cls(
+                                    in_defined_term_set=term_set,
+                                    term_code='SDN:P01::TEMPPR01',
+                                    title='Temperature', url='http://term')),
+        (datasetmd.License, lambda cls: cls(name='CC-BY-4.0')),
+        (datasetmd.Limitations, lambda cls: cls(use_limitations=[])),
+        (datasetmd.CrossReference, lambda cls: cls(title='ref',
+                                    url='http://ref')),
+        (datasetmd.DatasetMD, lambda cls: cls()),
+    ]
+
+
+def measure(cls, factory, instances=INSTANCES):
+    """Measures the memory used by instances of a class
+
+    :param cls: The class to be instantiated
+    :type cls: type
+    :param factory: A function taking `cls` and returning an instance
+    :type factory: function
+    :param instances: The number of instances to create
+    :type instances: int
+
+    :return: The number of bytes allocated per instance
+    :rtype: float
+    """
+    tracemalloc.start()
+    try:
+        objects = [factory(cls) for i in range(instances)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del objects
+    return size / instances
+
+
+class ModelMemory:
+    """Bytes allocated per instance for each slotted model class, and for an
+    equivalent class with a per-instance `__dict__`"""
+    params = [cls.__name__ for cls, factory in _factories()]
+    param_names = ['model_class']
+    unit = 'bytes'
+
+    def setup(self, model_class):
+        self.cls, self.factory = dict(
+            (cls.__name__, (cls, factory)) for cls, factory in _factories()
+        )[model_class]
+
+    def track_slotted(self, model_class):
+        return measure(self.cls, self.factory)
+
+    def track_unslotted(self, model_class):
+        return measure(*_unslotted(self.cls, self.factory))
+
+
+if __name__ == '__main__':
+    print('{:<20}{:>12}{:>12}{:>10}'.format('class', 'slotted', 'dict',
+                                                'saving'))
+    for cls, factory in _factories():
+        slotted = measure(cls, factory)
+        unslotted = measure(*_unslotted(cls, factory))
+        print('{:<20}{:>12.0f}{:>12.0f}{:>9.0%}'.format(cls.__name__, slotted,
+                                unslotted, 1 - slotted / unslotted))
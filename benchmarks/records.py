@@ -0,0 +1,82 @@
+"""
+Synthetic records used by the benchmarks. Each shape of record is built from
+a fixed seed, so every run of the benchmarks measures the same records.
+
+.. data:: SHAPES
+
+      The functions creating each shape of record, keyed by name
+"""
+
+import functools, datasetmd.synthetic
+
+
+@functools.lru_cache(maxsize=None)
+def generator(keywords=5, observed_properties=5, authors=3,
+                cross_references=1):
+    """Returns the generator for a shape of record, which is created on the
+    first call and shared afterwards, so that its vocabularies are built once
+    rather than with every record
+
+    :rtype: datasetmd.synthetic.Generator
+    """
+    return datasetmd.synthetic.Generator(authors=authors,
+                        keywords=keywords,
+                        observed_properties=observed_properties,
+                        cross_references=cross_references)
+
+
+def record(seed=0, keywords=5, observed_properties=5, authors=3,
+                cross_references=1):
+    """Creates a synthetic record with
+    :py:class:`datasetmd.synthetic.Generator`
+
+    :param seed: The seed for the random choices made in the record
+    :type seed: int
+    :param keywords: The number of keywords
+    :type keywords: int
+    :param observed_properties: The number of observed properties
+    :type observed_properties: int
+    :param authors: The number of authors
+    :type authors: int
+    :param cross_references: The number of cross references
+    :type cross_references: int
+
+    :rtype: DatasetMD
+    """
+    return generator(keywords, observed_properties, authors,
+                        cross_references).record(seed)
+
+
+def small(seed=0):
+    """A record with a single keyword, property and author"""
+    return record(seed, keywords=1, observed_properties=1, authors=1,
+                    cross_references=0)
+
+
+def typical(seed=0):
+    """A record with a handful of keywords, properties and authors"""
+    return record(seed)
+
+
+def many_keywords(seed=0):
+    """A record with thousands of keywords and observed properties"""
+    return record(seed, keywords=2000, observed_properties=3000)
+
+
+def many_authors(seed=0):
+    """A record with hundreds of authors"""
+    return record(seed, authors=500)
+
+
+def many_cross_references(seed=0):
+    """A record with many cross references"""
+    return record(seed, cross_references=1000)
+
+
+SHAPES = {
+    'small': small,
+    'typical': typical,
+    'many_keywords': many_keywords,
+    'many_authors': many_authors,
+    'many_cross_references': many_cross_references,
+}
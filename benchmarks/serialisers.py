@@ -0,0 +1,53 @@
+"""
+Benchmarks for rendering records to each of the output formats.
+
+Run with `python -m benchmarks serialisers`.
+"""
+
+import time, datasetmd, datasetmd.batch
+from benchmarks import records
+
+FORMATS = [datasetmd.ISO19139, datasetmd.SCHEMA_DOT_ORG, datasetmd.CITE_STRING]
+
+
+class Render:
+    """Latency, throughput and peak memory of rendering a single record"""
+    params = [list(records.SHAPES), FORMATS]
+    param_names = ['shape', 'format']
+
+    def setup(self, shape, format):
+        self.md = records.SHAPES[shape]()
+        self.render = datasetmd.batch.renderer(format)
+        self.render(self.md)
+
+    def time_render(self, shape, format):
+        self.md.clearCache()
+        self.render(self.md)
+
+    def time_render_cached(self, shape, format):
+        self.render(self.md)
+
+    def peakmem_render(self, shape, format):
+        self.md.clearCache()
+        self.render(self.md)
+
+
+class RenderMany:
+    """Throughput of rendering a batch of distinct records with
+    :py:func:`datasetmd.render_many`"""
+    params = [list(records.SHAPES), FORMATS]
+    param_names = ['shape', 'format']
+    unit = 'records/s'
+
+    def setup(self, shape, format):
+        count = 200 if shape in ('small', 'typical') else 5
+        self.records = [records.SHAPES[shape](seed) for seed in range(count)]
+        list(datasetmd.render_many(self.records[:1], format=format))
+
+    def track_records_per_second(self, shape, format):
+        for md in self.records:
+            md.clearCache()
+        start = time.perf_counter()
+        for rendered in datasetmd.render_many(self.records, format=format):
+            pass
+        return len(self.records) / (time.perf_counter() - start)
@@ -13,13 +13,91 @@
 
       Used on :py:class:`datasetmd.Person` to indicate the full name should
       be rendered in the order `given_name` followed by `family_name`
+
+.. data:: ISO19139
+
+      Used on :py:func:`datasetmd.render_many` to indicate that records
+      should be rendered as ISO 19139 XML
+
+.. data:: SCHEMA_DOT_ORG
+
+      Used on :py:func:`datasetmd.render_many` to indicate that records
+      should be rendered as Schema.org JSON-LD
 """
 
-import datetime, datasetmd.templates, jinja2
+import datetime, datasetmd.templates, datasetmd.environment, datasetmd.jsonld, datasetmd.keywordgroups, datasetmd.reader
 
 CITE_STRING = 'CITE_STRING'
 FAMILY_THEN_GIVEN = 'FAMILY_THEN_GIVEN'
 GIVEN_THEN_FAMILY = 'GIVEN_THEN_FAMILY'
+ISO19139 = 'ISO19139'
+SCHEMA_DOT_ORG = 'SCHEMA_DOT_ORG'
+
+
+class _Lazy:
+    """Holds the loader of an attribute which has not been loaded yet, see
+    :py:func:`datasetmd._lazy_attribute`
+    """
+    __slots__ = ('loader', 'value', 'loaded')
+    
+    def __init__(self, loader):
+        self.loader = loader
+        self.value = None
+        self.loaded = False
+    
+    def load(self):
+        if not self.loaded:
+            self.value = self.loader()
+            self.loaded = True
+            self.loader = None
+        return self.value
+    
+    def __reduce__(self):
+        # Lazy attributes are loaded when a record is pickled, as loaders are
+        # often closures which cannot be pickled
+        return (_loaded, (self.load(),))
+
+def _loaded(value):
+    """Returns the value of a lazy attribute which was loaded when it was 
+    pickled
+    """
+    return value
+
+def _lazy_attribute(name, doc):
+    """Creates a property for an attribute which may be given a loader, a 
+    function taking no arguments, in place of its value. The loader is called
+    the first time the attribute is read and its return value replaces it.
+    
+    :param name: The name of the attribute, whose value is held in the slot
+            of the same name preceded by an underscore
+    :type name: str
+    :param doc: The docstring of the property
+    :type doc: str
+    
+    :rtype: property
+    """
+    slot = '_' + name
+    
+    def get(self):
+        value = getattr(self, slot)
+        if type(value) is _Lazy:
+            value = value.load()
+            setattr(self, slot, value)
+        return value
+    
+    def set(self, value):
+        if callable(value):
+            value = _Lazy(value)
+        setattr(self, slot, value)
+    
+    return property(get, set, doc=doc)
+
+def _is_loaded(obj, name):
+    """Tells whether a lazy attribute has been loaded
+    
+    :rtype: bool
+    """
+    return type(getattr(obj, '_' + name)) is not _Lazy
 
 
 class DatasetMD:
@@ -63,7 +141,31 @@ class DatasetMD:
                 responsible for publishing the dataset described by the 
                 :py:class:`datasetmd.DatasetMD` instance
     :type publisher: Organisation, defaults to None
+    :param license: Describes how the dataset described by the
+                :py:class:`datasetmd.DatasetMD` may be distributed and reused
+    :type license: License, defaults to None
+    
+    The `cross_references`, `keywords` and `observed_properties`, like the
+    `authors` of a :py:class:`datasetmd.Citation`, may instead be given as a 
+    loader: a function taking no arguments which returns the list, for 
+    example by querying a database. The loader is only called the first time
+    the attribute is read, so records can be listed and filtered on their 
+    :py:class:`datasetmd.Base` metadata without loading these lists. Use 
+    :py:meth:`datasetmd.DatasetMD.isLoaded` to check whether a list has been
+    loaded.
     """
+    __slots__ = ('base', 'citation', '_cross_references', 'feature',
+                    'included_in_data_catalogue', '_keywords', 'license',
+                    'limitations', '_observed_properties',
+                    'owning_organisations', 'publisher', '_derived')
+    
+    cross_references = _lazy_attribute('cross_references', 
+            'The references to other metadata entities, or a loader for them')
+    keywords = _lazy_attribute('keywords',
+            'The keywords of the dataset, or a loader for them')
+    observed_properties = _lazy_attribute('observed_properties',
+            'The properties observed in the dataset, or a loader for them')
+    
     def __init__(self,
                             base=None,
                             citation=None,
@@ -74,16 +176,20 @@ class DatasetMD:
                             limitations=None,
                             observed_properties=None,
                             owning_organisations=None,
-                            publisher=None):
+                            publisher=None,
+                            license=None):
         self.base = base
         self.citation = citation
         self.feature = feature
+        self.license = license
         self.limitations = limitations
         self.cross_references = cross_references
+        self.owning_organisations = owning_organisations
         self.publisher = publisher
         self.observed_properties = observed_properties
         self.keywords = keywords
         self.included_in_data_catalogue = included_in_data_catalogue
+        self._derived = None
         
     def __str__(self):
         return """
@@ -100,52 +206,116 @@ class DatasetMD:
                 str(self.owning_organisations),
                 str(self.publisher))
         
-    def toISO19139(self):
+    @classmethod
+    def fromISO19139(cls, source, registry=None):
+        """Creates a :py:class:`datasetmd.DatasetMD` object from an ISO 19139
+        XML record. Use :py:func:`datasetmd.reader.iter_iso19139` to read
+        every record in a document holding many records.
+        
+        :param source: The document to be read; a file name, the XML as 
+                bytes, or a binary file-like object
+        :type source: str, bytes or file-like object
+        :param registry: A registry used to intern the keywords and
+                organisations of the record
+        :type registry: :py:class:`datasetmd.registry.Registry`, defaults to
+                None
+        
+        :return: The first record in the document, or None if it does not
+                contain one
+        :rtype: DatasetMD, or None
+        """
+        return datasetmd.reader.read_iso19139(source, registry=registry)
+    
+    @classmethod
+    def fromBytes(cls, data):
+        """Creates a :py:class:`datasetmd.DatasetMD` object from the compact
+        binary encoding created by :py:meth:`datasetmd.DatasetMD.toBytes`
+        
+        :param data: The encoded record
+        :type data: bytes, bytearray or memoryview
+        
+        :raises ValueError: If `data` is not an encoded record
+        
+        :rtype: DatasetMD
+        """
+        md = datasetmd.binary.loads(data)
+        if not isinstance(md, cls):
+            raise ValueError('The data does not encode a DatasetMD object')
+        return md
+    
+    def toBytes(self):
+        """Outputs a :py:class:`datasetmd.DatasetMD` object in a compact
+        binary encoding, see :py:mod:`datasetmd.binary`
+        
+        :return: The encoded record
+        :rtype: bytes
+        """
+        return datasetmd.binary.dumps(self)
+    
+    def toISO19139(self, stream=None):
         """Outputs a :py:class:`datasetmd.DatasetMD` object as ISO 19139 
         compliant XML
         
+        :param stream: A file name, or a file-like object opened for writing
+                text, to which the XML is written incrementally instead of
+                being returned
+        :type stream: str or file-like object, defaults to None
+        
+        :return: A string of text formatted to ISO 19139 XML, or None if 
+                `stream` is given. The string is served from the render cache
+                when one is set, see :py:mod:`datasetmd.rendercache`
+        :rtype: str, or None
+        """
+        template = datasetmd.environment.get_template('iso19139')
+        if stream is None:
+            cache = datasetmd.rendercache.get_render_cache()
+            if cache is not None:
+                return cache.render(self, ISO19139,
+                        lambda md: template.render(**md._iso19139_context()))
+            return template.render(**self._iso19139_context())
+        template.stream(**self._iso19139_context()).dump(stream)
+    
+    async def toISO19139Async(self):
+        """Outputs a :py:class:`datasetmd.DatasetMD` object as ISO 19139 
+        compliant XML without blocking the event loop, by rendering it with
+        the shared :py:class:`datasetmd.aio.AsyncRenderer`
+        
+        :raises datasetmd.aio.RendererBusy: If the renderer is bounded and
+                too many renders are already waiting
+        
         :return: A string of text formatted to ISO 19139 XML
         :rtype: str
         """
+        return await datasetmd.aio.get_async_renderer().render(self, 
+                                                                ISO19139)
+    
+    def iterISO19139(self):
+        """Outputs a :py:class:`datasetmd.DatasetMD` object as ISO 19139 
+        compliant XML, one chunk of text at a time
         
-        keyword_groups = []
-        keywords = []
-        
-        if self.observed_properties is not None:
-            for op in self.observed_properties:
-                if op.in_defined_term_set is not None:
-                    this_group = {'name': op.in_defined_term_set.title,
-                                    'url': op.in_defined_term_set.url}
-                    this_term = {'name': op.title,'url': op.url}
-                    if this_group not in keyword_groups:
-                        keyword_groups.append(this_group)
-                        keywords.append({'name': op.in_defined_term_set.title,
-                                    'url': op.in_defined_term_set.url,
-                                    'keywords':[{'name': op.title,'url': op.url
-                                }]})
-                    elif this_group not in keywords[keyword_groups.index(this_group)]['keywords']:
-                        keywords[keyword_groups.index(this_group)]['keywords'].append(this_term)
-        
-        if self.keywords is not None:
-            for kw in self.keywords:
-                if kw.in_defined_term_set is not None:
-                    this_group = {'name': kw.in_defined_term_set.title,
-                                    'url': kw.in_defined_term_set.url}
-                    this_term = {'name': kw.title,'url': kw.url}
-                    if this_group not in keyword_groups:
-                        keyword_groups.append(this_group)
-                        keywords.append({'name': kw.in_defined_term_set.title,
-                                    'url': kw.in_defined_term_set.url,
-                                    'keywords':[{'name': kw.title,'url': op.url
-                                }]})
-                    elif this_term not in keywords[keyword_groups.index(this_group)]['keywords']:
-                        keywords[keyword_groups.index(this_group)]['keywords'].append(this_term)
+        :return: A generator of strings which together make up the ISO 19139
+                XML
+        :rtype: generator of str
+        """
+        return datasetmd.environment.get_template('iso19139').generate(
+                        **self._iso19139_context())
+    
+    def _iso19139_context(self):
+        """Builds the variables passed to the ISO 19139 template
+        
+        :return: The template variables, keyed by name
+        :rtype: dict
+        """
+        keywords = self._cached('keywords', self._keywords_key(),
+                        lambda: datasetmd.keywordgroups.group_keywords(
+                                    self.observed_properties, self.keywords))
         
         if not keywords:
             keywords = None
         
-        return jinja2.Template(datasetmd.templates.iso19139.template()).render(md=self, 
-                        citation_string=self.cite(CITE_STRING), keywords=keywords)
+        return {'md': self, 
+                    'citation_string': self.cite(CITE_STRING), 
+                    'keywords': keywords}
     
     def toDataCiteXML(self):
         """Outputs a :py:class:`datasetmd.DatasetMD` object as DataCite 
@@ -159,14 +329,137 @@ class DatasetMD:
     def toSchemaDotOrg(self):
         """Outputs a :py:class:`datasetmd.DatasetMD` as a JSON string, 
         following the Earth Science Informatics Partnership's Science on
-        Schema patterns.
+        Schema patterns. The JSON is encoded by 
+        :py:func:`datasetmd.jsonld.dumps`, or served from the render cache
+        when one is set, see :py:mod:`datasetmd.rendercache`.
+        
+        :return: A JSON-LD formatted string using the Schema.org vocabulary
+        :rtype: str
+        """
+        cache = datasetmd.rendercache.get_render_cache()
+        if cache is not None:
+            return cache.render(self, SCHEMA_DOT_ORG,
+                        lambda md: datasetmd.jsonld.dumps(md.toSchemaDotOrgDict()))
+        return datasetmd.jsonld.dumps(self.toSchemaDotOrgDict())
+    
+    async def toSchemaDotOrgAsync(self):
+        """Outputs a :py:class:`datasetmd.DatasetMD` as a JSON-LD string 
+        without blocking the event loop, by rendering it with the shared
+        :py:class:`datasetmd.aio.AsyncRenderer`
+        
+        :raises datasetmd.aio.RendererBusy: If the renderer is bounded and
+                too many renders are already waiting
         
         :return: A JSON-LD formatted string using the Schema.org vocabulary
         :rtype: str
         """
-        authors = datasetmd.templates.schemadotorg_creatorlist.template(self)
-        return jinja2.Template(datasetmd.templates.schemadotorg.template()).render(md=self,
-                    citation_string=self.cite(CITE_STRING),authors=authors)
+        return await datasetmd.aio.get_async_renderer().render(self, 
+                                                            SCHEMA_DOT_ORG)
+    
+    def toSchemaDotOrgDict(self):
+        """Outputs a :py:class:`datasetmd.DatasetMD` as a dictionary which
+        can be encoded as JSON-LD, following the Earth Science Informatics
+        Partnership's Science on Schema patterns.
+        
+        :return: A JSON-LD description using the Schema.org vocabulary
+        :rtype: dict
+        """
+        return datasetmd.jsonld.build(self)
+    
+    def _authors(self):
+        """Builds the list of authors used in Schema.org descriptions
+        
+        :return: The authors, as created by
+                :py:func:`datasetmd.templates.schemadotorg_creatorlist.template`
+        :rtype: list of dict, or None
+        """
+        return self._cached('authors', self._citation_key(),
+                        lambda: datasetmd.templates.schemadotorg_creatorlist.template(self))
+    
+    def _cached(self, name, key, build):
+        """Returns a value derived from the record, building it only if the
+        record has changed since the value was last built
+        
+        :param name: The name of the derived value
+        :type name: str
+        :param key: A snapshot of the parts of the record the value is 
+                derived from, which is compared with the snapshot taken when
+                the cached value was built
+        :type key: tuple, or None
+        :param build: A function which builds the derived value
+        :type build: function
+        
+        :return: The derived value
+        """
+        derived = getattr(self, '_derived', None)
+        if derived is None:
+            derived = self._derived = {}
+        entry = derived.get(name)
+        if entry is None or entry[0] != key:
+            entry = derived[name] = (key, build())
+        return entry[1]
+    
+    def _citation_key(self):
+        """Takes a snapshot of the parts of the record from which the 
+        citation string and author list are derived
+        
+        :rtype: tuple, or None
+        """
+        citation = self.citation
+        if citation is None:
+            return None
+        authors = None
+        if citation.authors is not None:
+            authors = tuple(_author_key(author) for author in citation.authors)
+        doi_publisher = None
+        if citation.doi_publisher is not None:
+            doi_publisher = (citation.doi_publisher.name, 
+                                citation.doi_publisher.country)
+        return (None if self.base is None else self.base.title,
+                    authors,
+                    citation.doi,
+                    citation.doi_publication_date,
+                    doi_publisher,
+                    citation.prefer_short_doi,
+                    citation.short_doi)
+    
+    def _keywords_key(self):
+        """Takes a snapshot of the parts of the record from which the 
+        keyword groups are derived
+        
+        :rtype: tuple
+        """
+        return (_terms_key(self.observed_properties), _terms_key(self.keywords))
+    
+    def clearCache(self):
+        """Discards the values, such as the citation string, which are cached
+        by the :py:class:`datasetmd.DatasetMD` object. Cached values are 
+        rebuilt automatically when the record changes, so this is only needed
+        to free memory.
+        """
+        self._derived = None
+    
+    def isLoaded(self, name):
+        """Tells whether an attribute which may be given as a loader has been
+        loaded, without loading it
+        
+        :param name: One of 'cross_references', 'keywords' or 
+                'observed_properties'
+        :type name: str
+        
+        :rtype: bool
+        """
+        return _is_loaded(self, name)
+    
+    def fingerprint(self):
+        """Computes a content fingerprint of the 
+        :py:class:`datasetmd.DatasetMD` object, which changes whenever any of
+        its metadata changes, see :py:mod:`datasetmd.fingerprint`
+        
+        :return: The hexadecimal SHA-256 hash of the record's content
+        :rtype: str
+        """
+        return datasetmd.fingerprint.fingerprint(self)
         
     def cite(self, citationtype):
         """Creates a citation string for the :py:class:`datasetmd.DatasetMD` 
@@ -181,10 +474,48 @@ class DatasetMD:
         :rtype: str, or None is `type` is not supported
         """
         return_value = None
-        if citationtype.lower() == CITE_STRING:
-            return_value = datasetmd.templates.citationstring.template(self)
+        if citationtype.upper() == CITE_STRING:
+            return_value = self._cached('citation_string', self._citation_key(),
+                        lambda: datasetmd.templates.citationstring.template(self))
         return return_value
 
+def _author_key(author):
+    """Takes a snapshot of the parts of an author from which citation strings
+    and author lists are derived
+    
+    :param author: An author of a dataset
+    :type author: Person or Organisation
+    
+    :rtype: tuple
+    """
+    if isinstance(author, Person):
+        affiliation = None
+        if author.affiliation is not None:
+            affiliation = tuple((org.name, org.country) 
+                                    for org in author.affiliation)
+        return (Person, author.family_name, author.given_name, 
+                    author.name_order, affiliation)
+    elif isinstance(author, Organisation):
+        return (Organisation, author.name, author.country,
+                    None if author.website is None else author.website.url)
+    return (type(author),)
+
+def _terms_key(terms):
+    """Takes a snapshot of the parts of a list of terms from which keyword
+    groups are derived
+    
+    :param terms: A list of terms
+    :type terms: list of DefinedTerm objects, or None
+    
+    :rtype: tuple, or None
+    """
+    if terms is None:
+        return None
+    return tuple((term.title, term.url, None) if term.in_defined_term_set is None
+                    else (term.title, term.url, term.in_defined_term_set.title,
+                            term.in_defined_term_set.url)
+                    for term in terms)
+
 class Base:
     """This class adds basic metadata to a DatasetMD object
     
@@ -200,6 +531,8 @@ class Base:
     :param title: A descriptive title for the dataset
     :type title: str, defaults to None
     """
+    __slots__ = ('abstract', 'created', 'identifier', 'modified', 'title')
+    
     def __init__(self, 
                         abstract=None,
                         created=None,
@@ -249,6 +582,10 @@ class Feature:
             coverage described by the :py:class:`datasetmd.Feature`.
     :type longitude_westernmost: float
     """
+    __slots__ = ('crs_epsg_code', 'id', 'latitude_northernmost',
+                    'latiude_southernmost', 'longitude_easternmost',
+                    'longitude_westernmost')
+    
     def __init__(self, 
                         crs_epsg_code=None,
                         id=None,
@@ -306,6 +643,9 @@ class Organisation:
             :py:class:`datasetmd.Organisation`
     :type website: WebAddress, defaults to None
     """
+    __slots__ = ('administrative_area', 'city', 'country', 'delivery_point',
+                    'email_address', 'name', 'postal_code', 'website')
+    
     def __init__(self,
                         administrative_area=None,
                         city=None,
@@ -352,6 +692,8 @@ class WebAddress:
     :param url: The machine actionable link of the WebAddress
     :type url: str
     """
+    __slots__ = ('title', 'url')
+    
     def __init__(self, title=None, url=None):
         self.url = url
         self.title = title
@@ -366,9 +708,11 @@ class Citation:
     """This class describes any formal citation identifier associated with a
     :py:class:`datasetmd.DatasetMD` object
     
-    :param authors: A list of authors for the dataset
+    :param authors: A list of authors for the dataset, or a function which
+            loads the list when it is first needed
     :type authors: list of :py:class:`datasetmd.Person` or 
-            :py:class:`datasetmd.Organisation` objects, defaults to None
+            :py:class:`datasetmd.Organisation` objects, or function, defaults
+            to None
     :param doi: A digital object identifier associated with the parent
             :py:class:`datasetmd.DatasetMD` instance. The doi given here
             should not use any prefix like http:// or doi:
@@ -386,6 +730,12 @@ class Citation:
             as created by the `Short doi service <https://shortdoi.org/>`__
     :type short_doi: str, defaults to None
     """
+    __slots__ = ('_authors', 'doi', 'doi_publication_date', 'doi_publisher',
+                    'prefer_short_doi', 'short_doi')
+    
+    authors = _lazy_attribute('authors',
+            'The authors of the dataset, or a loader for them')
+    
     def __init__(self, authors=None,
                         doi=None, 
                         doi_publication_date=None,
@@ -398,6 +748,17 @@ class Citation:
         self.authors = authors
         self.doi_publisher = doi_publisher
         self.prefer_short_doi = prefer_short_doi
+    
+    def isLoaded(self, name):
+        """Tells whether an attribute which may be given as a loader has been
+        loaded, without loading it
+        
+        :param name: 'authors'
+        :type name: str
+        
+        :rtype: bool
+        """
+        return _is_loaded(self, name)
                         
     def __str__(self):
         return """
@@ -439,6 +800,8 @@ class Person:
     :type role:
     """
     
+    __slots__ = ('affiliation', 'family_name', 'given_name', 'name_order', 'role')
+    
     def __init__(self,
                     affiliation=None,
                     family_name=None,
@@ -485,6 +848,8 @@ class DefinedTerm(WebAddress):
             or ontology term
     :type url: str, defaults to None
     """
+    __slots__ = ('in_defined_term_set', 'publication_date', 'term_code')
+    
     def __init__(self, in_defined_term_set=None, 
                                         publication_date=None, 
                                         term_code=None,
@@ -521,11 +886,14 @@ class DefinedTermSet(WebAddress):
     :param url: The URL of the controlled vocabulary or ontology
     :type url: str, defaults to None
     """
+    __slots__ = ('publication_date', 'term_code')
+    
     def __init__(self, publication_date=None, 
                                         term_code=None,
                                         title=None, url=None):
         super().__init__(title=title, url=url)
         self.publication_date = publication_date
+        self.term_code = term_code
                     
 class ObservedProperty(DefinedTerm):
     """This class describes properties that have been observed or modelled
@@ -544,6 +912,8 @@ class ObservedProperty(DefinedTerm):
     :param url:
     :type url: str,defaults to None
     """
+    __slots__ = ()
+    
     def __init__(self, in_defined_term_set=None, 
                             publication_date=None,
                             term_code=None, 
@@ -582,6 +952,8 @@ class License:
     :param url: 
     :type url: WebAddress, defaults to None
     """
+    __slots__ = ('description', 'in_defined_term_set', 'name', 'spdx_url', 'url')
+    
     def __init__(self, description=None,
                         in_defined_term_set=None,
                         name=None,
@@ -599,22 +971,29 @@ class Limitations:
     :param use_limitations:
     :type use_limitations: list of str, defaults to None
     """
+    __slots__ = ('use_limitations',)
+    
     def __init__(self, use_limitations=None):
         self.use_limitations = use_limitations
         
 class CrossReference(WebAddress):
-    def __init__(self):
-        """This class defines cross-references to other datasets
-        and relevant metadata objects
-    
-        :param cross_reference_type:
-        :type cross_reference_type: DefinedTerm, defaults to None
-        :param title:
-        :type title: str, defaults to None
-        :param url:
-        :type url: str, defaults to None
+    """This class defines cross-references to other datasets
+    and relevant metadata objects
+    
+    :param cross_reference_type:
+    :type cross_reference_type: DefinedTerm, defaults to None
+    :param title:
+    :type title: str, defaults to None
+    :param url:
+    :type url: str, defaults to None
     """
+    __slots__ = ('cross_reference_type',)
+    
     def __init__(self, cross_reference_type=None, 
                                         title=None, url=None):
         super().__init__(title=title, url=url)
-        self.cross_reference_type = cross_reference_type
\ No newline at end of file
+        self.cross_reference_type = cross_reference_type
+
+import datasetmd.fingerprint, datasetmd.rendercache
+import datasetmd.aio, datasetmd.binary
+from datasetmd.batch import render_many
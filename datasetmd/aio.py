@@ -0,0 +1,275 @@
+"""
+This module provides an :py:mod:`asyncio` interface for rendering
+:py:class:`datasetmd.DatasetMD` objects, for use in asynchronous web
+services. Rendering is CPU bound, so rather than running in the event loop it
+is handed to a small pool of threads, leaving the loop free to serve other
+requests while large records are rendered.
+
+Work is bounded: at most `max_workers` records are rendered at once, and
+coroutines waiting for a renderer queue up behind them. If `max_queued` is
+set, a render requested while that many are already waiting fails at once
+with :py:class:`datasetmd.aio.RendererBusy`, so that a service can turn a
+burst of requests away rather than let unbounded work pile up. Batches
+rendered with :py:meth:`datasetmd.aio.AsyncRenderer.render_many` read ahead
+only `max_pending` records, so a slow consumer holds back a fast producer.
+
+The coroutines :py:meth:`datasetmd.DatasetMD.toISO19139Async` and
+:py:meth:`datasetmd.DatasetMD.toSchemaDotOrgAsync` use the renderer returned
+by :py:func:`datasetmd.aio.get_async_renderer`.
+"""
+
+import asyncio, collections, concurrent.futures, os, threading, weakref
+import datasetmd, datasetmd.batch
+
+_async_renderer = None
+_lock = threading.Lock()
+
+
+class RendererBusy(RuntimeError):
+    """Raised when a render is requested while the maximum number of renders
+    are already waiting"""
+
+
+class AsyncRenderer:
+    """This class renders records in a bounded pool of threads on behalf of
+    coroutines
+
+    :param max_workers: The number of records rendered at once
+    :type max_workers: int, defaults to the number of processors, up to 4
+    :param max_queued: The number of renders which may wait for a worker
+            before further requests fail with
+            :py:class:`datasetmd.aio.RendererBusy`, or None for no limit
+    :type max_queued: int, defaults to None
+    :param max_pending: The number of records a batch reads ahead of its
+            consumer
+    :type max_pending: int, defaults to twice `max_workers`
+    """
+    def __init__(self, max_workers=None, max_queued=None, max_pending=None):
+        if max_workers is None:
+            max_workers = min(4, os.cpu_count() or 1)
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_pending = max_pending or max_workers * 2
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+                                max_workers=max_workers,
+                                thread_name_prefix='datasetmd-render')
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._queued = 0
+
+    def _semaphore(self):
+        """Returns the semaphore bounding the renders of the running event
+        loop
+
+        :rtype: asyncio.Semaphore
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                                                            self.max_workers)
+        return semaphore
+
+    async def _run(self, function, *args):
+        """Runs a function in the pool once a worker is free
+
+        :return: The return value of `function`
+        """
+        semaphore = self._semaphore()
+        self._queued += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued -= 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                                        self._executor, function, *args)
+        finally:
+            semaphore.release()
+
+    async def _submit(self, function, *args):
+        """Runs a function in the pool, failing at once if too many renders
+        are already waiting
+
+        :raises RendererBusy: If `max_queued` renders are waiting
+
+        :return: The return value of `function`
+        """
+        if self.max_queued is not None and self._semaphore().locked() and \
+                self._queued >= self.max_queued:
+            raise RendererBusy('{} renders are already waiting'.format(
+                                                            self._queued))
+        return await self._run(function, *args)
+
+    async def render(self, md, format=datasetmd.ISO19139):
+        """Renders a record
+
+        :param md: The record to be rendered
+        :type md: DatasetMD
+        :param format: The output format, one of
+                :py:data:`datasetmd.ISO19139`,
+                :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+                :py:data:`datasetmd.CITE_STRING`
+        :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+
+        :raises RendererBusy: If `max_queued` renders are waiting
+        :raises ValueError: If `format` is not supported
+
+        :rtype: str
+        """
+        return await self._submit(datasetmd.batch.renderer(format), md)
+
+    async def render_many(self, records, format=datasetmd.ISO19139):
+        """Renders records, yielding them in the same order as `records`.
+        Only `max_pending` records are read ahead of the consumer, which
+        waits rather than failing when the renderer is busy.
+
+        :param records: The records to be rendered
+        :type records: iterable or asynchronous iterable of
+                :py:class:`datasetmd.DatasetMD` objects
+        :param format: The output format
+        :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+
+        :raises ValueError: If `format` is not supported
+
+        :rtype: asynchronous generator of str
+        """
+        render = datasetmd.batch.renderer(format)
+        pending = collections.deque()
+        try:
+            async for md in _aiter(records):
+                pending.append(asyncio.ensure_future(self._run(render, md)))
+                if len(pending) >= self.max_pending:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def iter_iso19139(self, md, chunks=64):
+        """Renders a record as ISO 19139 XML, yielding the text in pieces as
+        it is rendered so that large records can be streamed to a client
+
+        :param md: The record to be rendered
+        :type md: DatasetMD
+        :param chunks: The number of template chunks rendered by each call
+                to the pool and joined into one piece
+        :type chunks: int, defaults to 64
+
+        :raises RendererBusy: If `max_queued` renders are waiting
+
+        :rtype: asynchronous generator of str
+        """
+        generator = await self._submit(md.iterISO19139)
+        # A cancelled consumer stops waiting for a piece, but the worker
+        # rendering it carries on, so the generator is closed only once the
+        # worker has let go of it
+        lock = threading.Lock()
+        try:
+            while True:
+                piece = await self._run(_take, generator, chunks, lock)
+                if piece is None:
+                    break
+                yield piece
+        finally:
+            if lock.acquire(blocking=False):
+                try:
+                    generator.close()
+                finally:
+                    lock.release()
+            else:
+                try:
+                    self._executor.submit(_close, generator, lock)
+                except RuntimeError:
+                    _close(generator, lock)
+
+    def shutdown(self, wait=True):
+        """Stops the threads of the renderer
+
+        :param wait: If True, waits for renders in progress to finish
+        :type wait: bool, defaults to True
+        """
+        self._executor.shutdown(wait=wait)
+
+
+def _take(generator, count, lock):
+    """Joins up to `count` items from a generator of strings, holding a lock
+    while the generator runs
+
+    :return: The joined items, or None if the generator is exhausted
+    :rtype: str, or None
+    """
+    pieces = []
+    with lock:
+        for text in generator:
+            pieces.append(text)
+            if len(pieces) >= count:
+                break
+    if not pieces:
+        return None
+    return ''.join(pieces)
+
+
+def _close(generator, lock):
+    """Closes a generator once no other thread is running it"""
+    with lock:
+        generator.close()
+
+
+async def _aiter(records):
+    """Iterates over a synchronous or asynchronous iterable
+
+    :rtype: asynchronous generator
+    """
+    if hasattr(records, '__aiter__'):
+        async for md in records:
+            yield md
+    else:
+        for md in records:
+            yield md
+
+
+def get_async_renderer():
+    """Returns the renderer shared by the asynchronous serialisers, creating
+    it on the first call
+
+    :rtype: :py:class:`datasetmd.aio.AsyncRenderer`
+    """
+    global _async_renderer
+    if _async_renderer is None:
+        with _lock:
+            if _async_renderer is None:
+                _async_renderer = AsyncRenderer()
+    return _async_renderer
+
+
+def set_async_renderer(renderer=None):
+    """Sets the renderer shared by the asynchronous serialisers, for example
+    to change the number of workers or to bound the number of waiting renders
+
+    :param renderer: The renderer, or None to create a default renderer
+            again when one is next needed
+    :type renderer: :py:class:`datasetmd.aio.AsyncRenderer`, defaults to None
+    """
+    global _async_renderer
+    with _lock:
+        previous = _async_renderer
+        _async_renderer = renderer
+    if previous is not None and previous is not renderer:
+        previous.shutdown(wait=False)
+
+
+async def render_many(records, format=datasetmd.ISO19139):
+    """Renders records with the shared renderer, see
+    :py:meth:`datasetmd.aio.AsyncRenderer.render_many`
+
+    :param records: The records to be rendered
+    :type records: iterable or asynchronous iterable of
+            :py:class:`datasetmd.DatasetMD` objects
+    :param format: The output format
+    :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+
+    :rtype: asynchronous generator of str
+    """
+    async for text in get_async_renderer().render_many(records, format):
+        yield text
@@ -0,0 +1,278 @@
+"""
+This module flattens :py:class:`datasetmd.DatasetMD` objects into
+`Apache Arrow <https://arrow.apache.org>`__ record batches and writes them
+to Parquet files, so that catalogues can be analysed with pandas and other
+columnar tools without rendering and parsing every record.
+
+A catalogue becomes three tables, related by the identifier of each record:
+
+* `records`, with one row per record holding its base metadata, bounding
+  box, coordinate reference system, DOI and publisher
+* `keywords`, with one row per keyword or observed property of a record
+* `authors`, with one row per author of a record
+
+Records are flattened and written in batches of a fixed size, so memory use
+stays bounded however large the catalogue.
+
+PyArrow is an optional dependency of DatasetMD, installed with the `arrow`
+extra, and is needed only by this module.
+
+.. data:: TABLES
+
+      The names of the tables, which are also the names of the Parquet files
+      without their extension
+
+.. data:: DEFAULT_BATCH_SIZE
+
+      The default number of records in each batch
+
+.. data:: RECORDS_SCHEMA
+
+      The schema of the `records` table, or None if PyArrow is not installed
+
+.. data:: KEYWORDS_SCHEMA
+
+      The schema of the `keywords` table, or None if PyArrow is not installed
+
+.. data:: AUTHORS_SCHEMA
+
+      The schema of the `authors` table, or None if PyArrow is not installed
+"""
+
+import collections, datetime, itertools, os, datasetmd
+
+try:
+    import pyarrow, pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TABLES = ('records', 'keywords', 'authors')
+DEFAULT_BATCH_SIZE = 10000
+
+Tables = collections.namedtuple('Tables', TABLES)
+Tables.__doc__ = """A value for each of the `records`, `keywords` and `authors`
+tables"""
+
+if pyarrow is not None:
+    RECORDS_SCHEMA = pyarrow.schema([
+                            ('identifier', pyarrow.string()),
+                            ('title', pyarrow.string()),
+                            ('abstract', pyarrow.string()),
+                            ('created', pyarrow.timestamp('us')),
+                            ('modified', pyarrow.timestamp('us')),
+                            ('west', pyarrow.float64()),
+                            ('south', pyarrow.float64()),
+                            ('east', pyarrow.float64()),
+                            ('north', pyarrow.float64()),
+                            ('crs_epsg_code', pyarrow.int32()),
+                            ('doi', pyarrow.string()),
+                            ('publisher', pyarrow.string()),
+                            ('license', pyarrow.string())])
+    KEYWORDS_SCHEMA = pyarrow.schema([
+                            ('identifier', pyarrow.string()),
+                            ('position', pyarrow.int32()),
+                            ('observed_property', pyarrow.bool_()),
+                            ('title', pyarrow.string()),
+                            ('url', pyarrow.string()),
+                            ('term_code', pyarrow.string()),
+                            ('vocabulary', pyarrow.string()),
+                            ('vocabulary_url', pyarrow.string())])
+    AUTHORS_SCHEMA = pyarrow.schema([
+                            ('identifier', pyarrow.string()),
+                            ('position', pyarrow.int32()),
+                            ('person', pyarrow.bool_()),
+                            ('name', pyarrow.string()),
+                            ('given_name', pyarrow.string()),
+                            ('family_name', pyarrow.string())])
+else:
+    RECORDS_SCHEMA = KEYWORDS_SCHEMA = AUTHORS_SCHEMA = None
+
+
+def _require_pyarrow():
+    """Raises an ImportError if PyArrow is not installed"""
+    if pyarrow is None:
+        raise ImportError('datasetmd.arrow requires PyArrow, which can be '
+                            'installed with pip install datasetmd[arrow]')
+
+
+def _timestamp(value):
+    """Converts a date, datetime or ISO 8601 string to a naive UTC datetime.
+    A trailing `Z` is read as UTC, which
+    :py:meth:`datetime.datetime.fromisoformat` accepts only from Python 3.11.
+
+    :raises ValueError: If `value` is a string that is not an ISO 8601 date
+
+    :rtype: datetime.datetime, or None
+    """
+    if isinstance(value, str):
+        text = value[:-1] + '+00:00' if value[-1:] in ('Z', 'z') else value
+        try:
+            value = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError('{!r} is not an ISO 8601 date'.format(value))
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(
+                                                                tzinfo=None)
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return None
+
+
+def _float(value):
+    """Converts a coordinate to a float
+
+    :rtype: float, or None
+    """
+    return None if value is None else float(value)
+
+
+def _flatten(md, records, keywords, authors):
+    """Appends the rows of a record to the columns of each table"""
+    base = md.base
+    identifier = None if base is None else base.identifier
+    feature = md.feature
+    if feature is None:
+        box = (None, None, None, None, None)
+    else:
+        box = (_float(feature.longitude_westernmost),
+                _float(feature.latiude_southernmost),
+                _float(feature.longitude_easternmost),
+                _float(feature.latitude_northernmost),
+                feature.crs_epsg_code)
+    citation = md.citation
+    row = (identifier,
+            None if base is None else base.title,
+            None if base is None else base.abstract,
+            None if base is None else _timestamp(base.created),
+            None if base is None else _timestamp(base.modified)) + box + (
+            None if citation is None else citation.doi,
+            None if md.publisher is None else md.publisher.name,
+            None if md.license is None else md.license.name)
+    for column, value in zip(records, row):
+        column.append(value)
+    position = 0
+    for terms, observed_property in ((md.keywords, False),
+                                        (md.observed_properties, True)):
+        for term in terms or ():
+            vocabulary = term.in_defined_term_set
+            for column, value in zip(keywords, (identifier, position,
+                        observed_property, term.title, term.url,
+                        term.term_code,
+                        None if vocabulary is None else vocabulary.title,
+                        None if vocabulary is None else vocabulary.url)):
+                column.append(value)
+            position += 1
+    if citation is not None:
+        for position, author in enumerate(citation.authors or ()):
+            if isinstance(author, datasetmd.Person):
+                row = (True, ' '.join(name for name in (author.given_name,
+                                    author.family_name) if name) or None,
+                        author.given_name, author.family_name)
+            else:
+                row = (False, getattr(author, 'name', None), None, None)
+            for column, value in zip(authors, (identifier, position) + row):
+                column.append(value)
+
+
+def iter_record_batches(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Flattens records into Arrow record batches, a batch of each table at
+    a time. Only one batch of records is held in memory at once.
+
+    :param records: The records
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param batch_size: The number of records in each batch
+    :type batch_size: int, defaults to
+            :py:data:`datasetmd.arrow.DEFAULT_BATCH_SIZE`
+
+    :raises ImportError: If PyArrow is not installed
+    :raises ValueError: If a record has a date string that is not ISO 8601
+
+    :return: The batches of the `records`, `keywords` and `authors` tables.
+            The keywords and authors batches hold the rows of the records in
+            the records batch, and may be empty.
+    :rtype: generator of :py:class:`datasetmd.arrow.Tables` of
+            :py:class:`pyarrow.RecordBatch` objects
+    """
+    _require_pyarrow()
+    schemas = (RECORDS_SCHEMA, KEYWORDS_SCHEMA, AUTHORS_SCHEMA)
+    records = iter(records)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        columns = tuple([[] for field in schema] for schema in schemas)
+        for md in batch:
+            _flatten(md, *columns)
+        yield Tables(*(pyarrow.RecordBatch.from_arrays(
+                        [pyarrow.array(column, type=field.type)
+                            for column, field in zip(table, schema)],
+                        schema=schema)
+                    for table, schema in zip(columns, schemas)))
+
+
+def to_tables(records):
+    """Flattens records into Arrow tables held in memory, for catalogues
+    small enough to analyse at once
+
+    :param records: The records
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+
+    :raises ImportError: If PyArrow is not installed
+    :raises ValueError: If a record has a date string that is not ISO 8601
+
+    :rtype: :py:class:`datasetmd.arrow.Tables` of :py:class:`pyarrow.Table`
+            objects
+    """
+    _require_pyarrow()
+    batches = Tables([], [], [])
+    for tables in iter_record_batches(records):
+        for table, batch in zip(batches, tables):
+            table.append(batch)
+    return Tables(*(pyarrow.Table.from_batches(table, schema=schema)
+                    for table, schema in zip(batches, (RECORDS_SCHEMA,
+                                            KEYWORDS_SCHEMA, AUTHORS_SCHEMA))))
+
+
+def write_parquet(records, directory, batch_size=DEFAULT_BATCH_SIZE,
+                    compression='zstd'):
+    """Writes records to Parquet files named after the tables in a
+    directory, one row group per batch, so that catalogues of any size can
+    be written with bounded memory
+
+    :param records: The records
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param directory: The directory in which the files are written, which is
+            created if it does not exist
+    :type directory: str
+    :param batch_size: The number of records in each batch
+    :type batch_size: int, defaults to
+            :py:data:`datasetmd.arrow.DEFAULT_BATCH_SIZE`
+    :param compression: The Parquet compression codec
+    :type compression: str, defaults to 'zstd'
+
+    :raises ImportError: If PyArrow is not installed
+    :raises ValueError: If a record has a date string that is not ISO 8601
+
+    :return: The number of rows written to each table
+    :rtype: :py:class:`datasetmd.arrow.Tables` of int
+    """
+    _require_pyarrow()
+    os.makedirs(directory, exist_ok=True)
+    schemas = (RECORDS_SCHEMA, KEYWORDS_SCHEMA, AUTHORS_SCHEMA)
+    writers = [pyarrow.parquet.ParquetWriter(
+                        os.path.join(directory, name + '.parquet'), schema,
+                        compression=compression)
+                for name, schema in zip(TABLES, schemas)]
+    rows = [0, 0, 0]
+    try:
+        for tables in iter_record_batches(records, batch_size):
+            for i, (writer, batch) in enumerate(zip(writers, tables)):
+                if batch.num_rows:
+                    writer.write_batch(batch)
+                    rows[i] += batch.num_rows
+    finally:
+        for writer in writers:
+            writer.close()
+    return Tables(*rows)
@@ -0,0 +1,112 @@
+"""
+This module provides functions for rendering many
+:py:class:`datasetmd.DatasetMD` objects in a single pass, for example when
+exporting a whole catalogue of records.
+
+.. data:: EXTENSIONS
+
+      The file name extension used for records written in each output format
+"""
+
+import os, datasetmd, datasetmd.parallel, datasetmd.rendercache
+
+EXTENSIONS = {
+    datasetmd.ISO19139: '.xml',
+    datasetmd.SCHEMA_DOT_ORG: '.json',
+    datasetmd.CITE_STRING: '.txt',
+}
+
+
+def file_name(identifier, format):
+    """Returns the name of the file to which a record is written, made from
+    its identifier and the extension of the output format. Path separators
+    and percent signs in the identifier are percent-encoded, so different
+    identifiers always have different file names.
+
+    :param identifier: The identifier of the record
+    :type identifier: str
+    :param format: The output format
+    :type format: str
+
+    :rtype: str
+    """
+    identifier = identifier.replace('%', '%25')
+    for separator in (os.sep, os.altsep):
+        if separator is not None:
+            identifier = identifier.replace(separator,
+                                            '%{:02X}'.format(ord(separator)))
+    return identifier + EXTENSIONS[format]
+
+
+def renderer(format):
+    """Creates a function which renders a single
+    :py:class:`datasetmd.DatasetMD` object to the requested format. Any setup
+    work, such as fetching the compiled template, is done once when the
+    renderer is created rather than for every record. If a render cache is
+    set with :py:func:`datasetmd.rendercache.set_render_cache` when the
+    renderer is created, output is served from and added to the cache.
+
+    :param format: The output format, one of
+            :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str
+
+    :raises ValueError: If `format` is not supported
+
+    :return: A function taking a :py:class:`datasetmd.DatasetMD` object and
+            returning the rendered record
+    :rtype: function
+    """
+    render = _renderer(format)
+    cache = datasetmd.rendercache.get_render_cache()
+    if cache is None or format not in datasetmd.rendercache.CACHED_FORMATS:
+        return render
+    return lambda md: cache.render(md, format, render)
+
+
+def _renderer(format):
+    """Creates a function which renders a single
+    :py:class:`datasetmd.DatasetMD` object without the render cache
+
+    :rtype: function
+    """
+    if format == datasetmd.ISO19139:
+        template = datasetmd.environment.get_template('iso19139')
+        return lambda md: template.render(**md._iso19139_context())
+    elif format == datasetmd.SCHEMA_DOT_ORG:
+        encode = datasetmd.jsonld.get_json_encoder()
+        return lambda md: encode(datasetmd.jsonld.build(md))
+    elif format == datasetmd.CITE_STRING:
+        return lambda md: md.cite(datasetmd.CITE_STRING)
+    raise ValueError('Unsupported output format: {}'.format(format))
+
+
+def render_many(records, format=datasetmd.ISO19139, workers=None):
+    """Renders an iterable of :py:class:`datasetmd.DatasetMD` objects. The
+    records are consumed lazily and the rendered output is yielded in the
+    same order as the input, so arbitrarily long generators of records can
+    be rendered without holding them all in memory.
+
+    :param records: The records to be rendered
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param format: The output format, one of
+            :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+    :param workers: The number of processes to render records in. When None
+            or 1, records are rendered in the calling process, otherwise they
+            are rendered by :py:func:`datasetmd.parallel.export`
+    :type workers: int, defaults to None
+
+    :raises ValueError: If `format` is not supported
+
+    :return: A generator of rendered records
+    :rtype: generator of str
+    """
+    render = renderer(format)
+    if workers is None or workers <= 1:
+        return (render(md) for md in records)
+    return datasetmd.parallel.export(records, format=format, workers=workers)
+
@@ -0,0 +1,391 @@
+"""
+This module provides a compact binary encoding of
+:py:class:`datasetmd.DatasetMD` objects, for passing records between
+processes and storing them far more cheaply than as ISO 19139 XML.
+
+Each metadata object is written as a class code followed by its attribute
+values in the order given by :py:data:`datasetmd.transport.FIELDS`. An
+object referred to more than once within a record, such as a
+:py:class:`datasetmd.DefinedTermSet` shared by many terms or an
+:py:class:`datasetmd.Organisation` which is both publisher and author, is
+written once and referred back to afterwards, and is shared again when the
+record is decoded.
+
+Many records can be written to a single file with
+:py:func:`datasetmd.binary.write_records`. The file ends with an index of the
+position and identifier of every record, and
+:py:class:`datasetmd.binary.RecordFile` memory-maps it, so any record can be
+read by its position or identifier without reading the rest of the file.
+
+.. data:: FORMAT_VERSION
+
+      The version of the binary encoding
+"""
+
+import datetime, decimal, hashlib, mmap, struct, datasetmd, datasetmd.transport
+
+FORMAT_VERSION = 1
+
+_MAGIC = b'DMD'
+_FILE_MAGIC = b'DMDF'
+_INDEX_MAGIC = b'DMDI'
+_SCHEMA = hashlib.sha256(repr([(cls.__name__, fields) for cls, fields
+                    in datasetmd.transport.FIELDS]).encode('utf-8')).digest()[:4]
+_HEADER = _MAGIC + bytes((FORMAT_VERSION,)) + _SCHEMA
+_FOOTER = struct.Struct('<QQ4s')
+_OFFSET = struct.Struct('<Q')
+_DOUBLE = struct.Struct('<d')
+
+_NONE, _TRUE, _FALSE, _INT, _NEGATIVE_INT, _FLOAT, _STR, _DATE, _DATETIME, \
+    _DECIMAL, _LIST, _TUPLE, _OBJECT, _REFERENCE = range(14)
+
+_CODES = {cls: code for code, (cls, fields)
+                in enumerate(datasetmd.transport.FIELDS)}
+
+
+def dumps(obj):
+    """Encodes a metadata object
+
+    :param obj: The object to be encoded
+    :type obj: DatasetMD, or any of the other metadata classes
+
+    :raises TypeError: If the object holds a value which cannot be encoded
+
+    :rtype: bytes
+    """
+    out = bytearray(_HEADER)
+    _Encoder(out).encode(obj)
+    return bytes(out)
+
+
+def loads(data):
+    """Decodes a metadata object encoded by :py:func:`datasetmd.binary.dumps`
+
+    :param data: The encoded object
+    :type data: bytes, bytearray or memoryview
+
+    :raises ValueError: If `data` is not an encoded object, or was encoded
+            with another version of the encoding
+
+    :return: The decoded object
+    :rtype: DatasetMD, or any of the other metadata classes
+    """
+    data = memoryview(data)
+    if bytes(data[:len(_HEADER)]) != _HEADER:
+        raise ValueError('The data is not a DatasetMD binary record of '
+                            'version {}'.format(FORMAT_VERSION))
+    return _Decoder(data, len(_HEADER)).decode()
+
+
+def _write_size(out, size):
+    """Writes an unsigned integer as a variable number of bytes"""
+    while size >= 0x80:
+        out.append((size & 0x7f) | 0x80)
+        size >>= 7
+    out.append(size)
+
+
+class _Encoder:
+    """Encodes values into a bytearray, writing objects met before as
+    references to the order in which they were first written
+    """
+    __slots__ = ('out', 'memo')
+
+    def __init__(self, out):
+        self.out = out
+        self.memo = {}
+
+    def encode(self, value):
+        out = self.out
+        cls = type(value)
+        if cls is str:
+            data = value.encode('utf-8')
+            out.append(_STR)
+            _write_size(out, len(data))
+            out += data
+            return
+        code = _CODES.get(cls)
+        if code is not None:
+            index = self.memo.get(id(value))
+            if index is not None:
+                out.append(_REFERENCE)
+                _write_size(out, index)
+                return
+            self.memo[id(value)] = len(self.memo)
+            out.append(_OBJECT)
+            out.append(code)
+            for field in datasetmd.transport.FIELDS[code][1]:
+                self.encode(getattr(value, field, None))
+            return
+        if value is None:
+            out.append(_NONE)
+        elif cls is list:
+            out.append(_LIST)
+            _write_size(out, len(value))
+            for item in value:
+                self.encode(item)
+        elif cls is bool:
+            out.append(_TRUE if value else _FALSE)
+        elif cls is int:
+            if value >= 0:
+                out.append(_INT)
+                _write_size(out, value)
+            else:
+                out.append(_NEGATIVE_INT)
+                _write_size(out, -value)
+        elif cls is float:
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(value)
+        elif isinstance(value, (list, tuple)):
+            out.append(_LIST if isinstance(value, list) else _TUPLE)
+            _write_size(out, len(value))
+            for item in value:
+                self.encode(item)
+        elif isinstance(value, datetime.datetime):
+            self._text(_DATETIME, value.isoformat())
+        elif isinstance(value, datetime.date):
+            out.append(_DATE)
+            _write_size(out, value.toordinal())
+        elif isinstance(value, decimal.Decimal):
+            self._text(_DECIMAL, str(value))
+        else:
+            raise TypeError('Cannot encode a value of type {}'.format(
+                                                                cls.__name__))
+
+    def _text(self, tag, text):
+        data = text.encode('utf-8')
+        self.out.append(tag)
+        _write_size(self.out, len(data))
+        self.out += data
+
+
+class _Decoder:
+    """Decodes values from a memoryview, starting at `position`"""
+    __slots__ = ('data', 'position', 'objects')
+
+    def __init__(self, data, position):
+        self.data = data
+        self.position = position
+        self.objects = []
+
+    def size(self):
+        data = self.data
+        position = self.position
+        byte = data[position]
+        position += 1
+        if byte < 0x80:
+            self.position = position
+            return byte
+        size = byte & 0x7f
+        shift = 7
+        while True:
+            byte = data[position]
+            position += 1
+            size |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                self.position = position
+                return size
+            shift += 7
+
+    def text(self):
+        size = self.size()
+        start = self.position
+        self.position = start + size
+        return str(self.data[start:self.position], 'utf-8')
+
+    def decode(self):
+        data = self.data
+        position = self.position
+        tag = data[position]
+        if tag == _STR:
+            size = data[position + 1]
+            if size < 0x80:
+                start = position + 2
+                self.position = start + size
+                return str(data[start:start + size], 'utf-8')
+            self.position = position + 1
+            return self.text()
+        self.position = position + 1
+        if tag == _OBJECT:
+            cls, fields = datasetmd.transport.FIELDS[self.data[self.position]]
+            self.position += 1
+            obj = cls.__new__(cls)
+            self.objects.append(obj)
+            for field in fields:
+                setattr(obj, field, self.decode())
+            return obj
+        elif tag == _REFERENCE:
+            return self.objects[self.size()]
+        elif tag == _NONE:
+            return None
+        elif tag == _LIST:
+            return [self.decode() for i in range(self.size())]
+        elif tag == _TRUE:
+            return True
+        elif tag == _FALSE:
+            return False
+        elif tag == _INT:
+            return self.size()
+        elif tag == _NEGATIVE_INT:
+            return -self.size()
+        elif tag == _FLOAT:
+            start = self.position
+            self.position += _DOUBLE.size
+            return _DOUBLE.unpack_from(self.data, start)[0]
+        elif tag == _DATE:
+            return datetime.date.fromordinal(self.size())
+        elif tag == _DATETIME:
+            return datetime.datetime.fromisoformat(self.text())
+        elif tag == _DECIMAL:
+            return decimal.Decimal(self.text())
+        elif tag == _TUPLE:
+            return tuple([self.decode() for i in range(self.size())])
+        raise ValueError('Unknown tag {} at byte {}'.format(tag,
+                                                        self.position - 1))
+
+
+def write_records(records, stream):
+    """Writes records to a binary file which can be read with
+    :py:class:`datasetmd.binary.RecordFile`. Records are encoded and written
+    one at a time, and the stream need not be seekable.
+
+    :param records: The records to be written
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param stream: A file-like object opened for writing bytes, or a file
+            name
+    :type stream: file-like object or str
+
+    :return: The number of records written
+    :rtype: int
+    """
+    if isinstance(stream, str):
+        with open(stream, 'wb') as f:
+            return write_records(records, f)
+    stream.write(_FILE_MAGIC + _HEADER)
+    position = len(_FILE_MAGIC) + len(_HEADER)
+    offsets = bytearray()
+    identifiers = []
+    for md in records:
+        data = bytearray()
+        _Encoder(data).encode(md)
+        offsets += _OFFSET.pack(position)
+        identifiers.append(None if md.base is None else md.base.identifier)
+        stream.write(data)
+        position += len(data)
+    offsets += _OFFSET.pack(position)
+    index = bytearray(offsets)
+    _Encoder(index).encode(identifiers)
+    stream.write(index)
+    stream.write(_FOOTER.pack(len(identifiers), position, _INDEX_MAGIC))
+    return len(identifiers)
+
+
+class RecordFile:
+    """This class reads records from a file written by
+    :py:func:`datasetmd.binary.write_records`. The file is memory-mapped and
+    only the records which are read are decoded, so the file can be much
+    larger than the available memory.
+
+    Records are read by position with `records[i]`, by identifier with
+    :py:meth:`datasetmd.binary.RecordFile.get`, or in order by iterating.
+
+    :param path: The path of the file
+    :type path: str
+
+    :raises ValueError: If the file was not written by
+            :py:func:`datasetmd.binary.write_records`, or was written with
+            another version of the encoding
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mmap = None
+        self._data = None
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._data = memoryview(self._mmap)
+        start = len(_FILE_MAGIC) + len(_HEADER)
+        if len(self._data) < start + _FOOTER.size or \
+                bytes(self._data[:start]) != _FILE_MAGIC + _HEADER:
+            self.close()
+            raise ValueError('{} is not a DatasetMD binary file of version '
+                                '{}'.format(path, FORMAT_VERSION))
+        count, index, magic = _FOOTER.unpack_from(self._data,
+                                            len(self._data) - _FOOTER.size)
+        if magic != _INDEX_MAGIC:
+            self.close()
+            raise ValueError('{} has no record index'.format(path))
+        self._count = count
+        self._index = index
+        self._identifiers = None
+        self._positions = None
+
+    def _offset(self, position):
+        return _OFFSET.unpack_from(self._data,
+                                    self._index + position * _OFFSET.size)[0]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        """Reads the record at a position in the file
+
+        :param position: The position of the record
+        :type position: int
+
+        :raises IndexError: If there is no record at `position`
+
+        :rtype: DatasetMD
+        """
+        if position < 0:
+            position += self._count
+        if not 0 <= position < self._count:
+            raise IndexError('record index out of range')
+        return _Decoder(self._data, self._offset(position)).decode()
+
+    def __iter__(self):
+        for position in range(self._count):
+            yield self[position]
+
+    def identifiers(self):
+        """Returns the identifiers of the records in the file, in order
+
+        :rtype: list of str
+        """
+        if self._identifiers is None:
+            self._identifiers = _Decoder(self._data, self._index +
+                            (self._count + 1) * _OFFSET.size).decode()
+        return self._identifiers
+
+    def get(self, identifier, default=None):
+        """Reads the first record in the file with an identifier
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+        :param default: The value returned if there is no such record
+        :type default: any, defaults to None
+
+        :rtype: DatasetMD
+        """
+        if self._positions is None:
+            self._positions = {}
+            for position, name in enumerate(self.identifiers()):
+                self._positions.setdefault(name, position)
+        position = self._positions.get(identifier)
+        if position is None:
+            return default
+        return self[position]
+
+    def close(self):
+        """Unmaps the file"""
+        if self._data is not None:
+            self._data.release()
+            self._data = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
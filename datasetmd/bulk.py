@@ -0,0 +1,235 @@
+"""
+This module exports Schema.org JSON-LD descriptions of many
+:py:class:`datasetmd.DatasetMD` objects as newline-delimited JSON (NDJSON),
+for example to publish the markup of every dataset landing page in a
+catalogue for search engine harvesting. Records are read from an iterable
+and written one at a time, so catalogues of any size are exported in
+constant memory.
+
+Output can be split into shards bounded by a number of records and a number
+of bytes. For each shard a sitemap listing the landing pages of its records
+can be written, together with a sitemap index listing all of the sitemaps.
+Exporting again into the same directory replaces the files of the earlier
+export with the same prefix, so shards left over from a larger export are
+not published with the new ones.
+
+.. data:: MAX_RECORDS
+
+      The default maximum number of records in a shard, which is the maximum
+      number of URLs allowed in a sitemap
+
+.. data:: MAX_BYTES
+
+      The default maximum size of a shard before compression, which is the
+      maximum size allowed for a sitemap
+"""
+
+import datetime, gzip, os, re, xml.sax.saxutils
+
+MAX_RECORDS = 50000
+MAX_BYTES = 50 * 1024 * 1024
+
+_SITEMAP_NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+
+
+def write_ndjson(records, stream):
+    """Writes the Schema.org JSON-LD descriptions of records to a stream,
+    one record per line
+
+    :param records: The records to be written
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param stream: A file-like object opened for writing text
+    :type stream: file-like object
+
+    :return: The number of records written
+    :rtype: int
+    """
+    count = 0
+    for md in records:
+        stream.write(md.toSchemaDotOrg())
+        stream.write('\n')
+        count += 1
+    return count
+
+
+def _open(path, compress):
+    """Opens a file for writing text, compressing it if requested
+
+    :rtype: file-like object
+    """
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def _lastmod(md):
+    """Returns the last modification date of a record for a sitemap. A
+    sitemap requires a time to have a time zone, so a datetime with a time
+    zone is given in UTC and one without is given as its date only.
+
+    :rtype: str, or None
+    """
+    if md.base is None or md.base.modified is None:
+        return None
+    modified = md.base.modified
+    if isinstance(modified, datetime.datetime):
+        if modified.tzinfo is None:
+            return modified.date().isoformat()
+        return modified.astimezone(datetime.timezone.utc).isoformat(
+                                                        timespec='seconds')
+    if isinstance(modified, datetime.date):
+        return modified.isoformat()
+    return '{}'.format(modified)
+
+
+class _Shard:
+    """A shard of NDJSON output, and the sitemap listing its records"""
+    def __init__(self, directory, name, compress, with_sitemap):
+        suffix = '.gz' if compress else ''
+        self.data_file = '{}.ndjson{}'.format(name, suffix)
+        self.data = _open(os.path.join(directory, self.data_file), compress)
+        self.sitemap_file = None
+        self.sitemap = None
+        if with_sitemap:
+            self.sitemap_file = '{}.xml{}'.format(name, suffix)
+            self.sitemap = _open(os.path.join(directory, self.sitemap_file),
+                                    compress)
+            self.sitemap.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                                '<urlset xmlns="{}">\n'.format(
+                                                    _SITEMAP_NAMESPACE))
+        self.records = 0
+        self.size = 0
+
+    def write(self, line, size, url, lastmod):
+        self.data.write(line)
+        self.size += size
+        self.records += 1
+        if self.sitemap is not None and url is not None:
+            self.sitemap.write('  <url><loc>{}</loc>{}</url>\n'.format(
+                    xml.sax.saxutils.escape(url),
+                    '' if lastmod is None else
+                        '<lastmod>{}</lastmod>'.format(lastmod)))
+
+    def close(self):
+        self.data.close()
+        if self.sitemap is not None:
+            self.sitemap.write('</urlset>\n')
+            self.sitemap.close()
+
+
+def export_jsonld(records, directory, prefix='datasets', compress=True,
+                    max_records=MAX_RECORDS, max_bytes=MAX_BYTES,
+                    landing_page=None, sitemap_url=None):
+    """Exports the Schema.org JSON-LD descriptions of records as shards of
+    NDJSON files, named `<prefix>-00000.ndjson`, `<prefix>-00001.ndjson` and
+    so on. A new shard is started when the current one reaches `max_records`
+    records or `max_bytes` bytes.
+
+    If `landing_page` is given, a sitemap of the landing pages of the records
+    in each shard is written alongside it as `<prefix>-00000.xml` and so on.
+    If `sitemap_url` is also given, a sitemap index `<prefix>-index.xml`
+    listing every sitemap is written once all the records are exported.
+
+    Once all the records are exported, any shards, sitemaps or sitemap index
+    with the same prefix which were left in `directory` by an earlier export
+    and were not written again are removed.
+
+    :param records: The records to be exported
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param directory: The directory in which the files are written
+    :type directory: str
+    :param prefix: The start of the name of each file
+    :type prefix: str, defaults to 'datasets'
+    :param compress: If True, the shards and sitemaps are gzip compressed
+    :type compress: bool, defaults to True
+    :param max_records: The maximum number of records in a shard
+    :type max_records: int, defaults to :py:data:`datasetmd.bulk.MAX_RECORDS`
+    :param max_bytes: The maximum size of a shard before compression
+    :type max_bytes: int, defaults to :py:data:`datasetmd.bulk.MAX_BYTES`
+    :param landing_page: A function returning the URL of the landing page of
+            a record, or None if it has none
+    :type landing_page: function, defaults to None
+    :param sitemap_url: The URL at which the files in `directory` are
+            published, used to refer to the sitemaps in the sitemap index
+    :type sitemap_url: str, defaults to None
+
+    :return: The names of the NDJSON shards which were written
+    :rtype: list of str
+    """
+    os.makedirs(directory, exist_ok=True)
+    shards = []
+    sitemaps = []
+    shard = None
+    try:
+        for md in records:
+            line = md.toSchemaDotOrg() + '\n'
+            size = len(line.encode('utf-8'))
+            if shard is not None and (shard.records >= max_records or
+                    shard.size + size > max_bytes):
+                shard.close()
+                shard = None
+            if shard is None:
+                shard = _Shard(directory,
+                                '{}-{:05d}'.format(prefix, len(shards)),
+                                compress, landing_page is not None)
+                shards.append(shard.data_file)
+                if shard.sitemap_file is not None:
+                    sitemaps.append(shard.sitemap_file)
+            url = None
+            if landing_page is not None:
+                url = landing_page(md)
+            shard.write(line, size, url, _lastmod(md))
+    finally:
+        if shard is not None:
+            shard.close()
+    if sitemaps and sitemap_url is not None:
+        index = '{}-index.xml'.format(prefix)
+        _write_sitemap_index(os.path.join(directory, index), sitemap_url,
+                                sitemaps)
+    else:
+        index = None
+    _remove_stale(directory, prefix, set(shards + sitemaps + [index]))
+    return shards
+
+
+def _remove_stale(directory, prefix, written):
+    """Removes the files of an earlier export with the same prefix which
+    were not written again
+
+    :param directory: The directory of the export
+    :type directory: str
+    :param prefix: The start of the name of each file
+    :type prefix: str
+    :param written: The names of the files which were written
+    :type written: set of str
+    """
+    pattern = re.compile(re.escape(prefix) +
+                            r'-(\d{5,}\.(ndjson|xml)(\.gz)?|index\.xml)\Z')
+    for name in os.listdir(directory):
+        if name not in written and pattern.match(name):
+            os.remove(os.path.join(directory, name))
+
+
+def _write_sitemap_index(path, sitemap_url, sitemaps):
+    """Writes a sitemap index
+
+    :param path: The path of the sitemap index
+    :type path: str
+    :param sitemap_url: The URL at which the sitemaps are published
+    :type sitemap_url: str
+    :param sitemaps: The file names of the sitemaps
+    :type sitemaps: list of str
+    """
+    if not sitemap_url.endswith('/'):
+        sitemap_url += '/'
+    lastmod = datetime.date.today().isoformat()
+    with open(path, 'w', encoding='utf-8') as stream:
+        stream.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<sitemapindex xmlns="{}">\n'.format(
+                                                    _SITEMAP_NAMESPACE))
+        for sitemap in sitemaps:
+            stream.write('  <sitemap><loc>{}</loc><lastmod>{}</lastmod>'
+                            '</sitemap>\n'.format(
+                                xml.sax.saxutils.escape(sitemap_url + sitemap),
+                                lastmod))
+        stream.write('</sitemapindex>\n')
@@ -0,0 +1,350 @@
+"""
+This module provides an in-memory catalogue of
+:py:class:`datasetmd.DatasetMD` objects, keyed by the identifier of their
+:py:class:`datasetmd.Base` metadata, with secondary indexes which answer
+common questions without scanning every record:
+
+* which records use a vocabulary term, by the URL or term code of one of
+  their keywords or observed properties
+* which records are owned or published by an organisation, by its name
+* which record has a digital object identifier
+* which records were modified or created within a range of dates
+
+The indexes are kept up to date as records are added, replaced and removed.
+Term, organisation and DOI lookups take constant time, and date ranges are
+found by binary search.
+
+The index entries of a record are taken when it is added, so a record which
+is changed while in the catalogue should be added again to update them.
+Indexing reads the keywords and observed properties of records, so lists
+given as loaders are loaded when a record is added.
+"""
+
+import bisect, datetime, heapq, datasetmd
+
+
+def _date_key(value):
+    """Converts a date, datetime or ISO 8601 string to a naive datetime, so
+    that the dates of different records can be compared
+
+    :return: The datetime, or None if `value` is not a recognisable date
+    :rtype: datetime.datetime, or None
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(datetime.timezone.utc).replace(
+                                                                tzinfo=None)
+        return value
+    if isinstance(value, datetime.date):
+        return datetime.datetime(value.year, value.month, value.day)
+    return None
+
+
+class _DateIndex:
+    """A sorted index of (date, identifier) pairs. New entries are collected
+    and merged into the index when it is next searched, so adding many
+    records at once costs a single sort. Removed entries are marked rather
+    than deleted from the sorted list, and are dropped together once they
+    make up half of it, so replacing records costs constant time.
+    """
+    __slots__ = ('entries', 'pending', 'removed')
+
+    def __init__(self):
+        self.entries = []
+        self.pending = {}
+        self.removed = set()
+
+    def add(self, date, identifier):
+        entry = (date, identifier)
+        if entry in self.removed:
+            self.removed.discard(entry)
+        else:
+            self.pending[entry] = None
+
+    def remove(self, date, identifier):
+        entry = (date, identifier)
+        if entry in self.pending:
+            del self.pending[entry]
+        else:
+            self.removed.add(entry)
+
+    def _merge(self):
+        """Merges the pending entries into the sorted list, and drops the
+        removed entries from it if there are enough of them
+        """
+        entries = self.entries
+        if self.pending:
+            pending = sorted(self.pending)
+            self.pending = {}
+            if len(pending) <= 64:
+                for entry in pending:
+                    bisect.insort(entries, entry)
+            else:
+                entries = list(heapq.merge(entries, pending))
+        if self.removed and len(self.removed) * 2 >= len(entries):
+            removed = self.removed
+            entries = [entry for entry in entries if entry not in removed]
+            self.removed = set()
+        self.entries = entries
+
+    def between(self, start=None, end=None):
+        """Returns the identifiers with dates from `start`, inclusive, up to
+        `end`, exclusive, in date order
+
+        :rtype: list of str
+        """
+        self._merge()
+        entries = self.entries
+        low = 0
+        high = len(entries)
+        if start is not None:
+            low = bisect.bisect_left(entries, (start,))
+        if end is not None:
+            high = bisect.bisect_left(entries, (end,))
+        removed = self.removed
+        return [identifier for date, identifier in entries[low:high]
+                    if not removed or (date, identifier) not in removed]
+
+
+class Catalogue:
+    """This class holds :py:class:`datasetmd.DatasetMD` objects by identifier
+    and maintains secondary indexes over them
+
+    :param records: Records to be added to the catalogue
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects,
+            defaults to an empty tuple
+    """
+    def __init__(self, records=()):
+        self._records = {}
+        self._keys = {}
+        self._terms = {}
+        self._owners = {}
+        self._publishers = {}
+        self._dois = {}
+        self._modified = _DateIndex()
+        self._created = _DateIndex()
+        self.update(records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, identifier):
+        return identifier in self._records
+
+    def __iter__(self):
+        return iter(self._records.values())
+
+    def __getitem__(self, identifier):
+        return self._records[identifier]
+
+    def __delitem__(self, identifier):
+        if identifier not in self._records:
+            raise KeyError(identifier)
+        self.remove(identifier)
+
+    def get(self, identifier, default=None):
+        """Returns a record by its identifier
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+        :param default: The value returned if there is no such record
+        :type default: any, defaults to None
+
+        :rtype: DatasetMD
+        """
+        return self._records.get(identifier, default)
+
+    def identifiers(self):
+        """Returns the identifiers of the records, in the order they were
+        first added
+
+        :rtype: list of str
+        """
+        return list(self._records)
+
+    def add(self, md):
+        """Adds a record to the catalogue, replacing any record with the same
+        identifier
+
+        :param md: The record to be added
+        :type md: DatasetMD
+
+        :raises ValueError: If the record has no identifier
+
+        :return: The record which was replaced, or None
+        :rtype: DatasetMD, or None
+        """
+        identifier = None if md.base is None else md.base.identifier
+        if identifier is None:
+            raise ValueError('Records must have an identifier to be added to '
+                                'a catalogue')
+        previous = self._records.get(identifier)
+        if previous is not None:
+            self._unindex(identifier)
+        self._records[identifier] = md
+        self._index(identifier, md)
+        return previous
+
+    def update(self, records):
+        """Adds many records to the catalogue
+
+        :param records: The records to be added
+        :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+
+        :raises ValueError: If a record has no identifier
+        """
+        for md in records:
+            self.add(md)
+
+    def remove(self, identifier):
+        """Removes a record from the catalogue
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+
+        :return: The record which was removed, or None if there was none
+        :rtype: DatasetMD, or None
+        """
+        md = self._records.pop(identifier, None)
+        if md is not None:
+            self._unindex(identifier)
+        return md
+
+    def with_term(self, term):
+        """Returns the records with a keyword or observed property
+
+        :param term: The URL or term code of the keyword or observed property
+        :type term: str
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return self._lookup(self._terms, term)
+
+    def owned_by(self, name):
+        """Returns the records owned by an organisation
+
+        :param name: The name of one of the `owning_organisations`
+        :type name: str
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return self._lookup(self._owners, name)
+
+    def published_by(self, name):
+        """Returns the records published by an organisation
+
+        :param name: The name of the `publisher`
+        :type name: str
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return self._lookup(self._publishers, name)
+
+    def with_doi(self, doi):
+        """Returns the records with a digital object identifier
+
+        :param doi: The digital object identifier, without any prefix
+        :type doi: str
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return self._lookup(self._dois, doi)
+
+    def modified_between(self, start=None, end=None):
+        """Returns the records last modified within a range of dates, in
+        order of modification
+
+        :param start: The start of the range, included in it, or None for no
+                start
+        :type start: datetime.date or datetime.datetime, defaults to None
+        :param end: The end of the range, excluded from it, or None for no end
+        :type end: datetime.date or datetime.datetime, defaults to None
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return [self._records[identifier] for identifier in
+                    self._modified.between(_date_key(start), _date_key(end))]
+
+    def created_between(self, start=None, end=None):
+        """Returns the records created within a range of dates, in order of
+        creation
+
+        :param start: The start of the range, included in it, or None for no
+                start
+        :type start: datetime.date or datetime.datetime, defaults to None
+        :param end: The end of the range, excluded from it, or None for no end
+        :type end: datetime.date or datetime.datetime, defaults to None
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        return [self._records[identifier] for identifier in
+                    self._created.between(_date_key(start), _date_key(end))]
+
+    def _lookup(self, index, key):
+        """Returns the records listed under a key of an index
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        identifiers = index.get(key)
+        if not identifiers:
+            return []
+        return [self._records[identifier] for identifier in identifiers]
+
+    def _index(self, identifier, md):
+        """Adds the index entries of a record, and keeps them so that exactly
+        these entries are removed later
+        """
+        terms = set()
+        for term_list in (md.keywords, md.observed_properties):
+            if term_list is not None:
+                for term in term_list:
+                    if term.url is not None:
+                        terms.add(term.url)
+                    if term.term_code is not None:
+                        terms.add(term.term_code)
+        owners = set()
+        if md.owning_organisations is not None:
+            owners = {org.name for org in md.owning_organisations
+                        if org.name is not None}
+        publishers = set()
+        if md.publisher is not None and md.publisher.name is not None:
+            publishers.add(md.publisher.name)
+        doi = None
+        if md.citation is not None:
+            doi = md.citation.doi
+        modified = _date_key(md.base.modified)
+        created = _date_key(md.base.created)
+        self._keys[identifier] = (terms, owners, publishers, doi, modified,
+                                    created)
+        for index, keys in ((self._terms, terms), (self._owners, owners),
+                            (self._publishers, publishers)):
+            for key in keys:
+                index.setdefault(key, {})[identifier] = None
+        if doi is not None:
+            self._dois.setdefault(doi, {})[identifier] = None
+        if modified is not None:
+            self._modified.add(modified, identifier)
+        if created is not None:
+            self._created.add(created, identifier)
+
+    def _unindex(self, identifier):
+        """Removes the index entries of a record"""
+        terms, owners, publishers, doi, modified, created = \
+                                                self._keys.pop(identifier)
+        for index, keys in ((self._terms, terms), (self._owners, owners),
+                            (self._publishers, publishers),
+                            (self._dois, () if doi is None else (doi,))):
+            for key in keys:
+                identifiers = index[key]
+                del identifiers[identifier]
+                if not identifiers:
+                    del index[key]
+        if modified is not None:
+            self._modified.remove(modified, identifier)
+        if created is not None:
+            self._created.remove(created, identifier)
@@ -0,0 +1,421 @@
+"""
+This module provides the `datasetmd` command, which converts catalogues of
+ISO 19139 records to ISO 19139, Schema.org JSON-LD or citation strings
+without any Python glue code::
+
+    datasetmd convert records/ --to jsonld --output datasets.ndjson.gz
+    datasetmd convert records/ --to iso19139 --output-directory out/ --incremental
+    datasetmd convert csw-response.xml --to iso19139 --output-directory out/
+    cat records.xml | datasetmd convert - --to cite --jobs 4
+
+Input may be ISO 19139 files, CSW GetRecords responses, directories of these,
+or standard input. Records are read and written one at a time, and rendered
+by a pool of `--jobs` worker processes when more than one is requested. While
+converting, progress is reported on standard error, followed by a summary of
+the throughput.
+
+The command also writes synthetic test catalogues, see
+:py:mod:`datasetmd.synthetic`::
+
+    datasetmd generate --count 100000 --to jsonld corpus.ndjson.gz
+"""
+
+import argparse, collections, glob, gzip, os, sys, tempfile, time
+import xml.etree.ElementTree
+import datasetmd, datasetmd.incremental, datasetmd.registry, datasetmd.rendercache, datasetmd.synthetic
+
+FORMATS = {
+    'iso19139': datasetmd.ISO19139,
+    'jsonld': datasetmd.SCHEMA_DOT_ORG,
+    'cite': datasetmd.CITE_STRING,
+}
+
+
+class Progress:
+    """Reports the progress of a conversion on a stream, at most once every
+    `interval` seconds, and a summary of the throughput when it is finished
+
+    :param stream: The stream to which progress is reported, or None to
+            report nothing
+    :type stream: file-like object
+    :param interval: The minimum time between reports, in seconds
+    :type interval: float, defaults to 1.0
+    """
+    def __init__(self, stream, interval=1.0):
+        self.stream = stream
+        self.interval = interval
+        self.records = 0
+        self.characters = 0
+        self.errors = 0
+        self.start = time.perf_counter()
+        self._reported = self.start
+
+    def update(self, text):
+        """Counts a record which has been output
+
+        :param text: The output of the record
+        :type text: str
+        """
+        self.records += 1
+        self.characters += len(text)
+        if self.stream is None:
+            return
+        now = time.perf_counter()
+        if now - self._reported >= self.interval:
+            self._reported = now
+            self.stream.write('\r{} records, {:.0f} records/s'.format(
+                            self.records, self.records / (now - self.start)))
+            self.stream.flush()
+
+    def error(self, message):
+        """Reports an input which could not be read
+
+        :param message: A description of the error
+        :type message: str
+        """
+        self.errors += 1
+        if self.stream is not None:
+            self.stream.write('\r{}\n'.format(message))
+
+    def summary(self):
+        """Returns a summary of the throughput of the conversion
+
+        :rtype: str
+        """
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        summary = ('{} records in {:.2f} s ({:.0f} records/s, '
+                    '{:.2f} M characters/s)'.format(self.records, elapsed,
+                            self.records / elapsed,
+                            self.characters / elapsed / 1e6))
+        if self.errors:
+            summary += ', {} inputs could not be read'.format(self.errors)
+        return summary
+
+    def finish(self):
+        """Reports the summary of the throughput"""
+        if self.stream is not None:
+            self.stream.write('\r{}\n'.format(self.summary()))
+            self.stream.flush()
+
+
+def _open(path):
+    """Opens a file for writing text, compressing it if the name ends with
+    `.gz`, or returns standard output if the path is `-`
+
+    :rtype: file-like object
+    """
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def iter_inputs(inputs, pattern='*.xml', recursive=False, progress=None,
+                registry=None):
+    """Reads ISO 19139 records from files, directories and standard input
+
+    :param inputs: The paths to be read, where `-` is standard input
+    :type inputs: list of str
+    :param pattern: A glob pattern matching the names of the files to read
+            in directories
+    :type pattern: str, defaults to '*.xml'
+    :param recursive: If True, sub-directories are also read
+    :type recursive: bool, defaults to False
+    :param progress: Reports inputs which could not be read. If None, the
+            errors are raised
+    :type progress: :py:class:`datasetmd.cli.Progress`, defaults to None
+    :param registry: A registry used to share equal keywords and
+            organisations between the records read. If None, every record is
+            read exactly as it is written
+    :type registry: :py:class:`datasetmd.registry.Registry`, defaults to None
+
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    if recursive:
+        pattern = os.path.join('**', pattern)
+    for path in inputs:
+        files = [path]
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, pattern),
+                                        recursive=recursive))
+        for name in files:
+            source = sys.stdin.buffer if name == '-' else name
+            try:
+                if name.endswith('.gz'):
+                    with gzip.open(name, 'rb') as source:
+                        yield from datasetmd.reader.iter_iso19139(source,
+                                                        registry=registry)
+                else:
+                    yield from datasetmd.reader.iter_iso19139(source,
+                                                        registry=registry)
+            except (OSError, xml.etree.ElementTree.ParseError) as error:
+                if progress is None:
+                    raise
+                progress.error('{}: {}'.format(name, error))
+
+
+def _identified(records, identifiers):
+    """Passes records through, keeping their identifiers in the order they
+    were read
+
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    for position, md in enumerate(records):
+        identifier = None
+        if md.base is not None:
+            identifier = md.base.identifier
+        identifiers.append(identifier or 'record-{}'.format(position))
+        yield md
+
+
+def write_documents(documents, format, output):
+    """Writes rendered records to a single stream. ISO 19139 records are
+    wrapped in a CSW GetRecords response, and other formats are written one
+    record per line. The response must give the number of records before
+    them, so ISO 19139 records are first counted into a temporary file.
+
+    :param documents: The rendered records
+    :type documents: iterable of str
+    :param format: The format of the records
+    :type format: str
+    :param output: A file-like object opened for writing text
+    :type output: file-like object
+    """
+    if format == datasetmd.ISO19139:
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+            count = 0
+            for document in documents:
+                if count:
+                    spool.write('\n')
+                spool.write(document)
+                count += 1
+            spool.seek(0)
+            # The records are given to the template as one, since they are
+            # already separated as the template would separate them
+            template = datasetmd.environment.get_template(
+                                                    'csw_getrecordsresponse')
+            for chunk in template.generate(
+                            records=[iter(lambda: spool.read(65536), '')]
+                                        if count else [],
+                            number_of_records=count,
+                            timestamp=time.strftime('%Y-%m-%dT%H:%M:%S')):
+                output.write(chunk)
+    else:
+        for document in documents:
+            output.write(document)
+            output.write('\n')
+
+
+def write_directory(documents, identifiers, format, directory):
+    """Writes rendered records to a directory, one file per record named
+    after its identifier
+
+    :param documents: The rendered records
+    :type documents: iterable of str
+    :param identifiers: The identifiers of the records, in the same order
+    :type identifiers: collections.deque of str
+    :param format: The format of the records
+    :type format: str
+    :param directory: The directory in which the files are written
+    :type directory: str
+    """
+    os.makedirs(directory, exist_ok=True)
+    for document in documents:
+        name = datasetmd.batch.file_name(identifiers.popleft(), format)
+        with open(os.path.join(directory, name), 'w',
+                    encoding='utf-8') as stream:
+            stream.write(document)
+
+
+def convert(records, format, output='-', output_directory=None, jobs=1,
+                progress=None):
+    """Renders records and writes them to a stream or a directory
+
+    :param records: The records to be converted
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param format: One of :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str
+    :param output: The output file, compressed if its name ends with `.gz`,
+            or `-` for standard output
+    :type output: str, defaults to '-'
+    :param output_directory: If given, each record is written to its own file
+            in this directory instead of to `output`
+    :type output_directory: str, defaults to None
+    :param jobs: The number of worker processes rendering records
+    :type jobs: int, defaults to 1
+    :param progress: Counts the records which are output
+    :type progress: :py:class:`datasetmd.cli.Progress`, defaults to None
+
+    :return: The progress of the conversion
+    :rtype: :py:class:`datasetmd.cli.Progress`
+    """
+    if progress is None:
+        progress = Progress(None)
+    identifiers = collections.deque()
+    documents = datasetmd.render_many(_identified(records, identifiers),
+                                        format, workers=jobs)
+
+    def counted():
+        for document in documents:
+            progress.update(document)
+            yield document
+
+    if output_directory is not None:
+        write_directory(counted(), identifiers, format, output_directory)
+    else:
+        stream = _open(output)
+        try:
+            write_documents(counted(), format, stream)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+    return progress
+
+
+def _registry(args):
+    """Returns the registry used to intern the records read, if interning
+    was requested
+
+    :rtype: :py:class:`datasetmd.registry.Registry`, or None
+    """
+    if args.intern:
+        return datasetmd.registry.Registry()
+    return None
+
+
+def _convert(args):
+    progress = Progress(None if args.quiet else sys.stderr)
+    if args.incremental:
+        return _convert_incremental(args, progress)
+    convert(iter_inputs(args.inputs, args.pattern, args.recursive, progress,
+                        _registry(args)),
+            FORMATS[args.to], args.output, args.output_directory, args.jobs,
+            progress)
+    progress.finish()
+    return 1 if progress.errors else 0
+
+
+def _convert_incremental(args, progress):
+    # Inputs which cannot be read stop the export, as their records would
+    # otherwise be taken to have been removed and their files deleted
+    records = iter_inputs(args.inputs, args.pattern, args.recursive,
+                            registry=_registry(args))
+    try:
+        summary = datasetmd.incremental.export_incremental(records,
+                        args.output_directory, FORMATS[args.to],
+                        workers=args.jobs, callback=progress.update)
+    except (OSError, ValueError, xml.etree.ElementTree.ParseError) as error:
+        progress.error(str(error))
+        return 1
+    progress.finish()
+    if not args.quiet:
+        sys.stderr.write('{} written, {} unchanged, {} deleted\n'.format(
+                            *summary))
+    return 0
+
+
+def _generate(args):
+    progress = Progress(None if args.quiet else sys.stderr)
+    records = datasetmd.synthetic.Generator(seed=args.seed).records(
+                                                    args.count, args.start)
+    convert(records, FORMATS[args.to], args.output, args.output_directory,
+            args.jobs, progress)
+    progress.finish()
+    return 0
+
+
+def _parser():
+    """Builds the parser for the command line arguments
+
+    :rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(prog='datasetmd',
+                    description='Convert dataset metadata records between '
+                                'formats.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument('--to', choices=sorted(FORMATS), default='jsonld',
+                    help='output format (default: %(default)s)')
+    destination = output.add_mutually_exclusive_group()
+    destination.add_argument('-o', '--output', default='-',
+                    help='output file, compressed if it ends with .gz '
+                         '(default: standard output)')
+    destination.add_argument('-d', '--output-directory',
+                    help='write each record to its own file in this '
+                         'directory')
+    output.add_argument('-j', '--jobs', type=int, default=1,
+                    help='number of worker processes rendering records '
+                         '(default: %(default)s)')
+    output.add_argument('-q', '--quiet', action='store_true',
+                    help='do not report progress')
+    output.add_argument('--render-cache', metavar='PATH',
+                    help='keep rendered records in this cache file between '
+                         'runs')
+    output.add_argument('--render-cache-size', type=int, default=256,
+                    metavar='MB',
+                    help='maximum size of the render cache '
+                         '(default: %(default)s)')
+
+    convert = commands.add_parser('convert', parents=[output],
+                    help='convert ISO 19139 records',
+                    description='Convert ISO 19139 records and CSW responses.')
+    convert.add_argument('inputs', nargs='+', metavar='input',
+                    help='file, directory or - for standard input')
+    convert.add_argument('--pattern', default='*.xml',
+                    help='names of the files to read in directories '
+                         '(default: %(default)s)')
+    convert.add_argument('-r', '--recursive', action='store_true',
+                    help='also read sub-directories')
+    convert.add_argument('-i', '--incremental', action='store_true',
+                    help='only write records which have changed since the '
+                         'last export to the output directory, and delete '
+                         'the files of removed records')
+    convert.add_argument('--intern', action='store_true',
+                    help='share equal keywords and organisations between '
+                         'records to reduce memory use; only objects whose '
+                         'fields are all equal are shared')
+    convert.set_defaults(run=_convert)
+
+    generate = commands.add_parser('generate', parents=[output],
+                    help='write a synthetic catalogue',
+                    description='Write a synthetic catalogue.')
+    generate.add_argument('--count', type=int, default=1000,
+                    help='number of records (default: %(default)s)')
+    generate.add_argument('--seed', type=int, default=0,
+                    help='seed for the catalogue (default: %(default)s)')
+    generate.add_argument('--start', type=int, default=0,
+                    help='position of the first record (default: %(default)s)')
+    generate.set_defaults(run=_generate)
+    return parser
+
+
+def main(argv=None):
+    """Runs the `datasetmd` command
+
+    :param argv: The command line arguments
+    :type argv: list of str, defaults to the arguments of the process
+
+    :return: The exit status
+    :rtype: int
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if getattr(args, 'incremental', False) and args.output_directory is None:
+        parser.error('--incremental requires --output-directory')
+    if args.render_cache is not None:
+        datasetmd.rendercache.set_render_cache(args.render_cache,
+                                    args.render_cache_size * 1024 * 1024)
+    try:
+        return args.run(args)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
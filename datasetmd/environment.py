@@ -0,0 +1,106 @@
+"""
+This module provides the Jinja2 environment shared by all of the serialisers
+of :py:class:`datasetmd.DatasetMD`. The templates defined in
+:py:mod:`datasetmd.templates` are compiled the first time they are requested
+and the compiled templates are then reused for the life of the process.
+
+Optionally, compiled templates can also be written to a bytecode cache on disk
+so that new processes can skip the compilation step altogether.
+
+.. data:: TEMPLATE_NAMES
+
+      The names of the templates in :py:mod:`datasetmd.templates` which can
+      be loaded through :py:func:`datasetmd.environment.get_template`
+"""
+
+import threading, jinja2, datasetmd.templates
+
+TEMPLATE_NAMES = ('csw_getrecordsresponse', 'iso19139', 'schemadotorg')
+
+_environment = None
+_bytecode_cache_directory = None
+_lock = threading.Lock()
+
+
+def _load_template(name):
+    """Loads the source of one of the templates in
+    :py:mod:`datasetmd.templates`
+
+    :param name: The name of the template, one of
+            :py:data:`datasetmd.environment.TEMPLATE_NAMES`
+    :type name: str
+
+    :return: The template source, or None if `name` is not a known template
+    :rtype: str, or None
+    """
+    if name not in TEMPLATE_NAMES:
+        return None
+    return getattr(datasetmd.templates, name).template()
+
+
+def get_environment():
+    """Returns the shared Jinja2 environment, creating it on the first call
+
+    :return: The Jinja2 environment used to render DatasetMD objects
+    :rtype: jinja2.Environment
+    """
+    global _environment
+    if _environment is None:
+        with _lock:
+            if _environment is None:
+                bytecode_cache = None
+                if _bytecode_cache_directory is not None:
+                    bytecode_cache = jinja2.FileSystemBytecodeCache(
+                                                _bytecode_cache_directory)
+                _environment = jinja2.Environment(
+                                    loader=jinja2.FunctionLoader(_load_template),
+                                    bytecode_cache=bytecode_cache)
+    return _environment
+
+
+def get_template(name):
+    """Returns a compiled template from the shared Jinja2 environment. The
+    template is only compiled on the first call for each `name`.
+
+    :param name: The name of the template, one of
+            :py:data:`datasetmd.environment.TEMPLATE_NAMES`
+    :type name: str
+
+    :return: The compiled template
+    :rtype: jinja2.Template
+    """
+    return get_environment().get_template(name)
+
+
+def get_bytecode_cache():
+    """Returns the directory in which compiled templates are cached between
+    processes
+
+    :return: The bytecode cache directory, or None if it is disabled
+    :rtype: str, or None
+    """
+    return _bytecode_cache_directory
+
+
+def set_bytecode_cache(directory=None):
+    """Sets a directory in which compiled templates are cached between
+    processes. Setting the directory discards the current shared environment,
+    so it should be called before any records are rendered.
+
+    :param directory: The directory used to store compiled templates, or None
+            to disable the bytecode cache
+    :type directory: str, defaults to None
+    """
+    global _environment, _bytecode_cache_directory
+    with _lock:
+        _bytecode_cache_directory = directory
+        _environment = None
+
+
+def warm_up():
+    """Compiles all of the templates in
+    :py:data:`datasetmd.environment.TEMPLATE_NAMES`, so that the first record
+    rendered by a new process does not pay for template compilation
+    """
+    for name in TEMPLATE_NAMES:
+        get_template(name)
@@ -0,0 +1,417 @@
+"""
+This module packs the bounding boxes of many :py:class:`datasetmd.Feature`
+objects into columns of `NumPy <https://numpy.org>`__ arrays, so that
+catalogue-wide operations such as filtering records by region, measuring
+their coverage or finding the extent of a group of records run over whole
+arrays at once rather than one feature at a time.
+
+NumPy is an optional dependency of DatasetMD, installed with the `numpy`
+extra, and is needed only by this module.
+
+Longitudes are in degrees from -180 to 180. A box whose westernmost
+longitude is east of its easternmost longitude crosses the antimeridian, and
+every operation treats longitudes as wrapping around the globe. Features
+without a complete bounding box are held as NaN, and never intersect,
+contain or lie within another box.
+
+.. data:: EARTH_RADIUS
+
+      The mean radius of the Earth in kilometres, used to calculate areas
+"""
+
+import datasetmd
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+EARTH_RADIUS = 6371.0088
+
+
+def _require_numpy():
+    """Raises an ImportError if NumPy is not installed"""
+    if numpy is None:
+        raise ImportError('datasetmd.featurearray requires NumPy, which can '
+                            'be installed with pip install datasetmd[numpy]')
+
+
+def _widths(west, east):
+    """Returns the widths in degrees of longitude of boxes, allowing for
+    boxes which cross the antimeridian
+
+    :rtype: numpy.ndarray
+    """
+    span = east - west
+    return numpy.where(span < 0.0, span + 360.0, span)
+
+
+def _offsets(differences):
+    """Brings differences between longitudes, from -360 to 360, into the
+    range 0 to 360, giving how far east one longitude lies of another
+
+    :rtype: numpy.ndarray
+    """
+    return numpy.where(differences < 0.0, differences + 360.0, differences)
+
+
+def _box(west, south, east, north):
+    """Returns the parts of a query box needed by the vectorised operations
+
+    :return: The west, south and north of the box, and its width
+    :rtype: tuple of float
+    """
+    west = float(west)
+    east = float(east)
+    south = float(south)
+    north = float(north)
+    if south > north:
+        south, north = north, south
+    width = 360.0 if east - west >= 360.0 else (east - west) % 360.0
+    return float(_wrap(west)), south, north, width
+
+
+def _wrap(longitudes):
+    """Brings longitudes into the range -180 to 180
+
+    :rtype: numpy.ndarray
+    """
+    return numpy.where((longitudes >= -180.0) & (longitudes <= 180.0),
+                        longitudes, (longitudes + 180.0) % 360.0 - 180.0)
+
+
+def _feature(west, south, east, north, crs_epsg_code, id):
+    """Unpacks the columns of one feature
+
+    :return: The feature, or None if its bounding box has no values and it
+            has no coordinate reference system or identifier
+    :rtype: :py:class:`datasetmd.Feature`, or None
+    """
+    box = [None if value != value else value
+            for value in (west, south, east, north)]
+    if box == [None] * 4 and not crs_epsg_code and id is None:
+        return None
+    return datasetmd.Feature(crs_epsg_code=crs_epsg_code or None,
+                                id=id,
+                                latitude_northernmost=box[3],
+                                latiude_southernmost=box[1],
+                                longitude_easternmost=box[2],
+                                longitude_westernmost=box[0])
+
+
+class FeatureArray:
+    """This class holds the bounding boxes, coordinate reference systems and
+    identifiers of many features as columns
+
+    :param west: The westernmost longitudes
+    :type west: array-like of float
+    :param south: The southernmost latitudes
+    :type south: array-like of float
+    :param east: The easternmost longitudes
+    :type east: array-like of float
+    :param north: The northernmost latitudes
+    :type north: array-like of float
+    :param crs_epsg_code: The EPSG codes of the coordinate reference
+            systems, with 0 for none
+    :type crs_epsg_code: array-like of int, defaults to None for none
+    :param ids: The identifiers of the features
+    :type ids: list of str, defaults to None for none
+
+    :raises ImportError: If NumPy is not installed
+    :raises ValueError: If the columns differ in length
+    """
+    def __init__(self, west, south, east, north, crs_epsg_code=None,
+                    ids=None):
+        _require_numpy()
+        west = numpy.asarray(west, dtype=numpy.float64)
+        east = numpy.asarray(east, dtype=numpy.float64)
+        # Boxes spanning the globe are held as -180 to 180, and other
+        # longitudes are brought into that range
+        full = east - west >= 360.0
+        self.west = numpy.where(full, -180.0, _wrap(west))
+        self.east = numpy.where(full, 180.0, _wrap(east))
+        self.south = numpy.asarray(south, dtype=numpy.float64)
+        self.north = numpy.asarray(north, dtype=numpy.float64)
+        count = len(self.west)
+        if crs_epsg_code is None:
+            crs_epsg_code = numpy.zeros(count, dtype=numpy.int64)
+        self.crs_epsg_code = numpy.asarray(crs_epsg_code, dtype=numpy.int64)
+        if ids is None:
+            ids = [None] * count
+        self.ids = list(ids)
+        if not len(self.south) == len(self.east) == len(self.north) == \
+                len(self.crs_epsg_code) == len(self.ids) == count:
+            raise ValueError('The columns of a FeatureArray must all have '
+                                'the same length')
+
+    @classmethod
+    def from_features(cls, features):
+        """Packs features into columns
+
+        :param features: The features, or None for records without one
+        :type features: iterable of :py:class:`datasetmd.Feature` objects
+
+        :raises ImportError: If NumPy is not installed
+
+        :rtype: :py:class:`datasetmd.featurearray.FeatureArray`
+        """
+        _require_numpy()
+        columns = ([], [], [], [], [], [])
+        west, south, east, north, crs_epsg_code, ids = columns
+        nan = float('nan')
+        for feature in features:
+            if feature is None:
+                west.append(nan)
+                south.append(nan)
+                east.append(nan)
+                north.append(nan)
+                crs_epsg_code.append(0)
+                ids.append(None)
+                continue
+            for column, value in ((west, feature.longitude_westernmost),
+                                    (south, feature.latiude_southernmost),
+                                    (east, feature.longitude_easternmost),
+                                    (north, feature.latitude_northernmost)):
+                column.append(nan if value is None else value)
+            crs_epsg_code.append(feature.crs_epsg_code or 0)
+            ids.append(feature.id)
+        return cls(*columns)
+
+    @classmethod
+    def from_records(cls, records):
+        """Packs the features of records into columns, in the same order as
+        the records
+
+        :param records: The records
+        :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+
+        :raises ImportError: If NumPy is not installed
+
+        :rtype: :py:class:`datasetmd.featurearray.FeatureArray`
+        """
+        return cls.from_features(md.feature for md in records)
+
+    def to_features(self):
+        """Unpacks the columns into features. Features whose bounding box
+        has no values are returned as None.
+
+        :rtype: list of :py:class:`datasetmd.Feature` objects
+        """
+        return [_feature(*values) for values in zip(self.west.tolist(),
+                    self.south.tolist(), self.east.tolist(),
+                    self.north.tolist(), self.crs_epsg_code.tolist(),
+                    self.ids)]
+
+    def __len__(self):
+        return len(self.west)
+
+    def __getitem__(self, selection):
+        """Selects a feature by its position, or features by a boolean mask,
+        an array of positions or a slice
+
+        :raises IndexError: If a position is out of range
+
+        :return: The feature at a position, which is None if it has no
+                bounding box, or otherwise the selected features
+        :rtype: :py:class:`datasetmd.Feature`, or
+                :py:class:`datasetmd.featurearray.FeatureArray`
+        """
+        if isinstance(selection, (int, numpy.integer)) and \
+                not isinstance(selection, bool):
+            return _feature(self.west[selection].item(),
+                            self.south[selection].item(),
+                            self.east[selection].item(),
+                            self.north[selection].item(),
+                            self.crs_epsg_code[selection].item(),
+                            self.ids[selection])
+        if isinstance(selection, slice):
+            ids = self.ids[selection]
+        else:
+            selection = numpy.asarray(selection)
+            positions = numpy.flatnonzero(selection) \
+                            if selection.dtype == bool else selection
+            ids = [self.ids[i] for i in positions.tolist()]
+        return FeatureArray(self.west[selection], self.south[selection],
+                            self.east[selection], self.north[selection],
+                            self.crs_epsg_code[selection], ids)
+
+    def widths(self):
+        """Returns the widths of the boxes in degrees of longitude
+
+        :rtype: numpy.ndarray
+        """
+        return _widths(self.west, self.east)
+
+    def intersects(self, west, south, east, north):
+        """Tests which boxes intersect a box
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :return: A mask which is True for the boxes which intersect the box
+        :rtype: numpy.ndarray of bool
+        """
+        west, south, north, width = _box(west, south, east, north)
+        # Two arcs of longitude overlap when either begins within the other
+        widths = self.widths()
+        return ((_offsets(west - self.west) <= widths) |
+                (_offsets(self.west - west) <= width)) & \
+                (self.south <= north) & (self.north >= south)
+
+    def contains(self, west, south, east, north):
+        """Tests which boxes contain the whole of a box. A point is given as
+        a box with the same west and east, and south and north.
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :return: A mask which is True for the boxes which contain the box
+        :rtype: numpy.ndarray of bool
+        """
+        west, south, north, width = _box(west, south, east, north)
+        widths = self.widths()
+        return ((_offsets(west - self.west) + width <= widths) |
+                (widths >= 360.0)) & \
+                (self.south <= south) & (self.north >= north)
+
+    def within(self, west, south, east, north):
+        """Tests which boxes lie wholly within a box
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :return: A mask which is True for the boxes within the box
+        :rtype: numpy.ndarray of bool
+        """
+        west, south, north, width = _box(west, south, east, north)
+        return ((_offsets(self.west - west) + self.widths() <= width) |
+                (width >= 360.0)) & \
+                (self.south >= south) & (self.north <= north)
+
+    def intersection(self, west, south, east, north):
+        """Clips the boxes to a box. Where the intersection of a box with the
+        box falls in two pieces, which happens only when the two together go
+        all the way around the globe, the narrower of the two boxes, which
+        encloses both pieces, is given.
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :return: The intersections, with NaN for boxes which do not intersect
+                the box
+        :rtype: :py:class:`datasetmd.featurearray.FeatureArray`
+        """
+        west, south, north, width = _box(west, south, east, north)
+        widths = self.widths()
+        # The offsets of the start of each arc from the start of the other
+        box_offset = _offsets(west - self.west)
+        feature_offset = _offsets(self.west - west)
+        box_starts_within = box_offset <= widths
+        feature_starts_within = feature_offset <= width
+        both = box_starts_within & feature_starts_within
+        narrower_box = width < widths
+        start = numpy.where(box_starts_within, west, self.west)
+        extent = numpy.where(box_starts_within,
+                            numpy.minimum(width, widths - box_offset),
+                            numpy.minimum(widths, width - feature_offset))
+        start = numpy.where(both, numpy.where(narrower_box, west, self.west),
+                            start)
+        extent = numpy.where(both, numpy.minimum(width, widths), extent)
+        disjoint = ~(box_starts_within | feature_starts_within)
+        new_south = numpy.maximum(self.south, south)
+        new_north = numpy.minimum(self.north, north)
+        disjoint |= new_south > new_north
+        new_west = numpy.where(disjoint, numpy.nan, _wrap(start))
+        new_east = numpy.where(disjoint, numpy.nan,
+                                numpy.where(extent >= 360.0, new_west + 360.0,
+                                            _wrap(start + extent)))
+        return FeatureArray(new_west,
+                            numpy.where(disjoint, numpy.nan, new_south),
+                            new_east,
+                            numpy.where(disjoint, numpy.nan, new_north),
+                            self.crs_epsg_code, self.ids)
+
+    def union(self, mask=None):
+        """Returns the smallest box enclosing all of the boxes, or those
+        selected by a mask. Where the boxes are spread around the globe, the
+        box crosses the antimeridian if that makes it narrower.
+
+        :param mask: A mask selecting the boxes
+        :type mask: numpy.ndarray of bool, defaults to None for all boxes
+
+        :return: The box, as a (west, south, east, north) tuple, or None if
+                there are no boxes with values
+        :rtype: tuple of float, or None
+        """
+        west = self.west
+        widths = self.widths()
+        south = self.south
+        north = self.north
+        if mask is not None:
+            west = west[mask]
+            widths = widths[mask]
+            south = south[mask]
+            north = north[mask]
+        valid = ~numpy.isnan(west + widths + south + north)
+        if not valid.any():
+            return None
+        west = west[valid]
+        widths = widths[valid]
+        # The box is the complement of the widest gap between the arcs of
+        # longitude. The arcs are swept in order of their start twice around
+        # the globe, so that the gaps found on the second turn allow for
+        # arcs which wrap past the antimeridian.
+        count = len(west)
+        order = numpy.argsort(west, kind='stable')
+        starts = west[order]
+        starts = numpy.concatenate((starts, starts + 360.0))
+        ends = starts + numpy.concatenate((widths[order], widths[order]))
+        reach = numpy.maximum.accumulate(ends)
+        gaps = starts[count:] - reach[count - 1:-1]
+        widest = int(numpy.argmax(gaps))
+        south = float(south[valid].min())
+        north = float(north[valid].max())
+        if gaps[widest] <= 0.0:
+            return (-180.0, south, 180.0, north)
+        start = float(starts[count + widest]) - 360.0
+        end = float(_wrap(reach[count + widest - 1]))
+        return (start, south, end, north)
+
+    def area(self):
+        """Returns the areas of the boxes on a spherical Earth
+
+        :return: The areas, in square kilometres
+        :rtype: numpy.ndarray
+        """
+        south = numpy.radians(numpy.clip(self.south, -90.0, 90.0))
+        north = numpy.radians(numpy.clip(self.north, -90.0, 90.0))
+        return EARTH_RADIUS ** 2 * numpy.radians(self.widths()) * \
+                numpy.abs(numpy.sin(north) - numpy.sin(south))
@@ -0,0 +1,113 @@
+"""
+This module computes content fingerprints of :py:class:`datasetmd.DatasetMD`
+objects. A fingerprint is a SHA-256 hash of a canonical encoding of every
+attribute of the record and of the objects nested within it, so two records
+with the same content have the same fingerprint whichever process, machine
+or Python version computed it, and any change to the content changes it.
+
+Attributes are encoded by name and attributes whose value is None are left
+out, so adding a new optional attribute to a class does not change the
+fingerprints of existing records.
+
+.. data:: FINGERPRINT_VERSION
+
+      The version of the canonical encoding, which is part of every
+      fingerprint so that fingerprints computed with a different encoding
+      never match
+"""
+
+import datetime, decimal, hashlib, datasetmd, datasetmd.transport
+
+FINGERPRINT_VERSION = 1
+
+_FIELDS = dict(datasetmd.transport.FIELDS)
+
+
+def fingerprint(obj):
+    """Computes the content fingerprint of a metadata object
+
+    :param obj: The object to be fingerprinted
+    :type obj: DatasetMD, or any of the other metadata classes
+
+    :raises TypeError: If the object holds a value which has no canonical
+            encoding
+
+    :return: The hexadecimal SHA-256 hash of the canonical encoding
+    :rtype: str
+    """
+    return hashlib.sha256(canonical(obj).encode('utf-8')).hexdigest()
+
+
+def canonical(obj):
+    """Encodes a metadata object canonically, as used for its fingerprint
+
+    :param obj: The object to be encoded
+    :type obj: DatasetMD, or any of the other metadata classes
+
+    :raises TypeError: If the object holds a value which has no canonical
+            encoding
+
+    :rtype: str
+    """
+    return 'v{}:{}'.format(FINGERPRINT_VERSION, _encode(obj, {}))
+
+
+def _encode(value, memo):
+    """Encodes a single value, reusing the encodings of objects which are
+    shared within the record from `memo`
+
+    :param value: The value to be encoded
+    :param memo: Encoded objects, keyed on the `id` of the object
+    :type memo: dict
+
+    :rtype: str
+    """
+    cls = type(value)
+    if cls is str:
+        return 's%d:%s' % (len(value), value)
+    fields = _FIELDS.get(cls)
+    if fields is not None:
+        key = id(value)
+        encoded = memo.get(key)
+        if encoded is None:
+            parts = ['o', cls.__name__, '{']
+            append = parts.append
+            for field in fields:
+                item = getattr(value, field, None)
+                if item is None:
+                    continue
+                append(field)
+                if type(item) is str:
+                    append('=s%d:' % len(item))
+                    append(item)
+                else:
+                    append('=')
+                    append(_encode(item, memo))
+            append('}')
+            encoded = memo[key] = ''.join(parts)
+        return encoded
+    if isinstance(value, (list, tuple)):
+        return 'l%d[%s]' % (len(value),
+                            ''.join([_encode(item, memo) for item in value]))
+    if value is None:
+        return 'N'
+    encode = _SCALARS.get(cls)
+    if encode is None:
+        for base, encode in _SCALARS.items():
+            if isinstance(value, base):
+                break
+        else:
+            raise TypeError('Cannot fingerprint a value of type {}'.format(
+                                                                cls.__name__))
+    return encode(value)
+
+
+_SCALARS = {
+    bool: lambda value: 'T' if value else 'F',
+    int: lambda value: 'i%d;' % value,
+    float: lambda value: 'f%r;' % value,
+    decimal.Decimal: lambda value: 'd%s;' % value,
+    datetime.datetime: lambda value: 't%s;' % value.isoformat(),
+    datetime.date: lambda value: 'D%s;' % value.isoformat(),
+    str: lambda value: 's%d:%s' % (len(value), value),
+}
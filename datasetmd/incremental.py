@@ -0,0 +1,223 @@
+"""
+This module exports catalogues of :py:class:`datasetmd.DatasetMD` objects
+incrementally, one file per record, re-rendering only the records which have
+changed since the previous export.
+
+A manifest kept alongside the output maps the identifier of each exported
+record to its content fingerprint, see :py:mod:`datasetmd.fingerprint`, and to
+the file it was written to, and holds the version of the templates and code
+the files were rendered with, see
+:py:func:`datasetmd.rendercache.template_version`. On the next export,
+records whose fingerprint is unchanged and whose file still exists are
+skipped, new and changed records are rendered and written, and the files of
+records which are no longer in the catalogue are deleted. If the templates
+or code have changed since, every record is rendered again.
+
+.. data:: MANIFEST_NAME
+
+      The default file name of the manifest, within the output directory
+
+.. data:: MANIFEST_VERSION
+
+      The version of the manifest file format
+"""
+
+import collections, json, os, datasetmd, datasetmd.batch, datasetmd.rendercache
+
+MANIFEST_NAME = '.datasetmd-manifest.json'
+MANIFEST_VERSION = 2
+
+ExportSummary = collections.namedtuple('ExportSummary',
+                                        ('written', 'unchanged', 'deleted'))
+ExportSummary.__doc__ = """The numbers of records written, left unchanged and
+deleted by :py:func:`datasetmd.incremental.export_incremental`"""
+
+
+class Manifest:
+    """This class holds the fingerprint and output file of every record in an
+    incremental export, and reads and writes them as a JSON file
+
+    :param path: The path of the manifest file, which is read if it exists
+    :type path: str
+    :param format: The output format of the export
+    :type format: str
+
+    :raises ValueError: If the existing manifest was written for another
+            output format, or with an unknown version of the manifest format
+    """
+    def __init__(self, path, format):
+        self.path = path
+        self.format = format
+        self.records = {}
+        self.template_version = None
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as stream:
+                content = json.load(stream)
+            if content.get('format') != format:
+                raise ValueError('The manifest {} was written for the {} '
+                                    'format'.format(path, content.get('format')))
+            # Version 1 manifests hold the same records, but no template
+            # version, so every record they list is rendered again
+            if content.get('version') not in (1, MANIFEST_VERSION):
+                raise ValueError('The manifest {} was written with version {} '
+                                    'of the manifest format'.format(path,
+                                                    content.get('version')))
+            self.records = content['records']
+            self.template_version = content.get('template_version')
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, identifier):
+        return identifier in self.records
+
+    def get(self, identifier):
+        """Returns the fingerprint and output file of a record
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+
+        :return: The fingerprint and the file name relative to the output
+                directory, or None if the record is not in the manifest
+        :rtype: tuple of str, or None
+        """
+        entry = self.records.get(identifier)
+        if entry is None:
+            return None
+        return entry['fingerprint'], entry['path']
+
+    def set(self, identifier, fingerprint, path):
+        """Records the fingerprint and output file of a record
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+        :param fingerprint: The fingerprint of the record
+        :type fingerprint: str
+        :param path: The file name relative to the output directory
+        :type path: str
+        """
+        self.records[identifier] = {'fingerprint': fingerprint, 'path': path}
+
+    def remove(self, identifier):
+        """Removes a record from the manifest
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+        """
+        del self.records[identifier]
+
+    def save(self):
+        """Writes the manifest file. The file is replaced in a single step, so
+        an interrupted save leaves the previous manifest in place
+        """
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as stream:
+            json.dump({'version': MANIFEST_VERSION,
+                        'format': self.format,
+                        'template_version': self.template_version,
+                        'records': self.records}, stream,
+                        ensure_ascii=False, sort_keys=True)
+        os.replace(temporary, self.path)
+
+
+def export_incremental(records, directory, format=datasetmd.ISO19139,
+                        manifest_path=None, workers=None, callback=None):
+    """Exports records to a directory, one file per record named after its
+    identifier, rendering and writing only the records which are new or have
+    changed since the previous export to the same directory. Every record
+    is rendered again if the templates or code of the format have changed
+    since. Files of records which were exported before but are no longer in
+    `records` are deleted, so `records` should be the whole catalogue.
+
+    :param records: Every record in the catalogue
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param directory: The directory in which the files are written
+    :type directory: str
+    :param format: The output format, one of
+            :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+    :param manifest_path: The path of the manifest
+    :type manifest_path: str, defaults to
+            :py:data:`datasetmd.incremental.MANIFEST_NAME` in `directory`
+    :param workers: The number of processes to render records in, see
+            :py:func:`datasetmd.render_many`
+    :type workers: int, defaults to None
+    :param callback: A function called with each rendered record after it is
+            written
+    :type callback: function, defaults to None
+
+    :raises ValueError: If a record has no identifier, or the manifest was
+            written for another output format or with an unknown version of
+            the manifest format
+
+    :return: The numbers of records written, unchanged and deleted
+    :rtype: :py:class:`datasetmd.incremental.ExportSummary`
+    """
+    os.makedirs(directory, exist_ok=True)
+    if manifest_path is None:
+        manifest_path = os.path.join(directory, MANIFEST_NAME)
+    manifest = Manifest(manifest_path, format)
+    template_version = datasetmd.rendercache.template_version(format)
+    rendered_before = manifest.template_version == template_version
+    paths = {}
+    pending = collections.deque()
+    unchanged = 0
+
+    def changed():
+        nonlocal unchanged
+        for md in records:
+            identifier = None if md.base is None else md.base.identifier
+            if not identifier:
+                raise ValueError('Records must have an identifier to be '
+                                    'exported incrementally')
+            fingerprint = md.fingerprint()
+            path = paths[identifier] = datasetmd.batch.file_name(identifier,
+                                                                    format)
+            if rendered_before and \
+                    manifest.get(identifier) == (fingerprint, path) and \
+                    os.path.exists(os.path.join(directory, path)):
+                unchanged += 1
+                continue
+            pending.append((identifier, fingerprint, path))
+            yield md
+
+    written = 0
+    deleted = 0
+    # Files are deleted only once every record has been seen, and not if
+    # another record is now written to the same file, as can happen when
+    # the files of a previous export were named differently
+    stale = []
+    try:
+        for document in datasetmd.render_many(changed(), format,
+                                                workers=workers):
+            identifier, fingerprint, path = pending.popleft()
+            with open(os.path.join(directory, path), 'w',
+                        encoding='utf-8') as stream:
+                stream.write(document)
+            previous = manifest.get(identifier)
+            if previous is not None and previous[1] != path:
+                stale.append(previous[1])
+            manifest.set(identifier, fingerprint, path)
+            written += 1
+            if callback is not None:
+                callback(document)
+        for identifier in [identifier for identifier in manifest.records
+                                if identifier not in paths]:
+            stale.append(manifest.get(identifier)[1])
+            manifest.remove(identifier)
+            deleted += 1
+        current = set(paths.values())
+        for path in stale:
+            if path not in current:
+                try:
+                    os.remove(os.path.join(directory, path))
+                except FileNotFoundError:
+                    pass
+        # The version is recorded only once every record has been rendered
+        # with it, so that an interrupted export is finished next time
+        manifest.template_version = template_version
+    finally:
+        manifest.save()
+    return ExportSummary(written, unchanged, deleted)
@@ -0,0 +1,223 @@
+"""
+This module builds Schema.org JSON-LD descriptions of
+:py:class:`datasetmd.DatasetMD` objects directly as Python dictionaries,
+following the Earth Science Informatics Partnership's Science on Schema
+patterns. Building a dictionary avoids text templating, so the output is
+always valid JSON whatever characters the metadata contains, and records can
+be embedded in larger JSON-LD documents without being parsed again.
+
+Dictionaries are encoded to JSON with `orjson <https://github.com/ijl/orjson>`__
+when it is installed, and with the standard library :py:mod:`json` module
+otherwise. Another encoder can be set with
+:py:func:`datasetmd.jsonld.set_json_encoder`.
+
+.. data:: DESCRIPTION_LENGTH
+
+      The length to which descriptions are truncated
+"""
+
+import datetime, json, datasetmd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DESCRIPTION_LENGTH = 5000
+
+_encoder = None
+
+
+def _json_dumps(obj):
+    """Encodes an object to JSON with the standard library
+
+    :param obj: The object to be encoded
+    :type obj: dict
+
+    :rtype: str
+    """
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def _orjson_dumps(obj):
+    """Encodes an object to JSON with orjson
+
+    :param obj: The object to be encoded
+    :type obj: dict
+
+    :rtype: str
+    """
+    return orjson.dumps(obj).decode('utf-8')
+
+
+def get_json_encoder():
+    """Returns the function used to encode JSON-LD dictionaries, which is
+    orjson if it is installed unless another encoder has been set
+
+    :return: A function taking a dictionary and returning a JSON string
+    :rtype: function
+    """
+    if _encoder is not None:
+        return _encoder
+    if orjson is not None:
+        return _orjson_dumps
+    return _json_dumps
+
+
+def set_json_encoder(encoder=None):
+    """Sets the function used to encode JSON-LD dictionaries
+
+    :param encoder: A function taking a dictionary and returning a JSON
+            string, or None to choose the default encoder again
+    :type encoder: function, defaults to None
+    """
+    global _encoder
+    _encoder = encoder
+
+
+def dumps(obj):
+    """Encodes a JSON-LD dictionary to a JSON string
+
+    :param obj: The dictionary to be encoded
+    :type obj: dict
+
+    :rtype: str
+    """
+    return get_json_encoder()(obj)
+
+
+def truncate(text, length=DESCRIPTION_LENGTH, leeway=5, end='...'):
+    """Truncates text at a word boundary in the same way as the Jinja2
+    `truncate` filter
+
+    :param text: The text to be truncated
+    :type text: str
+    :param length: The length of the truncated text, including `end`
+    :type length: int, defaults to
+            :py:data:`datasetmd.jsonld.DESCRIPTION_LENGTH`
+    :param leeway: Text up to this many characters longer than `length` is
+            not truncated
+    :type leeway: int, defaults to 5
+    :param end: The text added to the end of truncated text
+    :type end: str, defaults to '...'
+
+    :rtype: str
+    """
+    if len(text) <= length + leeway:
+        return text
+    return text[:length - len(end)].rsplit(' ', 1)[0] + end
+
+
+def _text(value):
+    """Converts a value, such as a date, to text
+
+    :rtype: str
+    """
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return '{}'.format(value)
+
+
+def _organisation(organisation):
+    """Builds a Schema.org Organization
+
+    :param organisation: The organisation
+    :type organisation: Organisation
+
+    :rtype: dict
+    """
+    obj = {'@type': 'Organization'}
+    if organisation.website is not None:
+        if organisation.website.url is not None:
+            obj['@id'] = organisation.website.url
+    if organisation.name is not None:
+        obj['name'] = organisation.name
+    if organisation.country is not None:
+        obj['address'] = {'@type': 'PostalAddress',
+                            'addressCountry': organisation.country}
+    return obj
+
+
+def _license(license):
+    """Builds the Schema.org license of a dataset
+
+    :param license: The license
+    :type license: License
+
+    :return: The SPDX URL and license URL, one of them, or the license name
+    :rtype: list, str or None
+    """
+    urls = [address.url for address in (license.spdx_url, license.url)
+                if address is not None and address.url is not None]
+    if len(urls) > 1:
+        return urls
+    if urls:
+        return urls[0]
+    return license.name
+
+
+def build(md):
+    """Builds a Schema.org JSON-LD description of a
+    :py:class:`datasetmd.DatasetMD` object
+
+    :param md: The record to be described
+    :type md: DatasetMD
+
+    :return: The JSON-LD description
+    :rtype: dict
+    """
+    obj = {'@context': {'@vocab': 'https://schema.org/'},
+            '@type': 'Dataset'}
+    if md.base is not None:
+        if md.base.title is not None:
+            obj['name'] = md.base.title
+        if md.base.abstract is not None:
+            obj['description'] = truncate(_text(md.base.abstract))
+        if md.base.modified is not None:
+            obj['version'] = _text(md.base.modified)
+    if md.keywords is not None:
+        obj['keywords'] = [kw.title for kw in md.keywords]
+    if md.citation is not None:
+        if md.citation.short_doi is not None:
+            obj['sameAs'] = 'https://doi.org/{}'.format(md.citation.short_doi)
+        if md.citation.doi is not None:
+            obj['identifier'] = {
+                '@id': 'https://doi.org/{}'.format(md.citation.doi),
+                '@type': 'PropertyValue',
+                'propertyID': {
+                        '@id': 'https://registry.identifiers.org/registry/doi'},
+                'value': 'doi:{}'.format(md.citation.doi),
+                'url': 'https://doi.org/{}'.format(md.citation.doi)}
+    if md.observed_properties is not None:
+        variables = []
+        for obsprop in md.observed_properties:
+            variable = {'@type': 'PropertyValue'}
+            if obsprop.title is not None:
+                variable['name'] = obsprop.title
+            if obsprop.url is not None:
+                variable['propertyID'] = {'@id': obsprop.url}
+            variables.append(variable)
+        obj['variableMeasured'] = variables
+    if md.license is not None:
+        license = _license(md.license)
+        if license is not None:
+            obj['license'] = license
+    if md.included_in_data_catalogue is not None:
+        if md.included_in_data_catalogue.url is not None:
+            obj['includedInDataCatalog'] = {
+                '@id': md.included_in_data_catalogue.url,
+                '@type': 'DataCatalog'}
+    citation_string = md.cite(datasetmd.CITE_STRING)
+    if citation_string is not None:
+        obj['citation'] = citation_string
+    authors = md._authors()
+    if authors is not None:
+        obj['creator'] = [dict((('@type' if key == 'type' else key), value)
+                                for key, value in author.items())
+                            for author in authors]
+    if md.publisher is not None:
+        obj['publisher'] = _organisation(md.publisher)
+    if md.owning_organisations is not None:
+        obj['provider'] = [_organisation(org)
+                            for org in md.owning_organisations]
+    return obj
@@ -0,0 +1,57 @@
+"""
+This module groups :py:class:`datasetmd.DefinedTerm` objects, such as the
+`keywords` and `observed_properties` of a :py:class:`datasetmd.DatasetMD`,
+by the :py:class:`datasetmd.DefinedTermSet` they are taken from. The grouped
+structure is used by the ISO 19139 serialiser and can be reused by other
+serialisers.
+"""
+
+
+def group_keywords(*term_lists):
+    """Groups one or more lists of :py:class:`datasetmd.DefinedTerm` objects
+    by the `title` and `url` of their `in_defined_term_set`. Groups and the
+    terms within them are kept in the order they are first seen, and a term
+    with the same `title` and `url` as one already in its group is left out.
+    Terms without an `in_defined_term_set` are ignored.
+
+    :param term_lists: The lists of terms to be grouped. A list may be None
+    :type term_lists: list of :py:class:`datasetmd.DefinedTerm` objects
+
+    :return: A list of groups, each a dictionary with the `name` and `url` of
+            the :py:class:`datasetmd.DefinedTermSet` and a list of `keywords`,
+            each a dictionary with the `name` and `url` of the term
+    :rtype: list of dict
+    """
+    groups = {}
+    seen_terms = {}
+    groups_by_id = {}
+    for terms in term_lists:
+        if terms is None:
+            continue
+        for term in terms:
+            term_set = term.in_defined_term_set
+            if term_set is None:
+                continue
+            # Interned term sets and terms are shared between records, so
+            # objects which have been seen before are found by identity
+            # without building and comparing their keys
+            group_and_seen = groups_by_id.get(id(term_set))
+            if group_and_seen is None:
+                group_key = (term_set.title, term_set.url)
+                group = groups.get(group_key)
+                if group is None:
+                    group = groups[group_key] = {'name': term_set.title,
+                                                    'url': term_set.url,
+                                                    'keywords': []}
+                    seen_terms[group_key] = (set(), set())
+                group_and_seen = groups_by_id[id(term_set)] = (
+                                                group, seen_terms[group_key])
+            group, (seen_ids, seen_keys) = group_and_seen
+            if id(term) in seen_ids:
+                continue
+            seen_ids.add(id(term))
+            term_key = (term.title, term.url)
+            if term_key not in seen_keys:
+                seen_keys.add(term_key)
+                group['keywords'].append({'name': term.title, 'url': term.url})
+    return list(groups.values())
@@ -0,0 +1,162 @@
+"""
+This module provides a parallel export engine, which renders
+:py:class:`datasetmd.DatasetMD` objects in a pool of worker processes so that
+exporting a large catalogue is not limited to a single CPU core.
+
+Records are sent to the workers in chunks, in the compact transport form
+provided by :py:mod:`datasetmd.transport`. Each worker compiles the templates
+once when it starts, using the bytecode cache set with
+:py:func:`datasetmd.environment.set_bytecode_cache` if there is one, and
+shares the render cache set with
+:py:func:`datasetmd.rendercache.set_render_cache`.
+"""
+
+import collections, concurrent.futures, itertools, os, datasetmd, datasetmd.rendercache, datasetmd.transport
+
+_renderers = {}
+
+
+def _initialise_worker(bytecode_cache_directory, render_cache=None):
+    """Prepares a worker process for rendering records
+
+    :param bytecode_cache_directory: The bytecode cache directory of the
+            parent process
+    :type bytecode_cache_directory: str, or None
+    :param render_cache: The path and maximum size of the render cache of
+            the parent process
+    :type render_cache: tuple, or None
+    """
+    if bytecode_cache_directory is not None:
+        datasetmd.environment.set_bytecode_cache(bytecode_cache_directory)
+    if render_cache is not None:
+        datasetmd.rendercache.set_render_cache(*render_cache)
+    datasetmd.environment.warm_up()
+
+
+def _render_chunk(format, chunk):
+    """Renders a chunk of packed records in a worker process
+
+    :param format: The output format
+    :type format: str
+    :param chunk: Records in the form returned by
+            :py:func:`datasetmd.transport.pack`
+    :type chunk: list of tuple
+
+    :return: The rendered records, in the same order as `chunk`
+    :rtype: list of str
+    """
+    if format not in _renderers:
+        _renderers[format] = datasetmd.batch.renderer(format)
+    render = _renderers[format]
+    return [render(datasetmd.transport.unpack(md)) for md in chunk]
+
+
+def export(records, format=datasetmd.ISO19139, workers=None, chunk_size=64,
+                        ordered=True):
+    """Renders an iterable of :py:class:`datasetmd.DatasetMD` objects in a
+    pool of worker processes. Records are consumed lazily and at most two
+    chunks per worker are in flight at any time, so memory use is bounded
+    whatever the number of records.
+
+    :param records: The records to be rendered
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param format: The output format, one of
+            :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str, defaults to :py:data:`datasetmd.ISO19139`
+    :param workers: The number of worker processes
+    :type workers: int, defaults to None, which uses the number of processors
+            on the machine
+    :param chunk_size: The number of records sent to a worker at once
+    :type chunk_size: int, defaults to 64
+    :param ordered: If True, rendered records are yielded in the same order
+            as `records`. If False, they are yielded as soon as they are
+            rendered, together with their position in `records`
+    :type ordered: bool, defaults to True
+
+    :raises ValueError: If `format` is not supported
+
+    :return: A generator of rendered records if `ordered` is True, otherwise
+            a generator of (position, rendered record) tuples
+    :rtype: generator
+    """
+    datasetmd.batch.renderer(format)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if ordered:
+        return _export_ordered(records, format, workers, chunk_size)
+    return _export_unordered(records, format, workers, chunk_size)
+
+
+def _chunks(records, chunk_size):
+    """Splits records into packed chunks
+
+    :param records: The records to be split
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param chunk_size: The number of records in each chunk
+    :type chunk_size: int
+
+    :rtype: generator of list of tuple
+    """
+    records = iter(records)
+    while True:
+        chunk = [datasetmd.transport.pack(md)
+                    for md in itertools.islice(records, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+def _pool(workers):
+    """Creates the worker process pool
+
+    :param workers: The number of worker processes
+    :type workers: int
+
+    :rtype: concurrent.futures.ProcessPoolExecutor
+    """
+    render_cache = datasetmd.rendercache.get_render_cache()
+    if render_cache is not None:
+        render_cache = (render_cache.path, render_cache.max_bytes)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                    initializer=_initialise_worker,
+                    initargs=(datasetmd.environment.get_bytecode_cache(),
+                                render_cache))
+
+
+def _export_ordered(records, format, workers, chunk_size):
+    """Renders records in worker processes, in input order
+
+    :rtype: generator of str
+    """
+    with _pool(workers) as pool:
+        max_pending = workers * 2
+        pending = collections.deque()
+        for chunk in _chunks(records, chunk_size):
+            pending.append(pool.submit(_render_chunk, format, chunk))
+            if len(pending) >= max_pending:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _export_unordered(records, format, workers, chunk_size):
+    """Renders records in worker processes, in the order they complete
+
+    :rtype: generator of (int, str) tuples
+    """
+    with _pool(workers) as pool:
+        max_pending = workers * 2
+        pending = {}
+        position = 0
+        for chunk in _chunks(records, chunk_size):
+            pending[pool.submit(_render_chunk, format, chunk)] = position
+            position += len(chunk)
+            if len(pending) >= max_pending:
+                done = concurrent.futures.wait(pending,
+                        return_when=concurrent.futures.FIRST_COMPLETED).done
+                for future in done:
+                    yield from enumerate(future.result(), pending.pop(future))
+        for future in concurrent.futures.as_completed(pending):
+            yield from enumerate(future.result(), pending[future])
@@ -0,0 +1,397 @@
+"""
+This module reads ISO 19139 XML records into :py:class:`datasetmd.DatasetMD`
+objects. Documents are parsed incrementally with
+:py:func:`xml.etree.ElementTree.iterparse`, and each `gmd:MD_Metadata`
+element is discarded as soon as it has been read, so documents holding many
+records, such as CSW GetRecords responses, and whole directories of records
+can be read with flat memory use.
+
+.. data:: NAMESPACES
+
+      The XML namespace prefixes used when reading ISO 19139 records
+"""
+
+import datetime, glob, io, os, xml.etree.ElementTree, datasetmd
+
+NAMESPACES = {
+    'gco': 'http://www.isotc211.org/2005/gco',
+    'gmd': 'http://www.isotc211.org/2005/gmd',
+    'gml': 'http://www.opengis.net/gml/3.2',
+    'gmx': 'http://www.isotc211.org/2005/gmx',
+    'xlink': 'http://www.w3.org/1999/xlink',
+}
+
+_MD_METADATA = '{{{}}}MD_Metadata'.format(NAMESPACES['gmd'])
+_HREF = '{{{}}}href'.format(NAMESPACES['xlink'])
+_EPSG_PREFIX = 'http://www.opengis.net/def/crs/EPSG/0/'
+
+
+def iter_iso19139(source, registry=None, lazy=False):
+    """Reads every ISO 19139 record in a document, one at a time
+
+    :param source: The document to be read; a file name, the XML as bytes, or
+            a binary file-like object
+    :type source: str, bytes or file-like object
+    :param registry: A registry used to intern the keywords and
+            organisations of each record
+    :type registry: :py:class:`datasetmd.registry.Registry`, defaults to None
+    :param lazy: If True, the keywords and cross references of each record
+            are only read from the XML when they are first accessed, see
+            :py:class:`datasetmd.DatasetMD`. The XML they are read from is
+            kept until then
+    :type lazy: bool, defaults to False
+
+    :return: A generator of the records in the document, in document order
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    parents = []
+    for event, elem in xml.etree.ElementTree.iterparse(source,
+                                                events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag == _MD_METADATA:
+            md = _read_record(elem, lazy)
+            if registry is not None:
+                registry.intern_record(md)
+            elem.clear()
+            if parents:
+                parents[-1].remove(elem)
+            yield md
+
+
+def iter_iso19139_directory(directory, pattern='*.xml', recursive=False,
+                                registry=None, lazy=False):
+    """Reads every ISO 19139 record in the files in a directory, one at a
+    time
+
+    :param directory: The directory to be read
+    :type directory: str
+    :param pattern: A glob pattern matching the names of the files to read
+    :type pattern: str, defaults to '*.xml'
+    :param recursive: If True, sub-directories are also read
+    :type recursive: bool, defaults to False
+    :param registry: A registry used to intern the keywords and
+            organisations of each record
+    :type registry: :py:class:`datasetmd.registry.Registry`, defaults to None
+    :param lazy: If True, lists are loaded on first access, see
+            :py:func:`datasetmd.reader.iter_iso19139`
+    :type lazy: bool, defaults to False
+
+    :return: A generator of the records, ordered by file name
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    if recursive:
+        pattern = os.path.join('**', pattern)
+    for path in sorted(glob.glob(os.path.join(directory, pattern),
+                                    recursive=recursive)):
+        yield from iter_iso19139(path, registry=registry, lazy=lazy)
+
+
+def read_iso19139(source, registry=None, lazy=False):
+    """Reads the first ISO 19139 record in a document
+
+    :param source: The document to be read; a file name, the XML as bytes, or
+            a binary file-like object
+    :type source: str, bytes or file-like object
+    :param registry: A registry used to intern the keywords and
+            organisations of the record
+    :type registry: :py:class:`datasetmd.registry.Registry`, defaults to None
+    :param lazy: If True, lists are loaded on first access, see
+            :py:func:`datasetmd.reader.iter_iso19139`
+    :type lazy: bool, defaults to False
+
+    :return: The record, or None if the document does not contain one
+    :rtype: DatasetMD, or None
+    """
+    records = iter_iso19139(source, registry=registry, lazy=lazy)
+    try:
+        return next(records, None)
+    finally:
+        records.close()
+
+
+def _text(elem, path):
+    """Returns the text of a character string or anchor element
+
+    :param elem: The element to search from
+    :type elem: xml.etree.ElementTree.Element
+    :param path: The path to the element holding the character string
+    :type path: str
+
+    :return: The stripped text, or None if there is none
+    :rtype: str, or None
+    """
+    found = elem.find(path, NAMESPACES)
+    if found is None:
+        return None
+    for child in found:
+        if child.text is not None and child.text.strip():
+            return child.text.strip()
+    return None
+
+
+def _anchor(elem, path):
+    """Returns the text and link of an anchor or character string element
+
+    :param elem: The element to search from
+    :type elem: xml.etree.ElementTree.Element
+    :param path: The path to the element holding the anchor
+    :type path: str
+
+    :return: The text and the link, either of which may be None
+    :rtype: tuple
+    """
+    found = elem.find(path, NAMESPACES)
+    if found is None:
+        return None, None
+    for child in found:
+        text = child.text.strip() if child.text is not None else None
+        return text or None, child.get(_HREF)
+    return None, None
+
+
+def _date(text):
+    """Converts the text of a date or date time element to a date
+
+    :param text: The text of the element
+    :type text: str, or None
+
+    :return: The date, or the text if it is not an ISO 8601 date
+    :rtype: datetime.date, str or None
+    """
+    if text is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _decimal(elem, path):
+    """Returns the value of a decimal element
+
+    :param elem: The element to search from
+    :type elem: xml.etree.ElementTree.Element
+    :param path: The path to the element holding the decimal
+    :type path: str
+
+    :rtype: float, or None
+    """
+    text = _text(elem, path)
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _organisation(party):
+    """Reads a gmd:CI_ResponsibleParty element
+
+    :param party: The responsible party element
+    :type party: xml.etree.ElementTree.Element
+
+    :rtype: Organisation
+    """
+    address = 'gmd:contactInfo/gmd:CI_Contact/gmd:address/gmd:CI_Address/'
+    website = None
+    linkage = party.find('gmd:contactInfo/gmd:CI_Contact/gmd:onlineResource/'
+                    'gmd:CI_OnlineResource/gmd:linkage/gmd:URL', NAMESPACES)
+    if linkage is not None and linkage.text is not None and linkage.text.strip():
+        website = datasetmd.WebAddress(url=linkage.text.strip())
+    return datasetmd.Organisation(
+                administrative_area=_text(party, address + 'gmd:administrativeArea'),
+                city=_text(party, address + 'gmd:city'),
+                country=_text(party, address + 'gmd:country'),
+                delivery_point=_text(party, address + 'gmd:deliveryPoint'),
+                email_address=_text(party, address + 'gmd:electronicMailAddress'),
+                name=_text(party, 'gmd:organisationName'),
+                postal_code=_text(party, address + 'gmd:postalCode'),
+                website=website)
+
+
+def _keywords(identification):
+    """Reads the gmd:descriptiveKeywords elements of a record
+
+    :param identification: The identification element of the record
+    :type identification: xml.etree.ElementTree.Element
+
+    :rtype: list of DefinedTerm objects
+    """
+    keywords = []
+    for group in identification.iterfind('.//gmd:descriptiveKeywords/'
+                                            'gmd:MD_Keywords', NAMESPACES):
+        term_set = None
+        title, url = _anchor(group,
+                            'gmd:thesaurusName/gmd:CI_Citation/gmd:title')
+        if title is not None or url is not None:
+            term_set = datasetmd.DefinedTermSet(title=title, url=url)
+        for keyword in group.iterfind('gmd:keyword', NAMESPACES):
+            for child in keyword:
+                text = child.text.strip() if child.text is not None else None
+                keywords.append(datasetmd.DefinedTerm(
+                                        in_defined_term_set=term_set,
+                                        title=text or None,
+                                        url=child.get(_HREF)))
+                break
+    return keywords
+
+
+def _constraints(identification):
+    """Reads the gmd:resourceConstraints elements of a record
+
+    :param identification: The identification element of the record
+    :type identification: xml.etree.ElementTree.Element
+
+    :return: The limitations and the license, either of which may be None
+    :rtype: tuple
+    """
+    limitations = None
+    license = None
+    for constraints in identification.iterfind('.//gmd:resourceConstraints',
+                                                    NAMESPACES):
+        for use_limitation in constraints.iterfind('.//gmd:useLimitation',
+                                                    NAMESPACES):
+            text = _text(use_limitation, '.')
+            if text is not None:
+                if limitations is None:
+                    limitations = datasetmd.Limitations(use_limitations=[])
+                limitations.use_limitations.append(text)
+        code = constraints.find('gmd:MD_LegalConstraints/gmd:accessConstraints/'
+                                'gmd:MD_RestrictionCode', NAMESPACES)
+        if code is not None and license is None:
+            term_set = None
+            if code.get('codeList'):
+                term_set = datasetmd.DefinedTermSet(url=code.get('codeList'))
+            name = code.text.strip() if code.text is not None else None
+            license = datasetmd.License(in_defined_term_set=term_set,
+                                        name=name or code.get('codeListValue')
+                                                or None)
+    return limitations, license
+
+
+def _cross_references(identification):
+    """Reads the gmd:aggregationInfo elements of a record
+
+    :param identification: The identification element of the record
+    :type identification: xml.etree.ElementTree.Element
+
+    :rtype: list of CrossReference objects, or None
+    """
+    cross_references = []
+    for aggregate in identification.iterfind('.//gmd:aggregationInfo/'
+                                    'gmd:MD_AggregateInformation', NAMESPACES):
+        cross_reference_type = None
+        code = aggregate.find('gmd:initiativeType/gmd:DS_InitiativeTypeCode',
+                                NAMESPACES)
+        if code is not None and (code.get('codeListValue') or code.text):
+            term_set = None
+            if code.get('codeList'):
+                term_set = datasetmd.DefinedTermSet(url=code.get('codeList'))
+            cross_reference_type = datasetmd.DefinedTerm(
+                            in_defined_term_set=term_set,
+                            title=code.get('codeListValue') or code.text.strip())
+        cross_references.append(datasetmd.CrossReference(
+                    cross_reference_type=cross_reference_type,
+                    title=_text(aggregate, 'gmd:aggregateDataSetIdentifier/'
+                                            'gmd:MD_Identifier/gmd:code')))
+    return cross_references or None
+
+
+def _feature(record, identification):
+    """Reads the reference system and bounding box of a record
+
+    :param record: The gmd:MD_Metadata element
+    :type record: xml.etree.ElementTree.Element
+    :param identification: The identification element of the record
+    :type identification: xml.etree.ElementTree.Element, or None
+
+    :rtype: Feature, or None
+    """
+    crs_epsg_code = None
+    code = _text(record, 'gmd:referenceSystemInfo/gmd:MD_ReferenceSystem/'
+                    'gmd:referenceSystemIdentifier/gmd:RS_Identifier/gmd:code')
+    if code is not None:
+        code = code.rsplit('/', 1)[-1].rsplit(':', 1)[-1]
+        if code.isdigit():
+            crs_epsg_code = int(code)
+    box = None
+    if identification is not None:
+        box = identification.find('.//gmd:EX_GeographicBoundingBox', NAMESPACES)
+    if crs_epsg_code is None and box is None:
+        return None
+    feature = datasetmd.Feature(crs_epsg_code=crs_epsg_code)
+    if box is not None:
+        feature.latitude_northernmost = _decimal(box, 'gmd:northBoundLatitude')
+        feature.latiude_southernmost = _decimal(box, 'gmd:southBoundLatitude')
+        feature.longitude_easternmost = _decimal(box, 'gmd:eastBoundLongitude')
+        feature.longitude_westernmost = _decimal(box, 'gmd:westBoundLongitude')
+    return feature
+
+
+def _read_record(record, lazy=False):
+    """Reads a single gmd:MD_Metadata element
+
+    :param record: The gmd:MD_Metadata element
+    :type record: xml.etree.ElementTree.Element
+    :param lazy: If True, the keywords and cross references are given as
+            loaders reading the identification element when called
+    :type lazy: bool, defaults to False
+
+    :rtype: DatasetMD
+    """
+    base = datasetmd.Base(identifier=_text(record, 'gmd:fileIdentifier'),
+                    modified=_date(_text(record, 'gmd:dateStamp')))
+    md = datasetmd.DatasetMD(base=base)
+
+    contact = record.find('gmd:contact/gmd:CI_ResponsibleParty', NAMESPACES)
+    if contact is not None:
+        md.publisher = _organisation(contact)
+
+    doi = _text(record, 'gmd:dataSetURI')
+    short_doi = None
+
+    identification = record.find('gmd:identificationInfo/*', NAMESPACES)
+    if identification is not None:
+        citation = identification.find('gmd:citation/gmd:CI_Citation',
+                                            NAMESPACES)
+        if citation is not None:
+            base.title = _text(citation, 'gmd:title')
+            for date in citation.iterfind('gmd:date/gmd:CI_Date', NAMESPACES):
+                date_type = date.find('gmd:dateType/gmd:CI_DateTypeCode',
+                                        NAMESPACES)
+                if (date_type is not None
+                        and date_type.get('codeListValue') == 'creation'):
+                    base.created = _date(_text(date, 'gmd:date'))
+            for identifier in citation.iterfind('gmd:identifier/'
+                                        'gmd:MD_Identifier', NAMESPACES):
+                code = _text(identifier, 'gmd:code')
+                if code is None or code in (base.identifier, doi):
+                    continue
+                if base.identifier is None:
+                    base.identifier = code
+                elif code.startswith('10/'):
+                    short_doi = code
+                elif doi is None and code.startswith('10.'):
+                    doi = code
+        base.abstract = _text(identification, './/gmd:abstract')
+        owners = [_organisation(party) for party in identification.iterfind(
+                    './/gmd:pointOfContact/gmd:CI_ResponsibleParty', NAMESPACES)]
+        md.owning_organisations = owners or None
+        md.limitations, md.license = _constraints(identification)
+        if lazy:
+            md.keywords = lambda: _keywords(identification) or None
+            md.cross_references = lambda: _cross_references(identification)
+        else:
+            md.keywords = _keywords(identification) or None
+            md.cross_references = _cross_references(identification)
+
+    md.feature = _feature(record, identification)
+    if doi is not None or short_doi is not None:
+        md.citation = datasetmd.Citation(doi=doi, short_doi=short_doi)
+    return md
@@ -0,0 +1,255 @@
+"""
+This module provides a registry for interning the vocabulary objects which
+are repeated across many :py:class:`datasetmd.DatasetMD` records, such as
+:py:class:`datasetmd.DefinedTermSet`, :py:class:`datasetmd.DefinedTerm`,
+:py:class:`datasetmd.ObservedProperty` and :py:class:`datasetmd.Organisation`
+objects. Interning returns a single canonical instance for each distinct
+term, so memory use grows with the size of the vocabularies in use rather
+than with the number of records, and terms can be compared by identity.
+
+Interning never changes the content of a record: an object is only replaced
+by a canonical instance whose attributes all have the same values. Objects
+which share an identifier but differ in any attribute, such as two
+organisations with the same website but different email addresses, are each
+kept as they are.
+
+.. data:: default_registry
+
+      A process-wide :py:class:`datasetmd.registry.Registry` used by
+      :py:func:`datasetmd.registry.intern` and
+      :py:func:`datasetmd.registry.intern_record`
+"""
+
+import datasetmd, datasetmd.transport
+
+_FIELDS = dict(datasetmd.transport.FIELDS)
+
+
+class Registry:
+    """This class holds the canonical instances of interned objects. Terms and
+    term sets are identified by their `url`, or by their `term_code` if they
+    have no `url`. Organisations are identified by the `url` of their
+    `website`, and organisations without one are not interned. The first
+    instance registered with an identifier and a given set of attribute
+    values becomes the canonical instance for them.
+    """
+    def __init__(self):
+        self._instances = {}
+
+    def __len__(self):
+        return sum(len(instances) for instances in self._instances.values())
+
+    def clear(self):
+        """Removes all of the canonical instances from the registry
+        """
+        self._instances.clear()
+
+    def intern(self, obj):
+        """Returns the canonical instance for an object
+
+        :param obj: The object to be interned
+        :type obj: DefinedTermSet, DefinedTerm, ObservedProperty or
+                Organisation
+
+        :return: The canonical instance with the same identifier and
+                attribute values as `obj`, which is `obj` itself if it is the
+                first one registered, or if it has no identifier or is not of
+                an interned class
+        """
+        key = _key(obj)
+        if key is None:
+            return obj
+        instances = self._instances.get(key)
+        if instances is None:
+            self._instances[key] = [obj]
+            return obj
+        for instance in instances:
+            if _equal(instance, obj):
+                return instance
+        instances.append(obj)
+        return obj
+
+    def intern_record(self, md):
+        """Replaces the vocabulary terms and organisations referred to by a
+        :py:class:`datasetmd.DatasetMD` with their canonical instances. The
+        record is updated in place. Lists given by loaders which have not been
+        called yet are interned when they are loaded.
+
+        :param md: The record to be interned
+        :type md: DatasetMD
+
+        :return: The record given as `md`
+        :rtype: DatasetMD
+        """
+        md.keywords = _lazily(md, 'keywords', self._intern_terms)
+        md.observed_properties = _lazily(md, 'observed_properties',
+                                            self._intern_terms)
+        md.owning_organisations = self._intern_list(md.owning_organisations)
+        if md.publisher is not None:
+            md.publisher = self.intern(md.publisher)
+        if md.citation is not None:
+            if md.citation.doi_publisher is not None:
+                md.citation.doi_publisher = self.intern(
+                                                md.citation.doi_publisher)
+            md.citation.authors = _lazily(md.citation, 'authors',
+                                            self._intern_authors)
+        if md.license is not None:
+            if md.license.in_defined_term_set is not None:
+                md.license.in_defined_term_set = self.intern(
+                                            md.license.in_defined_term_set)
+        md.cross_references = _lazily(md, 'cross_references',
+                                        self._intern_cross_references)
+        return md
+
+    def _intern_authors(self, authors):
+        """Interns the authors of a citation and their affiliations
+
+        :param authors: The authors
+        :type authors: list of Person or Organisation objects, or None
+
+        :rtype: list, or None
+        """
+        authors = self._intern_list(authors)
+        if authors is not None:
+            for author in authors:
+                if isinstance(author, datasetmd.Person):
+                    author.affiliation = self._intern_list(author.affiliation)
+        return authors
+
+    def _intern_cross_references(self, cross_references):
+        """Interns the types of cross references
+
+        :param cross_references: The cross references
+        :type cross_references: list of CrossReference objects, or None
+
+        :rtype: list of CrossReference objects, or None
+        """
+        if cross_references is not None:
+            for cross_reference in cross_references:
+                if cross_reference.cross_reference_type is not None:
+                    cross_reference.cross_reference_type = self._intern_term(
+                                        cross_reference.cross_reference_type)
+        return cross_references
+
+    def _intern_list(self, objs):
+        """Interns each object in a list
+
+        :param objs: The objects to be interned
+        :type objs: list, or None
+
+        :rtype: list, or None
+        """
+        if objs is None:
+            return None
+        return [self.intern(obj) for obj in objs]
+
+    def _intern_term(self, term):
+        """Interns a term, after interning the term set it is taken from
+
+        :param term: The term to be interned
+        :type term: DefinedTerm
+
+        :rtype: DefinedTerm
+        """
+        if term.in_defined_term_set is not None:
+            term.in_defined_term_set = self.intern(term.in_defined_term_set)
+        return self.intern(term)
+
+    def _intern_terms(self, terms):
+        """Interns each term in a list
+
+        :param terms: The terms to be interned
+        :type terms: list of DefinedTerm objects, or None
+
+        :rtype: list of DefinedTerm objects, or None
+        """
+        if terms is None:
+            return None
+        return [self._intern_term(term) for term in terms]
+
+
+def _lazily(obj, name, function):
+    """Applies a function to an attribute of an object. If the attribute is
+    given by a loader which has not been called yet, the function is instead
+    applied when it is loaded, so the attribute is not loaded early
+
+    :param obj: The object
+    :type obj: DatasetMD or Citation
+    :param name: The name of the attribute
+    :type name: str
+    :param function: The function to be applied
+    :type function: function
+
+    :return: The new value of the attribute, or a loader for it
+    """
+    if obj.isLoaded(name):
+        return function(getattr(obj, name))
+    loader = getattr(obj, '_' + name)
+    return lambda: function(loader.load())
+
+
+def _key(obj):
+    """Returns the identifier used to intern an object
+
+    :param obj: The object to be interned
+
+    :return: A key for the object, or None if it is not interned
+    :rtype: tuple, or None
+    """
+    if isinstance(obj, (datasetmd.DefinedTerm, datasetmd.DefinedTermSet)):
+        if obj.url is not None:
+            return (type(obj), 'url', obj.url)
+        if obj.term_code is not None:
+            return (type(obj), 'term_code', obj.term_code)
+    elif isinstance(obj, datasetmd.Organisation):
+        if obj.website is not None and obj.website.url is not None:
+            return (type(obj), 'url', obj.website.url)
+    return None
+
+
+def _equal(a, b):
+    """Compares two values, comparing metadata objects by the values of
+    their attributes
+
+    :rtype: bool
+    """
+    if a is b:
+        return True
+    if type(a) is not type(b):
+        return False
+    fields = _FIELDS.get(type(a))
+    if fields is not None:
+        return all(_equal(getattr(a, field, None), getattr(b, field, None))
+                    for field in fields)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+default_registry = Registry()
+
+
+def intern(obj):
+    """Returns the canonical instance for an object from the
+    :py:data:`datasetmd.registry.default_registry`
+
+    :param obj: The object to be interned
+    :type obj: DefinedTermSet, DefinedTerm, ObservedProperty or Organisation
+
+    :return: The canonical instance
+    """
+    return default_registry.intern(obj)
+
+
+def intern_record(md):
+    """Replaces the vocabulary terms and organisations referred to by a
+    :py:class:`datasetmd.DatasetMD` with their canonical instances from the
+    :py:data:`datasetmd.registry.default_registry`
+
+    :param md: The record to be interned
+    :type md: DatasetMD
+
+    :return: The record given as `md`
+    :rtype: DatasetMD
+    """
+    return default_registry.intern_record(md)
@@ -0,0 +1,321 @@
+"""
+This module provides an optional render cache on disk, which keeps the ISO
+19139 and Schema.org JSON-LD output of :py:class:`datasetmd.DatasetMD`
+objects between processes. Rendered records are stored compressed in an
+SQLite database, keyed by the content fingerprint of the record, see
+:py:mod:`datasetmd.fingerprint`, and by a version of the templates and code
+which produced the output. A changed record or a new release of a template
+therefore never gets stale output from the cache.
+
+The cache is bounded in size: once the compressed output held exceeds the
+maximum, the least recently used records are evicted. Several processes can
+share one cache file.
+
+The cache is disabled until :py:func:`datasetmd.rendercache.set_render_cache`
+is called, after which it is used by :py:meth:`datasetmd.DatasetMD.toISO19139`,
+:py:meth:`datasetmd.DatasetMD.toSchemaDotOrg`,
+:py:func:`datasetmd.render_many` and the worker processes of
+:py:func:`datasetmd.parallel.export`.
+
+.. data:: CACHED_FORMATS
+
+      The output formats which are held in the render cache
+
+.. data:: DEFAULT_MAX_BYTES
+
+      The default maximum size of the compressed output held in a cache
+"""
+
+import functools, hashlib, inspect, marshal, os, sqlite3, threading, time
+import zlib
+import datasetmd, datasetmd.keywordgroups, datasetmd.templates
+
+CACHED_FORMATS = (datasetmd.ISO19139, datasetmd.SCHEMA_DOT_ORG)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_EVICTION_INTERVAL = 64
+_render_cache = None
+_lock = threading.Lock()
+# Connections inherited from a parent process are kept referenced here, so
+# that they are never closed by the child
+_inherited_connections = []
+
+
+def _source(code):
+    """Returns the source of a module or function, or its compiled code if
+    DatasetMD was installed without sources
+
+    :rtype: bytes
+    """
+    try:
+        return inspect.getsource(code).encode('utf-8')
+    except (OSError, TypeError):
+        pass
+    if inspect.ismodule(code):
+        code = code.__loader__.get_code(code.__name__)
+    else:
+        code = code.__code__
+    return marshal.dumps(code)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_version(format):
+    """Hashes the templates and code from which output in a format is
+    rendered
+
+    :rtype: str
+    """
+    if format == datasetmd.ISO19139:
+        sources = [datasetmd.environment._load_template('iso19139').encode(
+                                                                    'utf-8'),
+                    _source(datasetmd.DatasetMD._iso19139_context),
+                    _source(datasetmd.templates.citationstring),
+                    _source(datasetmd.keywordgroups)]
+    elif format == datasetmd.SCHEMA_DOT_ORG:
+        sources = [_source(datasetmd.DatasetMD.toSchemaDotOrgDict),
+                    _source(datasetmd.jsonld),
+                    _source(datasetmd.templates.citationstring),
+                    _source(datasetmd.templates.schemadotorg_creatorlist)]
+    elif format == datasetmd.CITE_STRING:
+        sources = [_source(datasetmd.templates.citationstring)]
+    else:
+        raise ValueError('Unsupported output format: {}'.format(format))
+    digest = hashlib.sha256()
+    for source in sources:
+        digest.update(source)
+    return digest.hexdigest()[:16]
+
+
+def template_version(format):
+    """Returns the version of the templates and code from which output in a
+    format is rendered, which changes whenever any of them change
+
+    :param format: The output format, one of
+            :py:data:`datasetmd.ISO19139`,
+            :py:data:`datasetmd.SCHEMA_DOT_ORG` or
+            :py:data:`datasetmd.CITE_STRING`
+    :type format: str
+
+    :raises ValueError: If `format` is not supported
+
+    :rtype: str
+    """
+    version = _source_version(format)
+    if format == datasetmd.SCHEMA_DOT_ORG:
+        encoder = datasetmd.jsonld.get_json_encoder()
+        version += '-{}.{}'.format(encoder.__module__, encoder.__qualname__)
+    return version
+
+
+class RenderCache:
+    """This class stores rendered records in an SQLite database, evicting the
+    least recently used records when the database grows beyond `max_bytes`
+
+    :param path: The path of the database, which is created if it does not
+            exist
+    :type path: str
+    :param max_bytes: The maximum size of the compressed output held
+    :type max_bytes: int, defaults to
+            :py:data:`datasetmd.rendercache.DEFAULT_MAX_BYTES`
+    """
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._writes = 0
+        self._size = None
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        """Returns the connection to the database for this process. A
+        connection inherited from a parent process is never used or closed,
+        as SQLite connections must not be shared across a fork
+
+        :rtype: sqlite3.Connection
+        """
+        if self._connection is not None and self._pid == os.getpid():
+            return self._connection
+        if self._connection is not None:
+            _inherited_connections.append(self._connection)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30,
+                                        isolation_level=None,
+                                        check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS renders ('
+                            'key TEXT PRIMARY KEY, data BLOB NOT NULL, '
+                            'size INTEGER NOT NULL, accessed REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS renders_accessed '
+                            'ON renders (accessed)')
+        self._connection = connection
+        self._pid = os.getpid()
+        return connection
+
+    def key(self, md, format):
+        """Returns the key under which a record is cached
+
+        :param md: The record
+        :type md: DatasetMD
+        :param format: The output format
+        :type format: str
+
+        :rtype: str
+        """
+        return '{}/{}/{}'.format(format, template_version(format),
+                                    md.fingerprint())
+
+    def get(self, key):
+        """Returns cached output, marking it as recently used
+
+        :param key: The key returned by
+                :py:meth:`datasetmd.rendercache.RenderCache.key`
+        :type key: str
+
+        :return: The cached output, or None if it is not in the cache
+        :rtype: str, or None
+        """
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute('SELECT data FROM renders WHERE key = ?',
+                                        (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            connection.execute('UPDATE renders SET accessed = ? WHERE key = ?',
+                                (time.time(), key))
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def put(self, key, text):
+        """Adds output to the cache, evicting the least recently used output
+        if the cache has grown too large
+
+        :param key: The key returned by
+                :py:meth:`datasetmd.rendercache.RenderCache.key`
+        :type key: str
+        :param text: The rendered output
+        :type text: str
+        """
+        data = zlib.compress(text.encode('utf-8'), 1)
+        with self._lock:
+            self._connect().execute('INSERT OR REPLACE INTO renders '
+                            '(key, data, size, accessed) VALUES (?, ?, ?, ?)',
+                            (key, data, len(data), time.time()))
+            # The size is estimated from this process's writes, and read
+            # again from time to time to include those of other processes
+            self._writes += 1
+            if self._size is None or self._writes % _EVICTION_INTERVAL == 0:
+                self._size = self.size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def render(self, md, format, render):
+        """Returns the output of a record from the cache, rendering it and
+        adding it to the cache if it is not there
+
+        :param md: The record
+        :type md: DatasetMD
+        :param format: The output format
+        :type format: str
+        :param render: A function rendering the record when it is not cached
+        :type render: function
+
+        :rtype: str
+        """
+        key = self.key(md, format)
+        text = self.get(key)
+        if text is None:
+            text = render(md)
+            self.put(key, text)
+        return text
+
+    def size(self):
+        """Returns the size of the compressed output held in the cache
+
+        :rtype: int
+        """
+        with self._lock:
+            return self._connect().execute(
+                    'SELECT COALESCE(SUM(size), 0) FROM renders').fetchone()[0]
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute(
+                    'SELECT COUNT(*) FROM renders').fetchone()[0]
+
+    def evict(self):
+        """Evicts the least recently used output until the cache holds no
+        more than nine tenths of `max_bytes`
+
+        :return: The number of records evicted
+        :rtype: int
+        """
+        with self._lock:
+            connection = self._connect()
+            self._size = self.size()
+            excess = self._size - self.max_bytes
+            if excess <= 0:
+                return 0
+            excess += self.max_bytes // 10
+            keys = []
+            for key, size in connection.execute(
+                        'SELECT key, size FROM renders ORDER BY accessed'):
+                keys.append((key,))
+                self._size -= size
+                excess -= size
+                if excess <= 0:
+                    break
+            connection.executemany('DELETE FROM renders WHERE key = ?', keys)
+        return len(keys)
+
+    def clear(self):
+        """Removes all of the output from the cache"""
+        with self._lock:
+            self._connect().execute('DELETE FROM renders')
+            self._size = 0
+
+    def close(self):
+        """Closes the connection to the database"""
+        with self._lock:
+            if self._connection is not None:
+                if self._pid == os.getpid():
+                    self._connection.close()
+                else:
+                    _inherited_connections.append(self._connection)
+            self._connection = None
+
+
+def get_render_cache():
+    """Returns the render cache used by the serialisers
+
+    :return: The render cache, or None if it is disabled
+    :rtype: :py:class:`datasetmd.rendercache.RenderCache`, or None
+    """
+    return _render_cache
+
+
+def set_render_cache(path=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Sets the file in which rendered output is cached between processes
+
+    :param path: The path of the cache database, or None to disable the
+            render cache
+    :type path: str, defaults to None
+    :param max_bytes: The maximum size of the compressed output held
+    :type max_bytes: int, defaults to
+            :py:data:`datasetmd.rendercache.DEFAULT_MAX_BYTES`
+    """
+    global _render_cache
+    with _lock:
+        if _render_cache is not None:
+            _render_cache.close()
+        _render_cache = None
+        if path is not None:
+            _render_cache = RenderCache(path, max_bytes)
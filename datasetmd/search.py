@@ -0,0 +1,382 @@
+"""
+This module provides an embeddable full-text search index over
+:py:class:`datasetmd.DatasetMD` objects, so that a catalogue can be searched
+by keyword without an external search server.
+
+The index is an inverted index from words to the records which contain
+them, built from the title and abstract of each record, the titles of its
+keywords and observed properties, and the names of its authors. Words in
+some of these count for more than others, as given by
+:py:data:`datasetmd.search.FIELD_WEIGHTS`. Results are ranked with the
+Okapi BM25 function.
+
+Records can be added to and removed from the index at any time, and the
+index can be saved to a file and loaded again without the records.
+
+.. data:: FIELD_WEIGHTS
+
+      The number of times a word is counted for each field in which it
+      appears
+
+.. data:: INDEX_VERSION
+
+      The version of the index file format
+"""
+
+import array, gzip, heapq, json, math, os, re, datasetmd
+
+FIELD_WEIGHTS = {'title': 3, 'abstract': 1, 'keywords': 2, 'authors': 2}
+INDEX_VERSION = 1
+
+_WORD = re.compile(r'\w+')
+
+
+def tokenise(text):
+    """Splits text into lower case words
+
+    :param text: The text
+    :type text: str
+
+    :rtype: list of str
+    """
+    if not text:
+        return []
+    return _WORD.findall(text.casefold())
+
+
+def _author_name(author):
+    """Returns the name of a person or organisation
+
+    :rtype: str, or None
+    """
+    if isinstance(author, datasetmd.Person):
+        return ' '.join(name for name in (author.given_name,
+                                            author.family_name) if name)
+    return getattr(author, 'name', None)
+
+
+def _fields(md):
+    """Returns the text of each searchable field of a record
+
+    :return: The field names and their text
+    :rtype: generator of (str, str) tuples
+    """
+    if md.base is not None:
+        yield 'title', md.base.title
+        yield 'abstract', md.base.abstract
+    for terms in (md.keywords, md.observed_properties):
+        if terms is not None:
+            for term in terms:
+                yield 'keywords', term.title
+    if md.citation is not None and md.citation.authors is not None:
+        for author in md.citation.authors:
+            yield 'authors', _author_name(author)
+
+
+class _ImpactOrder:
+    """The records containing a word, in order of how much the word adds to
+    their scores, best first. The contributions are held without the weight
+    of the word, and worked out for the average record length at the time.
+
+    Records added later are listed in `added` rather than placed in the
+    order, and records removed later are left in it, so that the order can
+    be kept until a fair part of it has changed.
+    """
+    __slots__ = ('identifiers', 'impacts', 'k1', 'b', 'average_length',
+                    'added', 'removed')
+
+    def __init__(self, posting, documents, k1, b, average_length):
+        constant = k1 * (1.0 - b)
+        per_length = k1 * b / average_length
+        identifiers = list(posting)
+        impacts = [tf / (tf + constant + per_length * documents[identifier][0])
+                    for identifier, tf in posting.items()]
+        ranks = sorted(range(len(impacts)), key=impacts.__getitem__,
+                        reverse=True)
+        self.identifiers = [identifiers[i] for i in ranks]
+        self.impacts = array.array('d', [impacts[i] for i in ranks])
+        self.k1 = k1
+        self.b = b
+        self.average_length = average_length
+        self.added = {}
+        self.removed = 0
+
+    def _current(self):
+        """Tells whether few enough records have changed to keep the order
+
+        :rtype: bool
+        """
+        return (len(self.added) + self.removed) * 4 <= \
+                    len(self.identifiers) + 64
+
+    def add(self, identifier):
+        """Notes a record added to the records containing the word
+
+        :return: False if the order should be worked out again
+        :rtype: bool
+        """
+        self.added[identifier] = None
+        return self._current()
+
+    def remove(self, identifier):
+        """Notes a record removed from the records containing the word
+
+        :return: False if the order should be worked out again
+        :rtype: bool
+        """
+        if identifier in self.added:
+            del self.added[identifier]
+        else:
+            self.removed += 1
+        return self._current()
+
+
+class SearchIndex:
+    """This class holds an inverted index of records and ranks them against
+    queries with the Okapi BM25 function
+
+    :param k1: The BM25 parameter controlling how quickly repeated words
+            stop adding to the score of a record
+    :type k1: float, defaults to 1.2
+    :param b: The BM25 parameter controlling how much the score of a record
+            is reduced for its length
+    :type b: float, defaults to 0.75
+    """
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}
+        self._documents = {}
+        self._total_length = 0
+        self._impacts = {}
+
+    def __len__(self):
+        return len(self._documents)
+
+    def __contains__(self, identifier):
+        return identifier in self._documents
+
+    def add(self, md):
+        """Adds a record to the index, replacing any record with the same
+        identifier
+
+        :param md: The record
+        :type md: DatasetMD
+
+        :raises ValueError: If the record has no identifier
+        """
+        identifier = None if md.base is None else md.base.identifier
+        if identifier is None:
+            raise ValueError('Records must have an identifier to be added to '
+                                'a search index')
+        counts = {}
+        for field, text in _fields(md):
+            weight = FIELD_WEIGHTS[field]
+            for word in tokenise(text):
+                counts[word] = counts.get(word, 0) + weight
+        self.remove(identifier)
+        postings = self._postings
+        impacts = self._impacts
+        for word, count in counts.items():
+            order = impacts.get(word)
+            if order is not None and not order.add(identifier):
+                del impacts[word]
+            posting = postings.get(word)
+            if posting is None:
+                posting = postings[word] = {}
+            posting[identifier] = count
+        length = sum(counts.values())
+        self._documents[identifier] = (length, tuple(counts))
+        self._total_length += length
+
+    def update(self, records):
+        """Adds many records to the index
+
+        :param records: The records
+        :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+
+        :raises ValueError: If a record has no identifier
+        """
+        for md in records:
+            self.add(md)
+
+    def remove(self, identifier):
+        """Removes a record from the index
+
+        :param identifier: The identifier of the record
+        :type identifier: str
+
+        :return: True if the record was in the index
+        :rtype: bool
+        """
+        document = self._documents.pop(identifier, None)
+        if document is None:
+            return False
+        length, words = document
+        for word in words:
+            order = self._impacts.get(word)
+            if order is not None and not order.remove(identifier):
+                del self._impacts[word]
+            posting = self._postings[word]
+            del posting[identifier]
+            if not posting:
+                del self._postings[word]
+        self._total_length -= length
+        return True
+
+    def _impact_order(self, word, average_length):
+        """Returns the order of the records containing a word by how much the
+        word adds to their scores, working it out again if records have
+        changed too much or the average length has drifted since it was
+        last worked out
+
+        :rtype: :py:class:`datasetmd.search._ImpactOrder`
+        """
+        order = self._impacts.get(word)
+        if order is not None and order.k1 == self.k1 and \
+                order.b == self.b and \
+                0.9 <= average_length / order.average_length <= 1.1:
+            return order
+        order = self._impacts[word] = _ImpactOrder(self._postings[word],
+                            self._documents, self.k1, self.b, average_length)
+        return order
+
+    def search(self, query, limit=10):
+        """Finds the records which best match a query. A record matches if it
+        contains any of the words of the query, and records containing more
+        of them, or rarer ones, rank higher.
+
+        The records containing each word are read in order of how much the
+        word adds to their scores, and reading stops once no record yet to
+        be read can score higher than the best `limit` found, so common
+        words cost little more than rare ones. The order for a word is
+        worked out on the first search for it, and again once a quarter of
+        the records containing it have been added or removed since.
+
+        :param query: The words to search for
+        :type query: str
+        :param limit: The maximum number of results
+        :type limit: int, defaults to 10
+
+        :return: The identifiers of the records and their scores, best first
+        :rtype: list of (str, float) tuples
+        """
+        if not self._documents or limit < 1:
+            return []
+        count = len(self._documents)
+        average_length = self._total_length / count or 1.0
+        k1 = self.k1
+        # The length normalisation of a record is k1 * (1 - b + b * length /
+        # average_length), split into a constant and a per-record part
+        constant = k1 * (1.0 - self.b)
+        per_length = k1 * self.b / average_length
+        documents = self._documents
+        terms = []
+        for word in set(tokenise(query)):
+            posting = self._postings.get(word)
+            if posting is not None:
+                frequency = len(posting)
+                weight = math.log(1.0 + (count - frequency + 0.5) /
+                                    (frequency + 0.5)) * (k1 + 1.0)
+                order = self._impact_order(word, average_length)
+                # Each contribution grows by at most the ratio of the
+                # average lengths as the average length grows
+                factor = max(average_length / order.average_length, 1.0)
+                terms.append((weight, posting, order, weight * factor))
+        weights = [(weight, posting) for weight, posting, order, bound
+                        in terms]
+        best = []
+        seen = set()
+
+        def score(identifier):
+            seen.add(identifier)
+            norm = constant + per_length * documents[identifier][0]
+            total = 0.0
+            for weight, posting in weights:
+                tf = posting.get(identifier)
+                if tf is not None:
+                    total += weight * tf / (tf + norm)
+            if len(best) < limit:
+                heapq.heappush(best, (total, identifier))
+            elif total > best[0][0]:
+                heapq.heapreplace(best, (total, identifier))
+
+        # Records added since an order was worked out are not in it, so are
+        # scored first
+        for weight, posting, order, bound in terms:
+            for identifier in order.added:
+                if identifier not in seen and identifier in posting:
+                    score(identifier)
+        # The threshold algorithm: the orders are read a row at a time, and
+        # each record met is scored in full. A record not yet met scores at
+        # most the sum of the contributions in the row just read, so once
+        # the worst of the best `limit` scores reaches that sum, no other
+        # record can take its place.
+        rows = max((len(order.identifiers) for weight, posting, order, bound
+                    in terms), default=0)
+        for row in range(rows):
+            threshold = 0.0
+            for weight, posting, order, bound in terms:
+                identifiers = order.identifiers
+                if row < len(identifiers):
+                    threshold += bound * order.impacts[row]
+                    identifier = identifiers[row]
+                    # Records removed since the order was worked out are
+                    # passed over
+                    if identifier not in seen and identifier in posting:
+                        score(identifier)
+            if len(best) >= limit and best[0][0] >= threshold:
+                break
+        best.sort(key=lambda item: item[0], reverse=True)
+        return [(identifier, total) for total, identifier in best]
+
+    def save(self, path):
+        """Writes the index to a gzip-compressed JSON file. The file is
+        replaced in a single step, so an interrupted save leaves the previous
+        file in place
+
+        :param path: The path of the file
+        :type path: str
+        """
+        temporary = path + '.tmp'
+        content = json.dumps({'version': INDEX_VERSION,
+                        'k1': self.k1,
+                        'b': self.b,
+                        'lengths': {identifier: document[0] for identifier,
+                                        document in self._documents.items()},
+                        'postings': self._postings},
+                        ensure_ascii=False, separators=(',', ':'))
+        with gzip.open(temporary, 'wb', compresslevel=1) as stream:
+            stream.write(content.encode('utf-8'))
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path):
+        """Reads an index written by
+        :py:meth:`datasetmd.search.SearchIndex.save`
+
+        :param path: The path of the file
+        :type path: str
+
+        :raises ValueError: If the file was written with another version of
+                the index format
+
+        :rtype: :py:class:`datasetmd.search.SearchIndex`
+        """
+        with gzip.open(path, 'rb') as stream:
+            content = json.loads(stream.read().decode('utf-8'))
+        if content.get('version') != INDEX_VERSION:
+            raise ValueError('{} is not a search index of version {}'.format(
+                                                        path, INDEX_VERSION))
+        index = cls(content['k1'], content['b'])
+        postings = index._postings = content['postings']
+        words = {}
+        for word, posting in postings.items():
+            for identifier in posting:
+                words.setdefault(identifier, []).append(word)
+        lengths = content['lengths']
+        index._documents = {identifier: (length,
+                                        tuple(words.get(identifier, ())))
+                                for identifier, length in lengths.items()}
+        index._total_length = sum(lengths.values())
+        return index
@@ -0,0 +1,310 @@
+"""
+This module provides a spatial index over the geographic extents of
+:py:class:`datasetmd.DatasetMD` objects, given by the bounding box of their
+:py:class:`datasetmd.Feature`, for finding the records which cover an area
+or lie nearest to a point.
+
+The index is an R-tree packed with the Sort-Tile-Recursive algorithm: the
+boxes are sorted into tiles of neighbouring boxes once, when the index is
+built, rather than inserted one at a time, so that a million records are
+indexed in seconds. The index does not change once built, and is rebuilt to
+include new records.
+
+Longitudes are in degrees from -180 to 180. A box whose westernmost
+longitude is east of its easternmost longitude crosses the antimeridian, and
+is indexed as two boxes either side of it. Query boxes may cross the
+antimeridian in the same way.
+
+.. data:: NODE_CAPACITY
+
+      The default number of boxes held in each node of the index
+"""
+
+import heapq, math, datasetmd
+
+NODE_CAPACITY = 16
+
+
+def _wrap(longitude):
+    """Brings a longitude into the range -180 to 180
+
+    :rtype: float
+    """
+    if -180.0 <= longitude <= 180.0:
+        return longitude
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def _parts(west, south, east, north):
+    """Splits a box which crosses the antimeridian into the boxes either side
+    of it
+
+    :return: The boxes, as (west, south, east, north) tuples
+    :rtype: list of tuple
+    """
+    west = float(west)
+    south = float(south)
+    east = float(east)
+    north = float(north)
+    if south > north:
+        south, north = north, south
+    if east - west >= 360.0:
+        return [(-180.0, south, 180.0, north)]
+    west = _wrap(west)
+    east = _wrap(east)
+    if west <= east:
+        return [(west, south, east, north)]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def _extent(md):
+    """Returns the bounding box of a record's feature
+
+    :return: The box, as a (west, south, east, north) tuple, or None if the
+            record has no complete bounding box
+    :rtype: tuple, or None
+    """
+    feature = md.feature
+    if feature is None:
+        return None
+    box = (feature.longitude_westernmost, feature.latiude_southernmost,
+            feature.longitude_easternmost, feature.latitude_northernmost)
+    if None in box:
+        return None
+    return box
+
+
+def _pack(boxes, capacity):
+    """Orders boxes by the Sort-Tile-Recursive algorithm, sorting them into
+    vertical slices by the centres of their longitudes and each slice by the
+    centres of their latitudes
+
+    :return: The positions of the boxes, in packed order
+    :rtype: list of int
+    """
+    count = len(boxes)
+    if not count:
+        return []
+    slices = math.ceil(math.sqrt(math.ceil(count / capacity)))
+    per_slice = slices * capacity
+    order = sorted(range(count), key=lambda i: boxes[i][0] + boxes[i][2])
+    packed = []
+    for start in range(0, count, per_slice):
+        part = order[start:start + per_slice]
+        part.sort(key=lambda i: boxes[i][1] + boxes[i][3])
+        packed.extend(part)
+    return packed
+
+
+def _longitude_distance(longitude, west, east):
+    """Returns the distance in degrees of longitude from a longitude to the
+    nearest point of an interval, going either way around the globe
+
+    :rtype: float
+    """
+    if west <= longitude <= east:
+        return 0.0
+    return min((west - longitude) % 360.0, (longitude - east) % 360.0)
+
+
+class SpatialIndex:
+    """This class indexes records by the bounding boxes of their features.
+    Records without a complete bounding box are not indexed.
+
+    :param records: The records to be indexed
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param node_capacity: The number of boxes held in each node
+    :type node_capacity: int, defaults to
+            :py:data:`datasetmd.spatial.NODE_CAPACITY`
+
+    :raises ValueError: If `node_capacity` is less than 2, or a bounding box
+            holds a value which is not a number
+    """
+    def __init__(self, records, node_capacity=NODE_CAPACITY):
+        if node_capacity < 2:
+            raise ValueError('The node capacity must be at least 2')
+        self.node_capacity = node_capacity
+        self.records = []
+        self._parts = []
+        boxes = []
+        items = []
+        for md in records:
+            box = _extent(md)
+            if box is None:
+                continue
+            parts = _parts(*box)
+            for part in parts:
+                boxes.append(part)
+                items.append(len(self.records))
+            self._parts.append(len(parts))
+            self.records.append(md)
+        # Each level holds boxes, and the ranges of the boxes in the level
+        # below which they enclose. The bottom level holds the boxes of the
+        # records, with the positions of the records in place of ranges.
+        levels = []
+        ranges = items
+        while True:
+            order = _pack(boxes, node_capacity)
+            boxes = [boxes[i] for i in order]
+            ranges = [ranges[i] for i in order]
+            levels.append((boxes, ranges))
+            if len(boxes) <= node_capacity:
+                break
+            parents = []
+            parent_ranges = []
+            for start in range(0, len(boxes), node_capacity):
+                end = min(start + node_capacity, len(boxes))
+                wests, souths, easts, norths = zip(*boxes[start:end])
+                parents.append((min(wests), min(souths), max(easts),
+                                max(norths)))
+                parent_ranges.append((start, end))
+            boxes = parents
+            ranges = parent_ranges
+        self._levels = levels
+
+    def __len__(self):
+        return len(self.records)
+
+    def _search(self, box, test):
+        """Finds the boxes in the bottom level which pass a test, descending
+        only into nodes which intersect `box`
+
+        :return: The positions of the records
+        :rtype: list of int
+        """
+        west, south, east, north = box
+        levels = self._levels
+        found = []
+        top = len(levels) - 1
+        stack = [(top, 0, len(levels[top][0]))]
+        while stack:
+            depth, start, end = stack.pop()
+            boxes, ranges = levels[depth]
+            for i in range(start, end):
+                node = boxes[i]
+                if node[0] <= east and node[2] >= west and \
+                        node[1] <= north and node[3] >= south:
+                    if depth:
+                        stack.append((depth - 1,) + ranges[i])
+                    elif test(node):
+                        found.append(ranges[i])
+        return found
+
+    def intersects(self, west, south, east, north):
+        """Returns the records whose bounding boxes intersect a box, in the
+        order in which they were indexed
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        found = set()
+        for part in _parts(west, south, east, north):
+            found.update(self._search(part, lambda box: True))
+        return [self.records[i] for i in sorted(found)]
+
+    def contains(self, west, south, east, north):
+        """Returns the records whose bounding boxes contain the whole of a
+        box, in the order in which they were indexed. A point is given as a
+        box with the same west and east, and south and north.
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        found = None
+        for part in _parts(west, south, east, north):
+            w, s, e, n = part
+            containing = set(self._search(part, lambda box: box[0] <= w and
+                                box[1] <= s and box[2] >= e and box[3] >= n))
+            found = containing if found is None else found & containing
+        return [self.records[i] for i in sorted(found)]
+
+    def within(self, west, south, east, north):
+        """Returns the records whose bounding boxes lie wholly within a box,
+        in the order in which they were indexed
+
+        :param west: The westernmost longitude of the box
+        :type west: float
+        :param south: The southernmost latitude of the box
+        :type south: float
+        :param east: The easternmost longitude of the box, west of `west` if
+                the box crosses the antimeridian
+        :type east: float
+        :param north: The northernmost latitude of the box
+        :type north: float
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        # A record crossing the antimeridian is within the box only if both
+        # of its parts are
+        matched = {}
+        for part in _parts(west, south, east, north):
+            w, s, e, n = part
+            for i in self._search(part, lambda box: box[0] >= w and
+                            box[1] >= s and box[2] <= e and box[3] <= n):
+                matched[i] = matched.get(i, 0) + 1
+        return [self.records[i] for i in sorted(matched)
+                    if matched[i] >= self._parts[i]]
+
+    def nearest(self, longitude, latitude, count=1):
+        """Returns the records whose bounding boxes are nearest to a point,
+        nearest first. Distances are measured in degrees, with longitudes
+        wrapping around the antimeridian, and are zero for boxes which
+        contain the point.
+
+        :param longitude: The longitude of the point
+        :type longitude: float
+        :param latitude: The latitude of the point
+        :type latitude: float
+        :param count: The number of records returned
+        :type count: int, defaults to 1
+
+        :rtype: list of :py:class:`datasetmd.DatasetMD` objects
+        """
+        longitude = _wrap(float(longitude))
+        latitude = float(latitude)
+        levels = self._levels
+        heap = []
+        sequence = 0
+
+        def push(depth, start, end):
+            nonlocal sequence
+            boxes = levels[depth][0]
+            for i in range(start, end):
+                west, south, east, north = boxes[i]
+                dx = _longitude_distance(longitude, west, east)
+                dy = max(south - latitude, 0.0, latitude - north)
+                heapq.heappush(heap, (math.hypot(dx, dy), sequence, depth, i))
+                sequence += 1
+
+        if self.records:
+            top = len(levels) - 1
+            push(top, 0, len(levels[top][0]))
+        found = []
+        seen = set()
+        while heap and len(found) < count:
+            distance, sequence_number, depth, i = heapq.heappop(heap)
+            item = levels[depth][1][i]
+            if depth:
+                push(depth - 1, *item)
+            elif item not in seen:
+                seen.add(item)
+                found.append(self.records[item])
+        return found
@@ -0,0 +1,60 @@
+"""
+This module provides writers which stream many :py:class:`datasetmd.DatasetMD`
+objects into a single aggregate document, such as a Catalogue Service for the
+Web (CSW) GetRecords response. Records are rendered and written one chunk at a
+time, so the whole document is never held in memory.
+"""
+
+import datetime, datasetmd
+
+
+def iter_iso19139_collection(records, number_of_records=None):
+    """Outputs an iterable of :py:class:`datasetmd.DatasetMD` objects as ISO
+    19139 XML records inside a CSW GetRecords response, one chunk of text at a
+    time
+
+    :param records: The records to be output
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param number_of_records: The number of records, which is given in the
+            `numberOfRecordsMatched` and `numberOfRecordsReturned` attributes
+            of the response, as CSW 2.0.2 requires. If None, the length of
+            `records` is used, so it must be given when `records` is a
+            generator or another iterable without a length
+    :type number_of_records: int, defaults to None
+
+    :raises ValueError: If `number_of_records` is None and `records` has no
+            length
+
+    :return: A generator of strings which together make up the XML document
+    :rtype: generator of str
+    """
+    if number_of_records is None:
+        if not hasattr(records, '__len__'):
+            raise ValueError('number_of_records must be given when the '
+                                'records have no length')
+        number_of_records = len(records)
+    return datasetmd.environment.get_template('csw_getrecordsresponse').generate(
+                    records=(md.iterISO19139() for md in records),
+                    number_of_records=number_of_records,
+                    timestamp=datetime.datetime.now().replace(
+                                                microsecond=0).isoformat())
+
+
+def write_iso19139_collection(records, stream, number_of_records=None):
+    """Writes an iterable of :py:class:`datasetmd.DatasetMD` objects as ISO
+    19139 XML records inside a CSW GetRecords response
+
+    :param records: The records to be written
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param stream: A file-like object opened for writing text, such as a file,
+            a socket file or a stream opened with `gzip.open(path, 'wt')`
+    :type stream: file-like object
+    :param number_of_records: The number of records, see
+            :py:func:`datasetmd.streaming.iter_iso19139_collection`
+    :type number_of_records: int, defaults to None
+
+    :raises ValueError: If `number_of_records` is None and `records` has no
+            length
+    """
+    for chunk in iter_iso19139_collection(records, number_of_records):
+        stream.write(chunk)
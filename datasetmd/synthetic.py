@@ -0,0 +1,335 @@
+"""
+This module generates synthetic catalogues of :py:class:`datasetmd.DatasetMD`
+records, for load testing and benchmarking. Generation is deterministic: the
+same seed always gives the same records, and each record depends only on the
+seed and its position in the catalogue, so any record can be recreated on its
+own.
+
+Records draw their keywords, observed properties, organisations and licenses
+from vocabularies which are shared across the whole catalogue, as in a real
+catalogue.
+
+The module can also be run to write a test corpus::
+
+    python -m datasetmd.synthetic --count 10000 --format iso19139 corpus/
+    python -m datasetmd.synthetic --count 10000 --format jsonld corpus.ndjson.gz
+"""
+
+import argparse, datetime, gzip, os, random, sys, datasetmd
+
+_WORDS = ('ocean', 'temperature', 'salinity', 'survey', 'cruise', 'profile',
+            'coastal', 'seabed', 'current', 'wave', 'chlorophyll', 'oxygen',
+            'sediment', 'fisheries', 'acoustic', 'mooring', 'buoy', 'glider')
+_GIVEN_NAMES = ('Adam', 'Aoife', 'Brian', 'Ciara', 'Eoin', 'Fiona', 'Liam',
+                    'Niamh', 'Sean', 'Siobhan', 'Maria', 'Jan', 'Ingrid')
+_FAMILY_NAMES = ('Byrne', 'Doyle', 'Kelly', 'Murphy', 'Nolan', 'Ryan',
+                    'Walsh', 'Jensen', 'Garcia', 'Dubois', 'Rossi', 'Novak')
+_COUNTRIES = ('Ireland', 'France', 'Norway', 'Spain', 'Germany', 'Italy',
+                'United Kingdom', 'Netherlands')
+
+
+def _count(rnd, value):
+    """Chooses a number of items
+
+    :param rnd: The random number generator for the record
+    :type rnd: random.Random
+    :param value: A fixed number, or a (minimum, maximum) tuple
+    :type value: int or tuple
+
+    :rtype: int
+    """
+    if isinstance(value, tuple):
+        return rnd.randint(value[0], value[1])
+    return value
+
+
+class Generator:
+    """This class generates synthetic :py:class:`datasetmd.DatasetMD` records.
+    The number of each kind of item in a record is given either as a fixed
+    number or as a (minimum, maximum) tuple from which the number is chosen
+    for each record.
+
+    :param seed: The seed from which the catalogue is generated
+    :type seed: int, defaults to 0
+    :param vocabulary_size: The number of terms in each shared vocabulary
+    :type vocabulary_size: int, defaults to 5000
+    :param organisations: The number of distinct organisations
+    :type organisations: int, defaults to 200
+    :param authors: The number of authors of each record
+    :type authors: int or tuple, defaults to (1, 8)
+    :param keywords: The number of keywords of each record
+    :type keywords: int or tuple, defaults to (2, 10)
+    :param observed_properties: The number of observed properties of each
+            record
+    :type observed_properties: int or tuple, defaults to (1, 20)
+    :param cross_references: The number of cross references of each record
+    :type cross_references: int or tuple, defaults to (0, 3)
+    """
+    def __init__(self, seed=0,
+                        vocabulary_size=5000,
+                        organisations=200,
+                        authors=(1, 8),
+                        keywords=(2, 10),
+                        observed_properties=(1, 20),
+                        cross_references=(0, 3)):
+        self.seed = seed
+        self.authors = authors
+        self.keywords = keywords
+        self.observed_properties = observed_properties
+        self.cross_references = cross_references
+        rnd = random.Random(seed)
+        self.gemet = datasetmd.DefinedTermSet(title='GEMET',
+                            url='http://www.eionet.europa.eu/gemet/')
+        self.p01 = datasetmd.DefinedTermSet(
+                            title='BODC Parameter Usage Vocabulary',
+                            term_code='SDN:P01::',
+                            url='http://vocab.nerc.ac.uk/collection/P01/current/')
+        self.association_types = datasetmd.DefinedTermSet(
+                            title='DS_InitiativeTypeCode',
+                            url='http://www.isotc211.org/2005/resources/'
+                                'Codelist/gmxCodelists.xml#DS_InitiativeTypeCode')
+        self.gemet_terms = [datasetmd.DefinedTerm(
+                            in_defined_term_set=self.gemet,
+                            title='{} {}'.format(rnd.choice(_WORDS), i),
+                            url='http://www.eionet.europa.eu/gemet/concept/'
+                                '{}'.format(i))
+                            for i in range(vocabulary_size)]
+        self.p01_terms = [datasetmd.ObservedProperty(
+                            in_defined_term_set=self.p01,
+                            term_code='SDN:P01::SYN{:05d}'.format(i),
+                            title='{} of the water body {}'.format(
+                                    rnd.choice(_WORDS).capitalize(), i),
+                            url='http://vocab.nerc.ac.uk/collection/P01/'
+                                'current/SYN{:05d}/'.format(i))
+                            for i in range(vocabulary_size)]
+        self.initiative_types = [datasetmd.DefinedTerm(
+                            in_defined_term_set=self.association_types,
+                            title=title)
+                            for title in ('campaign', 'collection', 'project',
+                                            'study', 'sensor', 'platform')]
+        self.organisations = [datasetmd.Organisation(
+                            city='City {}'.format(i),
+                            country=rnd.choice(_COUNTRIES),
+                            email_address='info@organisation{}.example.org'.format(i),
+                            name='Organisation {}'.format(i),
+                            website=datasetmd.WebAddress(
+                                url='https://organisation{}.example.org'.format(i)))
+                            for i in range(organisations)]
+        license_codes = datasetmd.DefinedTermSet(
+                            title='SPDX License List',
+                            url='https://spdx.org/licenses/')
+        self.licenses = [datasetmd.License(name=name,
+                            in_defined_term_set=license_codes,
+                            spdx_url=datasetmd.WebAddress(
+                                url='https://spdx.org/licenses/{}'.format(name)))
+                            for name in ('CC-BY-4.0', 'CC0-1.0', 'ODbL-1.0')]
+        self.catalogue = datasetmd.WebAddress(title='Synthetic catalogue',
+                            url='https://data.example.org')
+
+    def _feature(self, rnd):
+        """Creates a bounding box, one in fifty of which crosses the
+        antimeridian
+
+        :rtype: Feature
+        """
+        south = rnd.uniform(-90, 80)
+        north = min(south + rnd.uniform(0.01, 10), 90)
+        west = rnd.uniform(-180, 170)
+        east = west + rnd.uniform(0.01, 20)
+        if rnd.random() < 0.02:
+            west = rnd.uniform(170, 180)
+            east = rnd.uniform(-180, -170)
+        elif east > 180:
+            east = 180.0
+        return datasetmd.Feature(crs_epsg_code=4326,
+                            latitude_northernmost=round(north, 4),
+                            latiude_southernmost=round(south, 4),
+                            longitude_easternmost=round(east, 4),
+                            longitude_westernmost=round(west, 4))
+
+    def record(self, index):
+        """Generates a single record
+
+        :param index: The position of the record in the catalogue
+        :type index: int
+
+        :rtype: DatasetMD
+        """
+        rnd = random.Random(self.seed * 1000003 + index)
+        created = datetime.date(2000, 1, 1) + datetime.timedelta(
+                                                days=rnd.randint(0, 7300))
+        modified = created + datetime.timedelta(days=rnd.randint(0, 1500))
+        owners = rnd.sample(self.organisations, rnd.randint(1, 2))
+        authors = []
+        for i in range(_count(rnd, self.authors)):
+            if rnd.random() < 0.1:
+                authors.append(rnd.choice(self.organisations))
+            else:
+                authors.append(datasetmd.Person(
+                            affiliation=rnd.sample(self.organisations,
+                                                    rnd.randint(1, 2)),
+                            family_name=rnd.choice(_FAMILY_NAMES),
+                            given_name=rnd.choice(_GIVEN_NAMES)))
+        identifier = 'synthetic-{}-{}'.format(self.seed, index)
+        return datasetmd.DatasetMD(
+            base=datasetmd.Base(
+                    abstract=' '.join(rnd.choice(_WORDS)
+                                        for i in range(rnd.randint(30, 200))),
+                    created=created,
+                    identifier=identifier,
+                    modified=modified,
+                    title='{} {} dataset {}'.format(
+                                rnd.choice(_WORDS).capitalize(),
+                                rnd.choice(_WORDS), index)),
+            citation=datasetmd.Citation(authors=authors,
+                    doi='10.12345/{}'.format(identifier),
+                    doi_publication_date=modified,
+                    doi_publisher=owners[0]),
+            cross_references=[datasetmd.CrossReference(
+                    cross_reference_type=rnd.choice(self.initiative_types),
+                    title='synthetic-{}-{}'.format(self.seed,
+                                                    rnd.randint(0, index + 1000)),
+                    url='https://data.example.org/dataset/{}'.format(i))
+                    for i in range(_count(rnd, self.cross_references))],
+            feature=self._feature(rnd),
+            included_in_data_catalogue=self.catalogue,
+            keywords=rnd.sample(self.gemet_terms,
+                    min(_count(rnd, self.keywords), len(self.gemet_terms))),
+            license=rnd.choice(self.licenses),
+            limitations=datasetmd.Limitations(
+                    use_limitations=['Not to be used for navigation']),
+            observed_properties=rnd.sample(self.p01_terms,
+                    min(_count(rnd, self.observed_properties),
+                        len(self.p01_terms))),
+            owning_organisations=owners,
+            publisher=owners[0])
+
+    def records(self, count=None, start=0):
+        """Generates a stream of records
+
+        :param count: The number of records, or None for an endless stream
+        :type count: int, defaults to None
+        :param start: The position of the first record in the catalogue
+        :type start: int, defaults to 0
+
+        :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+        """
+        index = start
+        while count is None or index < start + count:
+            yield self.record(index)
+            index += 1
+
+
+def records(count=None, seed=0, **kwargs):
+    """Generates a stream of synthetic records with a
+    :py:class:`datasetmd.synthetic.Generator`
+
+    :param count: The number of records, or None for an endless stream
+    :type count: int, defaults to None
+    :param seed: The seed from which the catalogue is generated
+    :type seed: int, defaults to 0
+    :param kwargs: Other arguments to
+            :py:class:`datasetmd.synthetic.Generator`
+
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    return Generator(seed=seed, **kwargs).records(count)
+
+
+def _open(path):
+    """Opens a file for writing text, compressing it if the name ends with
+    `.gz`, or returns standard output if the path is `-`
+
+    :rtype: file-like object
+    """
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def _counted(records, counter):
+    """Passes records through, counting them
+
+    :rtype: generator of :py:class:`datasetmd.DatasetMD` objects
+    """
+    for md in records:
+        counter[0] += 1
+        yield md
+
+
+def write_corpus(records, format, output, number_of_records=None):
+    """Writes records as a test corpus
+
+    :param records: The records to be written
+    :type records: iterable of :py:class:`datasetmd.DatasetMD` objects
+    :param format: 'iso19139' to write one XML file per record into the
+            `output` directory, 'csw' to write a single CSW GetRecords
+            response, or 'jsonld' to write newline-delimited Schema.org
+            JSON-LD
+    :type format: str
+    :param output: The output directory for 'iso19139', otherwise the output
+            file, which is compressed if its name ends with `.gz`, or `-` for
+            standard output
+    :type output: str
+    :param number_of_records: The number of records, written in the header of
+            a CSW GetRecords response, which must be given for 'csw' when
+            `records` has no length
+    :type number_of_records: int, defaults to None
+
+    :return: The number of records written
+    :rtype: int
+    """
+    import datasetmd.bulk, datasetmd.streaming
+    if format == 'iso19139':
+        os.makedirs(output, exist_ok=True)
+        count = 0
+        for md in records:
+            md.toISO19139(stream=os.path.join(output,
+                                    '{}.xml'.format(md.base.identifier)))
+            count += 1
+        return count
+    stream = _open(output)
+    try:
+        if format == 'jsonld':
+            return datasetmd.bulk.write_ndjson(records, stream)
+        elif format == 'csw':
+            counter = [0]
+            datasetmd.streaming.write_iso19139_collection(
+                            _counted(records, counter), stream,
+                            number_of_records)
+            return counter[0]
+        raise ValueError('Unsupported corpus format: {}'.format(format))
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+def main(argv=None):
+    """Writes a synthetic test corpus from the command line
+
+    :param argv: The command line arguments
+    :type argv: list of str, defaults to the arguments of the process
+    """
+    parser = argparse.ArgumentParser(prog='python -m datasetmd.synthetic',
+                    description='Write a synthetic catalogue of dataset '
+                                'metadata records.')
+    parser.add_argument('output', help='output directory for iso19139, '
+                    'otherwise output file (.gz to compress, - for stdout)')
+    parser.add_argument('--count', type=int, default=1000,
+                    help='number of records (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                    help='seed for the catalogue (default: %(default)s)')
+    parser.add_argument('--start', type=int, default=0,
+                    help='position of the first record (default: %(default)s)')
+    parser.add_argument('--format', choices=['iso19139', 'csw', 'jsonld'],
+                    default='iso19139',
+                    help='output format (default: %(default)s)')
+    args = parser.parse_args(argv)
+    write_corpus(Generator(seed=args.seed).records(args.count, args.start),
+                    args.format, args.output, args.count)
+
+
+if __name__ == '__main__':
+    main()
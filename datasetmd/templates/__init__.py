@@ -1,9 +1,11 @@
 import datasetmd.templates.citationstring
+import datasetmd.templates.csw_getrecordsresponse
 import datasetmd.templates.iso19139
 import datasetmd.templates.schemadotorg
 import datasetmd.templates.schemadotorg_creatorlist
 
 __all__ = ['citationstring', 
+                'csw_getrecordsresponse',
                 'iso19139', 
                 'schemadotorg',
                 'schemadotorg_creatorlist']
\ No newline at end of file
@@ -3,103 +3,97 @@ import datasetmd
 def template(md=None):
     """This function creates a suggested citation string for a DatasetMD
     object.
-    
+
+    The citation is built up as a list of parts which are joined once at the
+    end, and affiliations are numbered through a dictionary, so the time
+    taken grows linearly with the number of authors.
+
     :param md:
     :type md: DatasetMD, defaults to None
-    
+
     :rtype: str, or None
     """
-    ret_string = ""
-    author_count = 0
-    affiliation_list = []
+    parts = []
+    append = parts.append
+    affiliations = {}
+
+    def add(part):
+        if part:
+            append(part)
+
+    def end_sentence():
+        if parts:
+            append('. ')
+
+    def affiliation_number(name, country):
+        if country is not None:
+            citation_affiliation = '{0}, {1}'.format(name, country)
+        else:
+            citation_affiliation = '{}'.format(name)
+        return affiliations.setdefault(citation_affiliation,
+                                            len(affiliations) + 1)
+
     if md is not None:
         if md.citation is not None:
             if md.citation.authors is not None:
+                author_count = 0
                 for author in md.citation.authors:
                     if author_count > 0:
-                        ret_string += '; '
+                        append('; ')
                     if isinstance(author, datasetmd.Person):
                         if author.family_name is None:
-                            ret_string += '{}'.format(author.given_name)
-                            author_count += 1
+                            add('{}'.format(author.given_name))
                         elif author.given_name is None:
-                            ret_string += '{}'.format(author.family_name)
-                            author_count += 1
+                            add('{}'.format(author.family_name))
                         else:
-                            ret_string += '{0}, {1}'.format(author.family_name, 
-                                                                author.given_name)
-                            author_count += 1
+                            add('{0}, {1}'.format(author.family_name,
+                                                    author.given_name))
+                        author_count += 1
                         if author.affiliation is not None:
                             affiliation_count = 0
                             for affiliation in author.affiliation:
                                 if affiliation.name is not None:
-                                    if affiliation.country is not None:
-                                        citation_affiliation = '{0}, {1}'.format(affiliation.name, 
-                                                                    affiliation.country)
-                                    else:
-                                        citation_affiliation = '{}'.format(affiliation.name)
-                                    if citation_affiliation not in affiliation_list:
-                                        affiliation_list.append(citation_affiliation)
-                                    try:
-                                        if affiliation_count > 0:
-                                            ret_string += ','
-                                        ret_string += ' ({})'.format(affiliation_list.index(citation_affiliation) + 1)
-                                        affiliation_count += 1
-                                    except ValueError:
-                                        pass
+                                    if affiliation_count > 0:
+                                        append(',')
+                                    append(' ({})'.format(affiliation_number(
+                                                        affiliation.name,
+                                                        affiliation.country)))
+                                    affiliation_count += 1
                     elif isinstance(author, datasetmd.Organisation):
                         if author.name is not None:
-                            ret_string += '{}'.format(author.name)
-                            if author.country is not None:
-                                citation_affiliation = '{0}, {1}'.format(author.name, 
-                                                                    author.country)
-                            else:
-                                citation_affiliation = '{}'.format(author.name)
-                            if citation_affiliation not in affiliation_list:
-                                affiliation_list.append(citation_affiliation)
-                            try:
-                                ret_string += ' ({})'.format(affiliation_list.index(citation_affiliation) + 1)
-                            except ValueError:
-                                pass
+                            add('{}'.format(author.name))
+                            append(' ({})'.format(affiliation_number(author.name,
+                                                            author.country)))
                             author_count += 1
-            if ret_string:
-                ret_string = '{}. '.format(ret_string)
+            end_sentence()
             if md.citation.doi_publication_date is not None:
-                ret_string += '({})'.format(md.citation.doi_publication_date.year)
-            if ret_string:
-                ret_string = '{}. '.format(ret_string)
+                add('({})'.format(md.citation.doi_publication_date.year))
+            end_sentence()
             if md.base.title is not None:
-                ret_string += '{}'.format(md.base.title)
-            if ret_string:
-                ret_string = '{}. '.format(ret_string)
+                add('{}'.format(md.base.title))
+            end_sentence()
             if md.citation.doi_publisher is not None:
                 if md.citation.doi_publisher.name is not None:
                     if md.citation.doi_publisher.country is not None:
-                        ret_string += '{}, {}'.format(md.citation.doi_publisher.name, 
-                                                md.citation.doi_publisher.country)
+                        add('{}, {}'.format(md.citation.doi_publisher.name,
+                                            md.citation.doi_publisher.country))
                     else:
-                        ret_string += '{}'.format(md.citation.doi_publisher.name)
-            if ret_string:
-                ret_string = '{}. '.format(ret_string)
+                        add('{}'.format(md.citation.doi_publisher.name))
+            end_sentence()
             if md.citation.prefer_short_doi:
                 if md.citation.short_doi is not None:
-                    ret_string += 'doi: {}'.format(md.citation.short_doi)
+                    add('doi: {}'.format(md.citation.short_doi))
                 elif md.citation.doi is not None:
-                    ret_string += 'doi: {}'.format(md.citation.doi)
+                    add('doi: {}'.format(md.citation.doi))
             else:
                 if md.citation.doi is not None:
-                    ret_string += 'doi: {}'.format(md.citation.doi)
+                    add('doi: {}'.format(md.citation.doi))
                 elif md.citation.short_doi is not None:
-                    ret_string += 'doi: {}'.format(md.citation.short_doi)
-            if ret_string:
-                ret_string = '{}. '.format(ret_string)
-            if affiliation_list:
-                affiliation_count = 1
-                for affiliation in affiliation_list:
-                    ret_string += '({0}) {1}. '.format(affiliation_count, 
-                                                                affiliation)
-                    affiliation_count += 1
-    ret_string = ret_string.strip()
+                    add('doi: {}'.format(md.citation.short_doi))
+            end_sentence()
+            for affiliation, affiliation_count in affiliations.items():
+                append('({0}) {1}. '.format(affiliation_count, affiliation))
+    ret_string = ''.join(parts).strip()
     if not ret_string:
         ret_string = None
-    return ret_string
\ No newline at end of file
+    return ret_string
@@ -0,0 +1,20 @@
+def template():
+    """
+    This function provides a Jinja2 template for wrapping many ISO19139 XML
+    records in a single Catalogue Service for the Web (CSW) GetRecords
+    response document. Each record is given to the template as an iterable
+    of text chunks, so that the document can be streamed.
+    
+    :return:
+    :rtype: str
+    """
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<csw:GetRecordsResponse
+        xmlns:csw="http://www.opengis.net/cat/csw/2.0.2"
+        xmlns:gmd="http://www.isotc211.org/2005/gmd"
+        version="2.0.2">
+    <csw:SearchStatus timestamp="{{ timestamp }}"/>
+    <csw:SearchResults elementSet="full" nextRecord="0" numberOfRecordsMatched="{{ number_of_records }}" numberOfRecordsReturned="{{ number_of_records }}" recordSchema="http://www.isotc211.org/2005/gmd">
+{% for record in records %}{% for chunk in record %}{{ chunk }}{% endfor %}
+{% endfor %}    </csw:SearchResults>
+</csw:GetRecordsResponse>"""
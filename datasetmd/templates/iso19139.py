@@ -163,12 +163,12 @@ def template():
                     {%- if citation_string is not none %}
                     <!-- doi suggested citation text -->
                     <gmd:otherCitationDetails>
-                        <gco:CharacterString>{{ citation_string }}<gco:CharacterString>
+                        <gco:CharacterString>{{ citation_string }}</gco:CharacterString>
                     </gmd:otherCitationDetails>
                     {% endif %}
                     
                     <!-- Dataset owning organisation(s) -->
-                    {%- for org in md.owning_organisations %}
+                    {%- for org in md.owning_organisations or [] %}
                     
                     <gmd:pointOfContact>
                         <gmd:CI_ResponsibleParty>
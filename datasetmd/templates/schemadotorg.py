@@ -4,6 +4,10 @@ def template():
     as JSON-LD from a DatasetMD object. The template follows the guidelines
     from the Earth Science Informatics Partnership's Science on Schema project.
     
+    .. note::
+       :py:meth:`datasetmd.DatasetMD.toSchemaDotOrg` now builds its output 
+       with :py:mod:`datasetmd.jsonld` rather than this template
+    
     :return:
     :rtype: str
     """
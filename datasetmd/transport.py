@@ -0,0 +1,125 @@
+"""
+This module provides a compact transport form for
+:py:class:`datasetmd.DatasetMD` objects and the objects nested within them,
+for use when records are sent between processes.
+
+Each metadata object is packed into a tuple holding a class code followed by
+its attribute values in a fixed order, so attribute names are not repeated
+for every object when the record is pickled. Objects which are shared within a
+record, such as a :py:class:`datasetmd.DefinedTermSet` used by many
+:py:class:`datasetmd.ObservedProperty` objects, are packed once and the same
+tuple is reused, so the pickler only writes them once.
+
+.. data:: FIELDS
+
+      The attributes which are carried in the transport form for each of the
+      metadata classes, in the order in which they are packed
+"""
+
+import datasetmd
+
+FIELDS = (
+    (datasetmd.DatasetMD, ('base', 'citation', 'cross_references', 'feature',
+                            'included_in_data_catalogue', 'keywords',
+                            'license', 'limitations', 'observed_properties',
+                            'owning_organisations', 'publisher')),
+    (datasetmd.Base, ('abstract', 'created', 'identifier', 'modified',
+                            'title')),
+    (datasetmd.Feature, ('crs_epsg_code', 'id', 'latitude_northernmost',
+                            'latiude_southernmost', 'longitude_easternmost',
+                            'longitude_westernmost')),
+    (datasetmd.Organisation, ('administrative_area', 'city', 'country',
+                            'delivery_point', 'email_address', 'name',
+                            'postal_code', 'website')),
+    (datasetmd.WebAddress, ('title', 'url')),
+    (datasetmd.Citation, ('authors', 'doi', 'doi_publication_date',
+                            'doi_publisher', 'prefer_short_doi', 'short_doi')),
+    (datasetmd.Person, ('affiliation', 'family_name', 'given_name',
+                            'name_order', 'role')),
+    (datasetmd.DefinedTerm, ('in_defined_term_set', 'publication_date',
+                            'term_code', 'title', 'url')),
+    (datasetmd.DefinedTermSet, ('publication_date', 'term_code', 'title',
+                            'url')),
+    (datasetmd.ObservedProperty, ('in_defined_term_set', 'publication_date',
+                            'term_code', 'title', 'url')),
+    (datasetmd.License, ('description', 'in_defined_term_set', 'name',
+                            'spdx_url', 'url')),
+    (datasetmd.Limitations, ('use_limitations',)),
+    (datasetmd.CrossReference, ('cross_reference_type', 'title', 'url')),
+)
+
+_CODES = {cls: code for code, (cls, fields) in enumerate(FIELDS)}
+
+
+def pack(obj):
+    """Packs a metadata object, or a list of them, into the compact
+    transport form
+
+    :param obj: The object to be packed
+    :type obj: DatasetMD, or any of the other metadata classes
+
+    :return: The packed object, which only contains built-in types
+    :rtype: tuple
+    """
+    return _pack(obj, {})
+
+
+def _pack(value, memo):
+    """Packs a single value, reusing already packed objects from `memo`
+
+    :param value: The value to be packed
+    :param memo: Packed objects, keyed on the `id` of the original object
+    :type memo: dict
+
+    :return: The packed value
+    """
+    code = _CODES.get(type(value))
+    if code is not None:
+        key = id(value)
+        if key not in memo:
+            memo[key] = (code,) + tuple(_pack(getattr(value, field, None), memo)
+                                        for field in FIELDS[code][1])
+        return memo[key]
+    if isinstance(value, list):
+        return [_pack(item, memo) for item in value]
+    if isinstance(value, tuple):
+        return (None, [_pack(item, memo) for item in value])
+    return value
+
+
+def unpack(packed):
+    """Recreates a metadata object from its compact transport form
+
+    :param packed: An object returned by :py:func:`datasetmd.transport.pack`
+    :type packed: tuple
+
+    :return: The unpacked object
+    :rtype: DatasetMD, or any of the other metadata classes
+    """
+    return _unpack(packed, {})
+
+
+def _unpack(value, memo):
+    """Unpacks a single value, so that objects shared in the packed form are
+    also shared once unpacked
+
+    :param value: The value to be unpacked
+    :param memo: Unpacked objects, keyed on the `id` of the packed tuple
+    :type memo: dict
+
+    :return: The unpacked value
+    """
+    if isinstance(value, list):
+        return [_unpack(item, memo) for item in value]
+    if isinstance(value, tuple):
+        if value[0] is None:
+            return tuple(_unpack(item, memo) for item in value[1])
+        key = id(value)
+        if key not in memo:
+            cls, fields = FIELDS[value[0]]
+            obj = cls.__new__(cls)
+            for field, item in zip(fields, value[1:]):
+                setattr(obj, field, _unpack(item, memo))
+            memo[key] = obj
+        return memo[key]
+    return value
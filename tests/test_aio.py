@@ -0,0 +1,49 @@
+import asyncio, threading, time
+import pytest
+import datasetmd, datasetmd.aio
+
+
+def test_iter_iso19139_matches_toISO19139():
+    md = datasetmd.DatasetMD(base=datasetmd.Base(identifier='a', title='A'))
+    renderer = datasetmd.aio.AsyncRenderer(max_workers=2)
+
+    async def collect():
+        return [piece async for piece in renderer.iter_iso19139(md, chunks=4)]
+    try:
+        assert ''.join(asyncio.run(collect())) == md.toISO19139()
+    finally:
+        renderer.shutdown()
+
+
+def test_cancelling_iter_iso19139_while_rendering(monkeypatch):
+    rendering = threading.Event()
+    closed = threading.Event()
+
+    def iterISO19139(self):
+        try:
+            yield '<first/>'
+            rendering.set()
+            time.sleep(0.2)
+            yield '<second/>'
+        finally:
+            closed.set()
+    monkeypatch.setattr(datasetmd.DatasetMD, 'iterISO19139', iterISO19139)
+    renderer = datasetmd.aio.AsyncRenderer(max_workers=2)
+
+    async def consume():
+        async for piece in renderer.iter_iso19139(datasetmd.DatasetMD(),
+                                                    chunks=1):
+            pass
+
+    async def cancel():
+        task = asyncio.ensure_future(consume())
+        while not rendering.is_set():
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    try:
+        asyncio.run(cancel())
+    finally:
+        renderer.shutdown()
+    assert closed.wait(5)
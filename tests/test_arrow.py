@@ -0,0 +1,152 @@
+import datetime, pytest
+import datasetmd, datasetmd.arrow, datasetmd.synthetic
+
+pyarrow = pytest.importorskip('pyarrow')
+import pyarrow.parquet
+
+
+def records(n=25):
+    return list(datasetmd.synthetic.records(n, seed=3))
+
+
+def terms(md):
+    return list(md.keywords or ()) + list(md.observed_properties or ())
+
+
+def test_table_row_counts():
+    mds = records()
+    tables = datasetmd.arrow.to_tables(mds)
+    assert tables.records.num_rows == len(mds)
+    assert tables.keywords.num_rows == sum(len(terms(md)) for md in mds)
+    assert tables.authors.num_rows == sum(len(md.citation.authors)
+                                            for md in mds)
+    assert tables.records.schema == datasetmd.arrow.RECORDS_SCHEMA
+    assert tables.keywords.schema == datasetmd.arrow.KEYWORDS_SCHEMA
+    assert tables.authors.schema == datasetmd.arrow.AUTHORS_SCHEMA
+
+
+def test_records_are_flattened():
+    mds = records()
+    rows = datasetmd.arrow.to_tables(mds).records.to_pylist()
+    for md, row in zip(mds, rows):
+        assert row['identifier'] == md.base.identifier
+        assert row['title'] == md.base.title
+        assert row['created'] == datetime.datetime.combine(md.base.created,
+                                                        datetime.time())
+        assert row['west'] == md.feature.longitude_westernmost
+        assert row['north'] == md.feature.latitude_northernmost
+        assert row['doi'] == md.citation.doi
+        assert row['publisher'] == md.publisher.name
+        assert row['license'] == md.license.name
+
+
+def test_child_rows_are_linked_by_identifier():
+    mds = records()
+    tables = datasetmd.arrow.to_tables(mds)
+    keywords, authors = {}, {}
+    for row in tables.keywords.to_pylist():
+        keywords.setdefault(row['identifier'], []).append(row)
+    for row in tables.authors.to_pylist():
+        authors.setdefault(row['identifier'], []).append(row)
+    assert set(keywords) == set(authors) == {md.base.identifier
+                                                for md in mds}
+    for md in mds:
+        rows = keywords[md.base.identifier]
+        assert [row['position'] for row in rows] == list(range(len(rows)))
+        assert [(row['title'], row['url'], row['observed_property'])
+                    for row in rows] == [(term.title, term.url,
+                        isinstance(term, datasetmd.ObservedProperty))
+                    for term in terms(md)]
+        rows = authors[md.base.identifier]
+        assert [(row['position'], row['person'], row['given_name'],
+                    row['family_name'], row['name']) for row in rows] == [
+                    (position, True, author.given_name, author.family_name,
+                        ' '.join(filter(None, (author.given_name,
+                                                author.family_name))))
+                    if isinstance(author, datasetmd.Person) else
+                    (position, False, None, None, author.name)
+                    for position, author in enumerate(md.citation.authors)]
+
+
+def test_organisation_authors():
+    md = datasetmd.DatasetMD(base=datasetmd.Base(identifier='a'),
+                citation=datasetmd.Citation(authors=[
+                    datasetmd.Organisation(name='Marine Institute'),
+                    datasetmd.Person(given_name='Ada')]))
+    assert datasetmd.arrow.to_tables([md]).authors.to_pylist() == [
+                {'identifier': 'a', 'position': 0, 'person': False,
+                    'name': 'Marine Institute', 'given_name': None,
+                    'family_name': None},
+                {'identifier': 'a', 'position': 1, 'person': True,
+                    'name': 'Ada', 'given_name': 'Ada', 'family_name': None}]
+
+
+def test_missing_parts_are_null():
+    mds = [datasetmd.DatasetMD(),
+            datasetmd.DatasetMD(base=datasetmd.Base(identifier='a'))]
+    tables = datasetmd.arrow.to_tables(mds)
+    for row in tables.records.to_pylist():
+        assert {name for name, value in row.items() if value is not None
+                    } == ({'identifier'} if row['identifier'] else set())
+    assert tables.keywords.num_rows == tables.authors.num_rows == 0
+
+
+@pytest.mark.parametrize('value, expected', [
+            (datetime.date(2020, 1, 2), datetime.datetime(2020, 1, 2)),
+            (datetime.datetime(2020, 1, 2, 3, 4),
+                datetime.datetime(2020, 1, 2, 3, 4)),
+            (datetime.datetime(2020, 1, 2, 3, 4, tzinfo=datetime.timezone(
+                datetime.timedelta(hours=2))),
+                datetime.datetime(2020, 1, 2, 1, 4)),
+            ('2020-01-02', datetime.datetime(2020, 1, 2)),
+            ('2020-01-02T03:04:05', datetime.datetime(2020, 1, 2, 3, 4, 5)),
+            ('2020-01-02T03:04:05Z', datetime.datetime(2020, 1, 2, 3, 4, 5)),
+            ('2020-01-02T03:04:05+01:00',
+                datetime.datetime(2020, 1, 2, 2, 4, 5)),
+            (None, None)])
+def test_timestamps(value, expected):
+    md = datasetmd.DatasetMD(base=datasetmd.Base(identifier='a',
+                                                    modified=value))
+    row, = datasetmd.arrow.to_tables([md]).records.to_pylist()
+    assert row['modified'] == expected
+
+
+def test_unparseable_dates_are_not_dropped():
+    md = datasetmd.DatasetMD(base=datasetmd.Base(identifier='a',
+                                                    modified='last Tuesday'))
+    with pytest.raises(ValueError):
+        datasetmd.arrow.to_tables([md])
+
+
+def test_record_batches():
+    mds = records()
+    batches = list(datasetmd.arrow.iter_record_batches(mds, 10))
+    assert [batch.records.num_rows for batch in batches] == [10, 10, 5]
+    for batch, start in zip(batches, (0, 10, 20)):
+        identifiers = {md.base.identifier for md in mds[start:start + 10]}
+        for table in batch:
+            assert set(table.column('identifier').to_pylist()) == identifiers
+
+
+def test_write_parquet(tmp_path):
+    mds = records()
+    directory = str(tmp_path / 'parquet')
+    rows = datasetmd.arrow.write_parquet(mds, directory, batch_size=10)
+    expected = datasetmd.arrow.to_tables(mds)
+    assert rows == tuple(table.num_rows for table in expected)
+    for name, table in zip(datasetmd.arrow.TABLES, expected):
+        parquet = pyarrow.parquet.ParquetFile(str(tmp_path / 'parquet' /
+                                                    (name + '.parquet')))
+        assert parquet.num_row_groups == 3
+        assert parquet.read().equals(table)
+    assert [pyarrow.parquet.ParquetFile(str(tmp_path / 'parquet' /
+                'records.parquet')).metadata.row_group(i).num_rows
+                for i in range(3)] == [10, 10, 5]
+
+
+def test_write_parquet_without_records(tmp_path):
+    rows = datasetmd.arrow.write_parquet([], str(tmp_path))
+    assert rows == (0, 0, 0)
+    for name in datasetmd.arrow.TABLES:
+        table = pyarrow.parquet.read_table(str(tmp_path / (name + '.parquet')))
+        assert table.num_rows == 0
@@ -0,0 +1,91 @@
+import datetime, decimal, io
+import pytest
+import datasetmd, datasetmd.binary, datasetmd.synthetic
+
+
+@pytest.fixture(scope='module')
+def records():
+    return list(datasetmd.synthetic.records(30, seed=10))
+
+
+def test_records_round_trip(records):
+    for md in records:
+        decoded = datasetmd.binary.loads(datasetmd.binary.dumps(md))
+        assert decoded.fingerprint() == md.fingerprint()
+        assert decoded.toISO19139() == md.toISO19139()
+
+
+def test_values_round_trip():
+    values = [None, True, False, 0, 127, 128, 2 ** 70, -1, -2 ** 70, 0.1,
+                float('inf'), '', 'océan', datetime.date(2021, 2, 3),
+                datetime.datetime(2021, 2, 3, 4, 5, 6, 7),
+                datetime.datetime(2021, 2, 3, 4, 5, tzinfo=datetime.timezone(
+                                            datetime.timedelta(hours=-3))),
+                decimal.Decimal('52.25000'), (1, 'a'), [[1], ()]]
+    feature = datasetmd.Feature(id=values)
+    decoded = datasetmd.binary.loads(datasetmd.binary.dumps(feature)).id
+    assert decoded == values
+    assert [type(value) for value in decoded] == \
+                [type(value) for value in values]
+
+
+def test_shared_objects_stay_shared():
+    publisher = datasetmd.Organisation(name='One', email_address='a@one.ie')
+    gemet = datasetmd.DefinedTermSet(title='GEMET')
+    md = datasetmd.DatasetMD(
+                base=datasetmd.Base(identifier='a'),
+                citation=datasetmd.Citation(authors=[publisher]),
+                keywords=[datasetmd.DefinedTerm(title=title,
+                                                in_defined_term_set=gemet)
+                            for title in ('ocean', 'sea')],
+                publisher=publisher)
+    decoded = datasetmd.binary.loads(datasetmd.binary.dumps(md))
+    assert decoded.citation.authors[0] is decoded.publisher
+    assert decoded.keywords[0].in_defined_term_set is \
+                decoded.keywords[1].in_defined_term_set
+    assert decoded.publisher.email_address == 'a@one.ie'
+
+
+def test_invalid_data():
+    with pytest.raises(ValueError):
+        datasetmd.binary.loads(b'<gmd:MD_Metadata/>')
+    with pytest.raises(TypeError):
+        datasetmd.binary.dumps(datasetmd.Feature(id={'a': 1}))
+
+
+def test_record_file(records, tmp_path):
+    path = str(tmp_path / 'records.dmd')
+    assert datasetmd.binary.write_records(iter(records), path) == \
+                len(records)
+    with datasetmd.binary.RecordFile(path) as stored:
+        assert len(stored) == len(records)
+        assert stored.identifiers() == [md.base.identifier
+                                        for md in records]
+        assert [md.fingerprint() for md in stored] == \
+                    [md.fingerprint() for md in records]
+        assert stored[-1].fingerprint() == records[-1].fingerprint()
+        md = records[17]
+        assert stored.get(md.base.identifier).fingerprint() == \
+                    md.fingerprint()
+        assert stored.get('missing', 'default') == 'default'
+        with pytest.raises(IndexError):
+            stored[len(records)]
+
+
+def test_record_file_from_a_stream(records, tmp_path):
+    stream = io.BytesIO()
+    datasetmd.binary.write_records(records[:3] + [datasetmd.DatasetMD()],
+                                    stream)
+    path = tmp_path / 'records.dmd'
+    path.write_bytes(stream.getvalue())
+    with datasetmd.binary.RecordFile(str(path)) as stored:
+        assert stored.identifiers()[-1] is None
+        assert stored[3].base is None
+        assert stored[0].fingerprint() == records[0].fingerprint()
+
+
+def test_record_file_rejects_other_files(tmp_path):
+    path = tmp_path / 'records.xml'
+    path.write_text('<gmd:MD_Metadata/>' * 10)
+    with pytest.raises(ValueError):
+        datasetmd.binary.RecordFile(str(path))
@@ -0,0 +1,140 @@
+import datetime, gzip, io, json, os, xml.etree.ElementTree
+import datasetmd, datasetmd.bulk, datasetmd.synthetic
+
+NAMESPACES = {'s': 'http://www.sitemaps.org/schemas/sitemap/0.9'}
+
+
+def records(n):
+    return list(datasetmd.synthetic.records(n, seed=4))
+
+
+def landing_page(md):
+    return 'https://example.org/datasets/{}?a=1&b=2'.format(
+                                                        md.base.identifier)
+
+
+def read(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as stream:
+        return stream.read()
+
+
+def lines(directory, shards):
+    return [read(os.path.join(directory, shard)).splitlines()
+                for shard in shards]
+
+
+def test_write_ndjson():
+    mds = records(5)
+    stream = io.StringIO()
+    assert datasetmd.bulk.write_ndjson(iter(mds), stream) == 5
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+                md.toSchemaDotOrgDict() for md in mds]
+
+
+def test_split_by_records(tmp_path):
+    mds = records(12)
+    shards = datasetmd.bulk.export_jsonld(iter(mds), str(tmp_path),
+                                            compress=False, max_records=5)
+    assert shards == ['datasets-00000.ndjson', 'datasets-00001.ndjson',
+                        'datasets-00002.ndjson']
+    shard_lines = lines(str(tmp_path), shards)
+    assert [len(shard) for shard in shard_lines] == [5, 5, 2]
+    assert [line for shard in shard_lines for line in shard] == [
+                md.toSchemaDotOrg() for md in mds]
+    assert sorted(os.listdir(str(tmp_path))) == shards
+
+
+def test_split_by_bytes(tmp_path):
+    mds = records(20)
+    sizes = [len((md.toSchemaDotOrg() + '\n').encode('utf-8'))
+                for md in mds]
+    max_bytes = max(sizes) * 3
+    shards = datasetmd.bulk.export_jsonld(mds, str(tmp_path),
+                                compress=False, max_bytes=max_bytes)
+    assert len(shards) > 1
+    position = 0
+    for shard, shard_lines in zip(shards, lines(str(tmp_path), shards)):
+        size = os.path.getsize(os.path.join(str(tmp_path), shard))
+        assert size == sum(sizes[position:position + len(shard_lines)])
+        assert size <= max_bytes
+        if position + len(shard_lines) < len(mds):
+            assert size + sizes[position + len(shard_lines)] > max_bytes
+        position += len(shard_lines)
+    assert position == len(mds)
+
+
+def test_gzip(tmp_path):
+    mds = records(7)
+    shards = datasetmd.bulk.export_jsonld(mds, str(tmp_path), max_records=4,
+                                            landing_page=landing_page)
+    assert shards == ['datasets-00000.ndjson.gz', 'datasets-00001.ndjson.gz']
+    assert [line for shard in lines(str(tmp_path), shards)
+                for line in shard] == [md.toSchemaDotOrg()
+                                        for md in mds]
+    for name in ('datasets-00000.xml.gz', 'datasets-00001.xml.gz'):
+        with open(str(tmp_path / name), 'rb') as stream:
+            assert stream.read(2) == b'\x1f\x8b'
+
+
+def test_sitemaps(tmp_path):
+    mds = records(7)
+    mds[0].base.modified = datetime.datetime(2020, 5, 6, 7, 8, 9)
+    mds[1].base.modified = datetime.datetime(2020, 5, 6, 23, 30,
+                    tzinfo=datetime.timezone(datetime.timedelta(hours=-2)))
+    mds[2].base.modified = None
+    datasetmd.bulk.export_jsonld(mds, str(tmp_path), prefix='ocean',
+                    compress=False, max_records=4, landing_page=landing_page,
+                    sitemap_url='https://example.org/sitemaps')
+    urls = []
+    for name in ('ocean-00000.xml', 'ocean-00001.xml'):
+        root = xml.etree.ElementTree.parse(str(tmp_path / name)).getroot()
+        assert root.tag == '{{{}}}urlset'.format(NAMESPACES['s'])
+        urls.append([(url.findtext('s:loc', namespaces=NAMESPACES),
+                        url.findtext('s:lastmod', namespaces=NAMESPACES))
+                    for url in root.findall('s:url', NAMESPACES)])
+    assert [len(shard) for shard in urls] == [4, 3]
+    urls = [url for shard in urls for url in shard]
+    assert [loc for loc, lastmod in urls] == [landing_page(md) for md in mds]
+    assert [lastmod for loc, lastmod in urls[:3]] == [
+                '2020-05-06', '2020-05-07T01:30:00+00:00', None]
+    assert [lastmod for loc, lastmod in urls[3:]] == [
+                md.base.modified.isoformat() for md in mds[3:]]
+    root = xml.etree.ElementTree.parse(str(tmp_path / 'ocean-index.xml')
+                                        ).getroot()
+    assert [sitemap.findtext('s:loc', namespaces=NAMESPACES)
+                for sitemap in root.findall('s:sitemap', NAMESPACES)] == [
+                'https://example.org/sitemaps/ocean-00000.xml',
+                'https://example.org/sitemaps/ocean-00001.xml']
+
+
+def test_records_without_landing_pages(tmp_path):
+    mds = records(3)
+    datasetmd.bulk.export_jsonld(mds, str(tmp_path), compress=False,
+                    landing_page=lambda md: None if md is mds[1]
+                                                else landing_page(md))
+    root = xml.etree.ElementTree.parse(str(tmp_path / 'datasets-00000.xml')
+                                        ).getroot()
+    assert [url.findtext('s:loc', namespaces=NAMESPACES)
+                for url in root.findall('s:url', NAMESPACES)] == [
+                landing_page(mds[0]), landing_page(mds[2])]
+
+
+def test_stale_shards_are_removed(tmp_path):
+    directory = str(tmp_path)
+    other = datasetmd.bulk.export_jsonld(records(3), directory,
+                                            prefix='other', max_records=1)
+    datasetmd.bulk.export_jsonld(records(12), directory, max_records=2,
+                    landing_page=landing_page,
+                    sitemap_url='https://example.org/')
+    assert len(os.listdir(directory)) == len(other) + 6 * 2 + 1
+    shards = datasetmd.bulk.export_jsonld(records(3), directory,
+                    compress=False, max_records=2, landing_page=landing_page,
+                    sitemap_url='https://example.org/')
+    assert sorted(os.listdir(directory)) == sorted(other + shards + [
+                'datasets-00000.xml', 'datasets-00001.xml',
+                'datasets-index.xml'])
+    shards = datasetmd.bulk.export_jsonld(records(1), directory)
+    assert sorted(os.listdir(directory)) == sorted(other + shards)
+    datasetmd.bulk.export_jsonld([], directory)
+    assert sorted(os.listdir(directory)) == sorted(other)
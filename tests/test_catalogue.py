@@ -0,0 +1,81 @@
+import datetime, random, time
+import datasetmd, datasetmd.catalogue, datasetmd.synthetic
+
+
+def records():
+    first = list(datasetmd.synthetic.records(150, seed=5))
+    second = list(datasetmd.synthetic.records(150, seed=6))
+    for md, other in zip(first, second):
+        other.base.identifier = md.base.identifier
+    return first + second
+
+
+def between(records, attribute, start, end):
+    dates = []
+    for identifier, md in records.items():
+        date = datasetmd.catalogue._date_key(getattr(md.base, attribute))
+        if date is not None and (start is None or date >= start) and \
+                (end is None or date < end):
+            dates.append((date, identifier))
+    return [identifier for date, identifier in sorted(dates)]
+
+
+def identifiers(records):
+    return [md.base.identifier for md in records]
+
+
+def check(catalogue, expected, random):
+    assert len(catalogue) == len(expected)
+    for md in random.sample(list(expected.values()), min(5, len(expected))):
+        for term in md.keywords:
+            assert set(identifiers(catalogue.with_term(term.url))) == {
+                        identifier for identifier, other in expected.items()
+                        if term.url in {k.url for k in other.keywords}}
+        assert set(identifiers(catalogue.published_by(
+                    md.publisher.name))) == {identifier for identifier, other
+                        in expected.items()
+                        if other.publisher.name == md.publisher.name}
+        assert identifiers(catalogue.with_doi(md.citation.doi)) == [
+                    md.base.identifier]
+    start = datetime.datetime(random.randint(2000, 2015), 1, 1)
+    end = start + datetime.timedelta(days=random.randint(0, 3000))
+    for bounds in ((start, end), (None, end), (start, None), (None, None)):
+        assert identifiers(catalogue.modified_between(*bounds)) == \
+                    between(expected, 'modified', *bounds)
+        assert identifiers(catalogue.created_between(*bounds)) == \
+                    between(expected, 'created', *bounds)
+
+
+def test_add_replace_remove_and_query():
+    rng = random.Random(0)
+    pool = records()
+    catalogue = datasetmd.catalogue.Catalogue()
+    expected = {}
+    for step in range(2000):
+        md = rng.choice(pool)
+        identifier = md.base.identifier
+        if rng.random() < 0.25:
+            assert catalogue.remove(identifier) is expected.pop(identifier,
+                                                                None)
+        else:
+            assert catalogue.add(md) is expected.get(identifier)
+            expected[identifier] = md
+        if step % 97 == 0:
+            check(catalogue, expected, rng)
+    check(catalogue, expected, rng)
+
+
+def test_replacing_dates_scales():
+    index = datasetmd.catalogue._DateIndex()
+    count = 200000
+    day = datetime.datetime(2020, 1, 1)
+    for i in range(count):
+        index.add(day, i)
+    start = time.perf_counter()
+    for i in range(count):
+        index.remove(day, i)
+        index.add(day + datetime.timedelta(days=1), i)
+    assert len(index.between(day + datetime.timedelta(days=1))) == count
+    assert index.between(end=day + datetime.timedelta(days=1)) == []
+    # A linear cost per replacement would take minutes
+    assert time.perf_counter() - start < 10
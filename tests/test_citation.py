@@ -0,0 +1,166 @@
+import datetime, random
+import datasetmd, datasetmd.templates.citationstring
+
+
+# The citation builder as it was before it was rewritten to run in linear
+# time, against which the output of the new builder is checked
+def baseline(md=None):
+    """This function creates a suggested citation string for a DatasetMD
+    object.
+    
+    :param md:
+    :type md: DatasetMD, defaults to None
+    
+    :rtype: str, or None
+    """
+    ret_string = ""
+    author_count = 0
+    affiliation_list = []
+    if md is not None:
+        if md.citation is not None:
+            if md.citation.authors is not None:
+                for author in md.citation.authors:
+                    if author_count > 0:
+                        ret_string += '; '
+                    if isinstance(author, datasetmd.Person):
+                        if author.family_name is None:
+                            ret_string += '{}'.format(author.given_name)
+                            author_count += 1
+                        elif author.given_name is None:
+                            ret_string += '{}'.format(author.family_name)
+                            author_count += 1
+                        else:
+                            ret_string += '{0}, {1}'.format(author.family_name, 
+                                                                author.given_name)
+                            author_count += 1
+                        if author.affiliation is not None:
+                            affiliation_count = 0
+                            for affiliation in author.affiliation:
+                                if affiliation.name is not None:
+                                    if affiliation.country is not None:
+                                        citation_affiliation = '{0}, {1}'.format(affiliation.name, 
+                                                                    affiliation.country)
+                                    else:
+                                        citation_affiliation = '{}'.format(affiliation.name)
+                                    if citation_affiliation not in affiliation_list:
+                                        affiliation_list.append(citation_affiliation)
+                                    try:
+                                        if affiliation_count > 0:
+                                            ret_string += ','
+                                        ret_string += ' ({})'.format(affiliation_list.index(citation_affiliation) + 1)
+                                        affiliation_count += 1
+                                    except ValueError:
+                                        pass
+                    elif isinstance(author, datasetmd.Organisation):
+                        if author.name is not None:
+                            ret_string += '{}'.format(author.name)
+                            if author.country is not None:
+                                citation_affiliation = '{0}, {1}'.format(author.name, 
+                                                                    author.country)
+                            else:
+                                citation_affiliation = '{}'.format(author.name)
+                            if citation_affiliation not in affiliation_list:
+                                affiliation_list.append(citation_affiliation)
+                            try:
+                                ret_string += ' ({})'.format(affiliation_list.index(citation_affiliation) + 1)
+                            except ValueError:
+                                pass
+                            author_count += 1
+            if ret_string:
+                ret_string = '{}. '.format(ret_string)
+            if md.citation.doi_publication_date is not None:
+                ret_string += '({})'.format(md.citation.doi_publication_date.year)
+            if ret_string:
+                ret_string = '{}. '.format(ret_string)
+            if md.base.title is not None:
+                ret_string += '{}'.format(md.base.title)
+            if ret_string:
+                ret_string = '{}. '.format(ret_string)
+            if md.citation.doi_publisher is not None:
+                if md.citation.doi_publisher.name is not None:
+                    if md.citation.doi_publisher.country is not None:
+                        ret_string += '{}, {}'.format(md.citation.doi_publisher.name, 
+                                                md.citation.doi_publisher.country)
+                    else:
+                        ret_string += '{}'.format(md.citation.doi_publisher.name)
+            if ret_string:
+                ret_string = '{}. '.format(ret_string)
+            if md.citation.prefer_short_doi:
+                if md.citation.short_doi is not None:
+                    ret_string += 'doi: {}'.format(md.citation.short_doi)
+                elif md.citation.doi is not None:
+                    ret_string += 'doi: {}'.format(md.citation.doi)
+            else:
+                if md.citation.doi is not None:
+                    ret_string += 'doi: {}'.format(md.citation.doi)
+                elif md.citation.short_doi is not None:
+                    ret_string += 'doi: {}'.format(md.citation.short_doi)
+            if ret_string:
+                ret_string = '{}. '.format(ret_string)
+            if affiliation_list:
+                affiliation_count = 1
+                for affiliation in affiliation_list:
+                    ret_string += '({0}) {1}. '.format(affiliation_count, 
+                                                                affiliation)
+                    affiliation_count += 1
+    ret_string = ret_string.strip()
+    if not ret_string:
+        ret_string = None
+    return ret_string
+
+def organisation(rng):
+    return datasetmd.Organisation(
+                    name=rng.choice([None, 'Marine Institute', 'NOC', 'BODC']),
+                    country=rng.choice([None, 'Ireland', 'UK']))
+
+
+def person(rng):
+    return datasetmd.Person(
+                    given_name=rng.choice([None, 'Adam', 'Ann']),
+                    family_name=rng.choice([None, 'Leadbetter', 'Smith']),
+                    affiliation=rng.choice([None, []] + [[organisation(rng)
+                                    for i in range(rng.randint(1, 3))]] * 3))
+
+
+def record(rng):
+    citation = None
+    if rng.random() < 0.95:
+        authors = None
+        if rng.random() < 0.9:
+            authors = [rng.choice([person, organisation])(rng)
+                        for i in range(rng.randint(0, 12))]
+        citation = datasetmd.Citation(
+                    authors=authors,
+                    doi=rng.choice([None, '10.1234/abc']),
+                    doi_publication_date=rng.choice([None,
+                                                datetime.date(2020, 5, 1)]),
+                    doi_publisher=rng.choice([None, organisation(rng)]),
+                    prefer_short_doi=rng.choice([False, True]),
+                    short_doi=rng.choice([None, '10/xyz']))
+    return datasetmd.DatasetMD(
+                    base=datasetmd.Base(title=rng.choice([None, 'Survey'])),
+                    citation=citation)
+
+
+def test_citations_match_the_baseline_builder():
+    rng = random.Random(12)
+    for trial in range(2000):
+        md = record(rng)
+        assert datasetmd.templates.citationstring.template(md) == \
+                    baseline(md)
+    assert datasetmd.templates.citationstring.template() is None
+
+
+def test_many_authors():
+    organisations = [datasetmd.Organisation(name='Institute {}'.format(i),
+                                            country='Ireland')
+                        for i in range(50)]
+    md = datasetmd.DatasetMD(
+                    base=datasetmd.Base(title='Survey'),
+                    citation=datasetmd.Citation(authors=[datasetmd.Person(
+                        given_name='Given {}'.format(i),
+                        family_name='Family {}'.format(i),
+                        affiliation=[organisations[i % 50],
+                                        organisations[i * 7 % 50]])
+                        for i in range(300)], doi='10.1234/abc'))
+    assert datasetmd.templates.citationstring.template(md) == baseline(md)
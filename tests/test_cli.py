@@ -0,0 +1,78 @@
+import os, xml.etree.ElementTree
+import pytest
+import datasetmd, datasetmd.cli, datasetmd.reader, datasetmd.synthetic
+
+OCEAN = 'http://www.eionet.europa.eu/gemet/concept/5920'
+
+
+def record(identifier, keyword):
+    gemet = datasetmd.DefinedTermSet(title='GEMET',
+                                url='http://www.eionet.europa.eu/gemet/')
+    return datasetmd.DatasetMD(
+                base=datasetmd.Base(identifier=identifier,
+                                    title='Record {}'.format(identifier)),
+                keywords=[datasetmd.DefinedTerm(in_defined_term_set=gemet,
+                                                title=keyword, url=OCEAN)],
+                owning_organisations=[datasetmd.Organisation(name='One')],
+                publisher=datasetmd.Organisation(name='One',
+                                                email_address='a@one.ie'))
+
+
+def iso19139(md):
+    """Renders a record as the converter renders it, so that converting the
+    output again should give exactly the same document"""
+    return datasetmd.reader.read_iso19139(
+                                md.toISO19139().encode('utf-8')).toISO19139()
+
+
+def convert(tmp_path, documents, *options):
+    inputs = []
+    for position, document in enumerate(documents):
+        path = tmp_path / 'input-{}.xml'.format(position)
+        path.write_text(document, encoding='utf-8')
+        inputs.append(str(path))
+    output = tmp_path / 'output'
+    assert datasetmd.cli.main(['convert', *inputs, '--to', 'iso19139', '-d',
+                                str(output), '-q', *options]) == 0
+    return {name: (output / name).read_text(encoding='utf-8')
+                for name in os.listdir(output)}
+
+
+@pytest.mark.parametrize('options', [(), ('--intern',)])
+def test_iso19139_round_trip_is_byte_identical(tmp_path, options):
+    documents = [iso19139(record('one', 'océan')),
+                 iso19139(record('two', 'ocean'))]
+    documents += [iso19139(md) for md in
+                    datasetmd.synthetic.records(20, seed=2)]
+    output = convert(tmp_path, documents, *options)
+    assert sorted(output.values()) == sorted(documents)
+
+
+def test_conversion_keeps_publisher_and_keyword_labels(tmp_path):
+    documents = [iso19139(record('one', 'ocean')),
+                 iso19139(record('two', 'océan'))]
+    output = convert(tmp_path, documents)
+    records = [datasetmd.reader.read_iso19139(document.encode('utf-8'))
+                for document in sorted(output.values())]
+    assert [md.publisher.email_address for md in records] == ['a@one.ie'] * 2
+    assert [md.keywords[0].title for md in records] == ['ocean', 'océan']
+
+
+@pytest.mark.parametrize('count', [0, 1, 5])
+def test_single_iso19139_output_counts_records(tmp_path, count):
+    inputs = tmp_path / 'inputs'
+    inputs.mkdir()
+    records = list(datasetmd.synthetic.records(count, seed=3))
+    for md in records:
+        (inputs / '{}.xml'.format(md.base.identifier)).write_text(
+                                    md.toISO19139(), encoding='utf-8')
+    output = tmp_path / 'output.xml'
+    assert datasetmd.cli.main(['convert', str(inputs), '--to', 'iso19139',
+                                '-o', str(output), '-q']) == 0
+    results = xml.etree.ElementTree.parse(str(output)).getroot().find(
+                    '{http://www.opengis.net/cat/csw/2.0.2}SearchResults')
+    assert results.get('numberOfRecordsMatched') == str(count)
+    assert results.get('numberOfRecordsReturned') == str(count)
+    read = datasetmd.reader.iter_iso19139(str(output))
+    assert sorted(md.base.identifier for md in read) == \
+                sorted(md.base.identifier for md in records)
@@ -0,0 +1,134 @@
+import random
+import pytest
+
+numpy = pytest.importorskip('numpy')
+
+import datasetmd, datasetmd.featurearray
+
+
+def random_box(rng):
+    """Returns a box with whole-degree edges, so that every corner case can
+    be checked by comparing the points which the boxes cover"""
+    west = rng.randint(-180, 180)
+    if rng.random() < 0.05:
+        east = west + 360
+    else:
+        east = rng.randint(-180, 180)
+    south = rng.randint(-90, 90)
+    north = rng.randint(south, 90)
+    return west, south, east, north
+
+
+def longitudes(west, east):
+    """Returns the half degrees of longitude which an arc covers, which
+    include a point within every gap between arcs with whole-degree ends"""
+    width = 360 if east - west >= 360 else (east - west) % 360
+    return {(2 * west + offset) % 720 for offset in range(2 * width + 1)}
+
+
+def points(box):
+    """Returns the longitudes and latitudes which a box covers, which are
+    compared separately since a box is their product"""
+    west, south, east, north = box
+    return longitudes(west, east), set(range(south, north + 1))
+
+
+def overlap(a, b):
+    return bool(a[0] & b[0]) and bool(a[1] & b[1])
+
+
+def within(a, b):
+    return a[0] <= b[0] and a[1] <= b[1]
+
+
+def sample(rng, count):
+    return [random_box(rng) for i in range(count)]
+
+
+@pytest.fixture
+def boxes():
+    return sample(random.Random(1), 300)
+
+
+def array(boxes):
+    return datasetmd.featurearray.FeatureArray(*zip(*boxes))
+
+
+def test_predicates_match_brute_force(boxes):
+    features = array(boxes)
+    rng = random.Random(2)
+    for query in sample(rng, 40) + [(170, -10, -170, 10), (5, 5, 5, 5)]:
+        inside = points(query)
+        for box, intersects, contains, is_within in zip(boxes,
+                        features.intersects(*query).tolist(),
+                        features.contains(*query).tolist(),
+                        features.within(*query).tolist()):
+            covered = points(box)
+            assert intersects == overlap(covered, inside)
+            assert contains == within(inside, covered)
+            assert is_within == within(covered, inside)
+
+
+def test_intersection_matches_brute_force(boxes):
+    features = array(boxes)
+    for query in sample(random.Random(3), 20):
+        inside = points(query)
+        clipped = features.intersection(*query)
+        for box, feature in zip(boxes, clipped.to_features()):
+            covered = points(box)
+            if not overlap(covered, inside):
+                assert feature is None
+                continue
+            common = (covered[0] & inside[0], covered[1] & inside[1])
+            result = points(tuple(int(round(value)) for value in (
+                        feature.longitude_westernmost,
+                        feature.latiude_southernmost,
+                        feature.longitude_easternmost,
+                        feature.latitude_northernmost)))
+            assert within(common, result)
+            assert within(result, covered) or within(result, inside)
+
+
+def test_union_matches_brute_force():
+    rng = random.Random(4)
+    for trial in range(200):
+        boxes = [random_box(rng) for i in range(rng.randint(1, 6))]
+        boxes = [box for box in boxes if box[2] - box[0] < 360] or \
+                    [(0, 0, 10, 10)]
+        west, south, east, north = array(boxes).union()
+        widths = [(e - w) % 360 for w, s, e, n in boxes]
+        narrowest = min(max((w - start) % 360 + width
+                                for (w, s, e, n), width in zip(boxes, widths))
+                        for start, s, e, n in boxes)
+        if narrowest >= 360:
+            assert (west, east) == (-180.0, 180.0)
+        else:
+            assert (east - west) % 360 == narrowest
+        enclosing = points((int(west), int(south), int(east), int(north)))
+        for box in boxes:
+            assert within(points(box), enclosing)
+
+
+def test_union_of_nothing():
+    features = datasetmd.featurearray.FeatureArray.from_features([None])
+    assert features.union() is None
+
+
+def test_indexing():
+    features = datasetmd.featurearray.FeatureArray.from_features([
+                    datasetmd.Feature(crs_epsg_code=4326, id='a',
+                                        latitude_northernmost=5,
+                                        latiude_southernmost=0,
+                                        longitude_easternmost=-170,
+                                        longitude_westernmost=170),
+                    None])
+    feature = features[0]
+    assert isinstance(feature, datasetmd.Feature)
+    assert (feature.id, feature.crs_epsg_code, feature.longitude_westernmost,
+            feature.longitude_easternmost) == ('a', 4326, 170.0, -170.0)
+    assert features[numpy.int64(-1)] is None
+    with pytest.raises(IndexError):
+        features[2]
+    assert features[1:].to_features() == [None]
+    assert len(features[numpy.array([True, False])]) == 1
+    assert features[[0, 0]].ids == ['a', 'a']
@@ -0,0 +1,124 @@
+import json, os
+import pytest
+import datasetmd, datasetmd.batch, datasetmd.incremental, datasetmd.rendercache
+import datasetmd.synthetic
+
+
+def files(directory):
+    return sorted(name for name in os.listdir(directory)
+                    if name != datasetmd.incremental.MANIFEST_NAME)
+
+
+def record(identifier):
+    return datasetmd.DatasetMD(base=datasetmd.Base(identifier=identifier,
+                                    title='Record {}'.format(identifier)))
+
+
+def test_writes_skips_and_deletes(tmp_path):
+    records = list(datasetmd.synthetic.records(10, seed=4))
+    export = datasetmd.incremental.export_incremental
+    assert export(records, str(tmp_path)) == (10, 0, 0)
+    assert len(files(tmp_path)) == 10
+    for md in records:
+        path = tmp_path / datasetmd.batch.file_name(md.base.identifier,
+                                                    datasetmd.ISO19139)
+        assert path.read_text(encoding='utf-8') == md.toISO19139()
+    assert export(records, str(tmp_path)) == (0, 10, 0)
+    records[0].base.title = 'Changed'
+    os.remove(tmp_path / datasetmd.batch.file_name(
+                    records[1].base.identifier, datasetmd.ISO19139))
+    assert export(records[:8], str(tmp_path)) == (2, 6, 2)
+    assert files(tmp_path) == sorted(datasetmd.batch.file_name(
+                    md.base.identifier, datasetmd.ISO19139)
+                    for md in records[:8])
+    assert 'Changed' in (tmp_path / datasetmd.batch.file_name(
+                    records[0].base.identifier, datasetmd.ISO19139)).read_text(
+                    encoding='utf-8')
+
+
+def test_file_names_are_unique():
+    identifiers = ['a/b', 'a_b', 'a%2Fb', 'a%b', 'a%25b']
+    names = {datasetmd.batch.file_name(identifier, datasetmd.ISO19139)
+                for identifier in identifiers}
+    assert len(names) == len(identifiers)
+    assert datasetmd.batch.file_name('a_b', datasetmd.ISO19139) == 'a_b.xml'
+    assert all(os.sep not in name for name in names)
+
+
+def test_deleting_a_record_keeps_others_files(tmp_path):
+    export = datasetmd.incremental.export_incremental
+    export([record('a/b'), record('a_b')], str(tmp_path))
+    assert len(files(tmp_path)) == 2
+    assert export([record('a_b')], str(tmp_path)) == (0, 1, 1)
+    assert files(tmp_path) == ['a_b.xml']
+
+
+def test_renamed_files_are_replaced(tmp_path):
+    # A manifest from an export which named the file of 'a/b' a_b.xml
+    (tmp_path / 'a_b.xml').write_text('old', encoding='utf-8')
+    (tmp_path / 'c_d.xml').write_text('old', encoding='utf-8')
+    manifest = datasetmd.incremental.Manifest(
+                    str(tmp_path / datasetmd.incremental.MANIFEST_NAME),
+                    datasetmd.ISO19139)
+    for identifier, path in (('a/b', 'a_b.xml'), ('c/d', 'c_d.xml')):
+        manifest.set(identifier, record(identifier).fingerprint(), path)
+    manifest.save()
+    summary = datasetmd.incremental.export_incremental(
+                    [record('a/b'), record('a_b'), record('c/d')],
+                    str(tmp_path))
+    assert summary == (3, 0, 0)
+    assert files(tmp_path) == ['a%2Fb.xml', 'a_b.xml', 'c%2Fd.xml']
+    assert (tmp_path / 'a_b.xml').read_text(encoding='utf-8') == \
+                    record('a_b').toISO19139()
+    with open(tmp_path / datasetmd.incremental.MANIFEST_NAME) as stream:
+        assert json.load(stream)['records']['a/b']['path'] == 'a%2Fb.xml'
+
+
+def test_changed_templates_render_every_record(tmp_path, monkeypatch):
+    records = list(datasetmd.synthetic.records(5, seed=4))
+    export = datasetmd.incremental.export_incremental
+    for format in (datasetmd.ISO19139, datasetmd.CITE_STRING):
+        directory = str(tmp_path / format)
+        assert export(records, directory, format) == (5, 0, 0)
+        assert export(records, directory, format) == (0, 5, 0)
+        monkeypatch.setattr(datasetmd.rendercache, 'template_version',
+                            lambda format: 'changed')
+        assert export(records[:4], directory, format) == (4, 0, 1)
+        assert export(records[:4], directory, format) == (0, 4, 0)
+        monkeypatch.undo()
+
+
+def test_interrupted_render_is_finished_next_time(tmp_path, monkeypatch):
+    records = list(datasetmd.synthetic.records(5, seed=4))
+    export = datasetmd.incremental.export_incremental
+    export(records, str(tmp_path))
+    monkeypatch.setattr(datasetmd.rendercache, 'template_version',
+                        lambda format: 'changed')
+
+    def fail(document):
+        raise RuntimeError('interrupted')
+    with pytest.raises(RuntimeError):
+        export(records, str(tmp_path), callback=fail)
+    assert export(records, str(tmp_path)) == (5, 0, 0)
+    assert export(records, str(tmp_path)) == (0, 5, 0)
+
+
+def test_version_1_manifests_are_migrated(tmp_path):
+    export = datasetmd.incremental.export_incremental
+    records = list(datasetmd.synthetic.records(3, seed=4))
+    export(records, str(tmp_path))
+    path = tmp_path / datasetmd.incremental.MANIFEST_NAME
+    content = json.loads(path.read_text(encoding='utf-8'))
+    del content['template_version']
+    content['version'] = 1
+    path.write_text(json.dumps(content), encoding='utf-8')
+    assert export(records[:2], str(tmp_path)) == (2, 0, 1)
+    assert len(files(tmp_path)) == 2
+
+
+def test_unknown_manifest_versions_are_rejected(tmp_path):
+    path = tmp_path / datasetmd.incremental.MANIFEST_NAME
+    path.write_text(json.dumps({'version': 99, 'format': datasetmd.ISO19139,
+                                'records': {}}), encoding='utf-8')
+    with pytest.raises(ValueError):
+        datasetmd.incremental.export_incremental([record('a')], str(tmp_path))
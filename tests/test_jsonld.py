@@ -0,0 +1,95 @@
+import datetime, json, pytest
+import datasetmd, datasetmd.jsonld, datasetmd.synthetic
+
+ENCODERS = [datasetmd.jsonld._json_dumps,
+            pytest.param(datasetmd.jsonld._orjson_dumps,
+                    marks=pytest.mark.skipif(datasetmd.jsonld.orjson is None,
+                                            reason='orjson is not installed'))]
+
+
+@pytest.fixture(params=ENCODERS, ids=['json', 'orjson'])
+def encoder(request):
+    datasetmd.jsonld.set_json_encoder(request.param)
+    yield request.param
+    datasetmd.jsonld.set_json_encoder()
+
+
+def test_default_encoder():
+    datasetmd.jsonld.set_json_encoder()
+    assert datasetmd.jsonld.get_json_encoder() is (
+                datasetmd.jsonld._json_dumps if datasetmd.jsonld.orjson is None
+                else datasetmd.jsonld._orjson_dumps)
+
+
+def test_set_encoder(encoder):
+    assert datasetmd.jsonld.get_json_encoder() is encoder
+    md = next(iter(datasetmd.synthetic.records(1, seed=8)))
+    assert md.toSchemaDotOrg() == encoder(md.toSchemaDotOrgDict())
+
+
+def test_special_characters(encoder):
+    md = next(iter(datasetmd.synthetic.records(1, seed=8)))
+    md.base.title = 'The "Celtic" Sea\nété \\ 2020\t '
+    md.base.abstract = 'Line one\r\nLine "two" </script>\x00 \U0001f30a'
+    obj = md.toSchemaDotOrgDict()
+    assert obj['name'] == md.base.title
+    assert obj['description'] == md.base.abstract
+    assert json.loads(md.toSchemaDotOrg()) == obj
+
+
+def test_synthetic_records(encoder):
+    for md in datasetmd.synthetic.records(20, seed=9):
+        assert json.loads(md.toSchemaDotOrg()) == md.toSchemaDotOrgDict()
+
+
+def test_absent_fields_are_omitted(encoder):
+    context = {'@context': {'@vocab': 'https://schema.org/'},
+                '@type': 'Dataset'}
+    md = datasetmd.DatasetMD()
+    assert md.toSchemaDotOrgDict() == context
+    assert json.loads(md.toSchemaDotOrg()) == context
+    md = datasetmd.DatasetMD(base=datasetmd.Base(title='Waves'),
+                license=datasetmd.License(),
+                publisher=datasetmd.Organisation(),
+                included_in_data_catalogue=datasetmd.WebAddress(),
+                observed_properties=[datasetmd.ObservedProperty()])
+    assert md.toSchemaDotOrgDict() == dict(context, name='Waves',
+                variableMeasured=[{'@type': 'PropertyValue'}],
+                publisher={'@type': 'Organization'})
+
+
+def test_dates_and_identifiers():
+    md = datasetmd.DatasetMD(
+                base=datasetmd.Base(modified=datetime.date(2021, 3, 4),
+                                    abstract='word ' * 2000),
+                citation=datasetmd.Citation(doi='10.1/abc', short_doi='10/x'))
+    obj = md.toSchemaDotOrgDict()
+    assert obj['version'] == '2021-03-04'
+    assert obj['sameAs'] == 'https://doi.org/10/x'
+    assert obj['identifier']['value'] == 'doi:10.1/abc'
+    assert len(obj['description']) <= datasetmd.jsonld.DESCRIPTION_LENGTH
+    assert obj['description'].endswith('word...')
+
+
+SPDX = 'https://spdx.org/licenses/CC-BY-4.0'
+URL = 'https://creativecommons.org/licenses/by/4.0/'
+
+
+@pytest.mark.parametrize('spdx_url, url, name, expected', [
+            (SPDX, URL, 'CC BY 4.0', [SPDX, URL]),
+            (SPDX, None, 'CC BY 4.0', SPDX),
+            (None, URL, 'CC BY 4.0', URL),
+            (None, None, 'CC BY 4.0', 'CC BY 4.0')])
+def test_license(encoder, spdx_url, url, name, expected):
+    md = datasetmd.DatasetMD(license=datasetmd.License(name=name,
+                spdx_url=None if spdx_url is None else
+                    datasetmd.WebAddress(url=spdx_url),
+                url=datasetmd.WebAddress(title='A licence', url=url)))
+    assert md.toSchemaDotOrgDict()['license'] == expected
+    assert json.loads(md.toSchemaDotOrg())['license'] == expected
+
+
+def test_license_without_name_or_urls():
+    md = datasetmd.DatasetMD(license=datasetmd.License(
+                                url=datasetmd.WebAddress(title='A licence')))
+    assert 'license' not in md.toSchemaDotOrgDict()
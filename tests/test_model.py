@@ -0,0 +1,14 @@
+import datasetmd
+
+
+def test_positional_arguments_keep_their_order():
+    limitations = datasetmd.Limitations()
+    md = datasetmd.DatasetMD(None, None, None, None, None, None, limitations)
+    assert md.limitations is limitations
+    assert md.license is None
+
+
+def test_license_is_accepted_by_keyword():
+    license = datasetmd.License(name='CC-BY-4.0')
+    md = datasetmd.DatasetMD(license=license)
+    assert md.license is license
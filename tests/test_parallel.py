@@ -0,0 +1,29 @@
+import pytest
+import datasetmd, datasetmd.parallel, datasetmd.synthetic
+
+
+@pytest.fixture(scope='module')
+def records():
+    return list(datasetmd.synthetic.records(40, seed=3))
+
+
+@pytest.mark.parametrize('format', [datasetmd.ISO19139,
+                                    datasetmd.SCHEMA_DOT_ORG,
+                                    datasetmd.CITE_STRING])
+def test_parallel_export_matches_serial(records, format):
+    serial = list(datasetmd.render_many(records, format))
+    parallel = list(datasetmd.parallel.export(records, format, workers=2,
+                                                chunk_size=7))
+    assert parallel == serial
+
+
+def test_unordered_export_yields_every_position(records):
+    serial = list(datasetmd.render_many(records))
+    unordered = dict(datasetmd.parallel.export(records, workers=2,
+                                                chunk_size=5, ordered=False))
+    assert [unordered[i] for i in range(len(records))] == serial
+
+
+def test_unsupported_format_is_rejected(records):
+    with pytest.raises(ValueError):
+        datasetmd.parallel.export(records, 'datacite')
@@ -0,0 +1,87 @@
+import io
+import pytest
+import datasetmd, datasetmd.reader, datasetmd.synthetic
+
+
+@pytest.fixture(scope='module')
+def records():
+    return list(datasetmd.synthetic.records(20, seed=11))
+
+
+def terms(md):
+    return sorted((term.title, term.url) for terms in (md.keywords,
+                    md.observed_properties) for term in terms or ())
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_read_rendered_records(records, lazy):
+    for md in records:
+        read = datasetmd.reader.read_iso19139(md.toISO19139().encode('utf-8'),
+                                                lazy=lazy)
+        assert (read.base.identifier, read.base.title, read.base.abstract,
+                read.base.modified) == (md.base.identifier, md.base.title,
+                md.base.abstract, md.base.modified)
+        assert read.citation.doi == md.citation.doi
+        assert read.publisher.name == md.publisher.name
+        assert [org.name for org in read.owning_organisations] == \
+                    [org.name for org in md.owning_organisations]
+        assert read.license.name == md.license.name
+        assert terms(read) == terms(md)
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_rendering_read_records_is_a_fixed_point(records, lazy):
+    for md in records:
+        xml = datasetmd.reader.read_iso19139(
+                    md.toISO19139().encode('utf-8')).toISO19139()
+        read = datasetmd.reader.read_iso19139(xml.encode('utf-8'), lazy=lazy)
+        assert read.toISO19139() == xml
+
+
+def test_lazy_lists_are_read_on_first_access(records):
+    xml = records[0].toISO19139().encode('utf-8')
+    eager = datasetmd.reader.read_iso19139(xml)
+    lazy = datasetmd.reader.read_iso19139(xml, lazy=True)
+    assert eager.isLoaded('keywords') and eager.isLoaded('cross_references')
+    assert not lazy.isLoaded('keywords')
+    assert not lazy.isLoaded('cross_references')
+    assert terms(lazy) == terms(eager)
+    assert lazy.isLoaded('keywords')
+    assert lazy.fingerprint() == eager.fingerprint()
+
+
+def document(records):
+    """Wraps records in a CSW GetRecords response"""
+    return ('<csw:GetRecordsResponse xmlns:csw='
+            '"http://www.opengis.net/cat/csw/2.0.2"><csw:SearchResults>' +
+            ''.join(md.toISO19139().split('?>', 1)[-1] for md in records) +
+            '</csw:SearchResults></csw:GetRecordsResponse>').encode('utf-8')
+
+
+def test_many_records_in_a_document(records, tmp_path):
+    data = document(records)
+    path = tmp_path / 'records.xml'
+    path.write_bytes(data)
+    expected = [md.base.identifier for md in records]
+    for source in (data, str(path), io.BytesIO(data)):
+        assert [md.base.identifier for md in
+                    datasetmd.reader.iter_iso19139(source)] == expected
+    assert datasetmd.reader.read_iso19139(data).base.identifier == \
+                expected[0]
+    assert datasetmd.reader.read_iso19139(document([])) is None
+
+
+def test_directory(records, tmp_path):
+    (tmp_path / 'nested').mkdir()
+    for position, md in enumerate(records[:4]):
+        directory = tmp_path / 'nested' if position % 2 else tmp_path
+        (directory / '{}.xml'.format(position)).write_text(md.toISO19139(),
+                                                            encoding='utf-8')
+    (tmp_path / 'notes.txt').write_text('not a record')
+    found = datasetmd.reader.iter_iso19139_directory(str(tmp_path))
+    assert [md.base.identifier for md in found] == \
+                [records[0].base.identifier, records[2].base.identifier]
+    found = datasetmd.reader.iter_iso19139_directory(str(tmp_path),
+                                                        recursive=True)
+    assert sorted(md.base.identifier for md in found) == \
+                sorted(md.base.identifier for md in records[:4])
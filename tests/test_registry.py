@@ -0,0 +1,60 @@
+import datasetmd, datasetmd.registry, datasetmd.synthetic
+
+
+def organisation(email=None, website='https://one.example.org'):
+    return datasetmd.Organisation(name='One', email_address=email,
+                    website=None if website is None else
+                            datasetmd.WebAddress(url=website))
+
+
+def test_equal_objects_share_one_instance():
+    registry = datasetmd.registry.Registry()
+    first = organisation('a@one.ie')
+    assert registry.intern(first) is first
+    assert registry.intern(organisation('a@one.ie')) is first
+    assert len(registry) == 1
+
+
+def test_objects_differing_in_any_field_are_kept():
+    registry = datasetmd.registry.Registry()
+    first = organisation('a@one.ie')
+    second = organisation('b@one.ie')
+    assert registry.intern(first) is first
+    assert registry.intern(second) is second
+    assert second.email_address == 'b@one.ie'
+    assert registry.intern(organisation('b@one.ie')) is second
+
+
+def test_terms_with_different_labels_are_kept():
+    registry = datasetmd.registry.Registry()
+    url = 'http://www.eionet.europa.eu/gemet/concept/5920'
+    ocean = datasetmd.DefinedTerm(title='ocean', url=url)
+    ocean_fr = datasetmd.DefinedTerm(title='océan', url=url)
+    assert registry.intern(ocean) is ocean
+    assert registry.intern(ocean_fr) is ocean_fr
+    assert registry.intern(datasetmd.DefinedTerm(title='ocean',
+                                                    url=url)) is ocean
+
+
+def test_organisations_without_a_website_are_not_interned():
+    registry = datasetmd.registry.Registry()
+    owner = organisation(website=None)
+    publisher = organisation('a@one.ie', website=None)
+    md = datasetmd.DatasetMD(owning_organisations=[owner],
+                                publisher=publisher)
+    registry.intern_record(md)
+    assert md.publisher is publisher
+    assert md.publisher.email_address == 'a@one.ie'
+    assert len(registry) == 0
+
+
+def test_interning_leaves_records_unchanged():
+    registry = datasetmd.registry.Registry()
+    records = list(datasetmd.synthetic.records(50, seed=5))
+    before = [md.fingerprint() for md in records]
+    for md in records:
+        registry.intern_record(md)
+    assert [md.fingerprint() for md in records] == before
+    sets = {id(term.in_defined_term_set) for md in records
+                for term in md.keywords}
+    assert len(sets) == 1
@@ -0,0 +1,35 @@
+import inspect
+import pytest
+import datasetmd, datasetmd.rendercache
+
+
+@pytest.fixture
+def versions():
+    datasetmd.rendercache._source_version.cache_clear()
+    yield lambda: {format: datasetmd.rendercache.template_version(format)
+                    for format in datasetmd.rendercache.CACHED_FORMATS}
+    datasetmd.rendercache._source_version.cache_clear()
+
+
+def test_version_follows_the_iso19139_context(versions, monkeypatch):
+    before = versions()
+    context = datasetmd.DatasetMD._iso19139_context
+    monkeypatch.setattr(datasetmd.DatasetMD, '_iso19139_context',
+                        lambda self: dict(context(self), extra=True))
+    datasetmd.rendercache._source_version.cache_clear()
+    after = versions()
+    assert after[datasetmd.ISO19139] != before[datasetmd.ISO19139]
+    assert after[datasetmd.SCHEMA_DOT_ORG] == before[datasetmd.SCHEMA_DOT_ORG]
+
+
+def test_version_without_sources(versions, monkeypatch):
+    with_sources = versions()
+
+    def getsource(code):
+        raise OSError('could not get source code')
+    monkeypatch.setattr(inspect, 'getsource', getsource)
+    datasetmd.rendercache._source_version.cache_clear()
+    without_sources = versions()
+    datasetmd.rendercache._source_version.cache_clear()
+    assert versions() == without_sources
+    assert without_sources != with_sources
@@ -0,0 +1,176 @@
+import math, random
+import pytest
+import datasetmd, datasetmd.search, datasetmd.synthetic
+
+
+def weighted_counts(records):
+    """Counts the words of every record, weighted by field"""
+    counts = {}
+    for md in records:
+        words = counts[md.base.identifier] = {}
+        for field, text in datasetmd.search._fields(md):
+            for word in datasetmd.search.tokenise(text):
+                words[word] = words.get(word, 0) + \
+                                datasetmd.search.FIELD_WEIGHTS[field]
+    return counts
+
+
+def exhaustive(counts, query, k1=1.2, b=0.75):
+    """Scores every record against a query with the BM25 function"""
+    average = sum(sum(words.values()) for words in counts.values()) / \
+                len(counts)
+    scores = {}
+    for word in set(datasetmd.search.tokenise(query)):
+        frequency = sum(word in words for words in counts.values())
+        if not frequency:
+            continue
+        idf = math.log(1 + (len(counts) - frequency + 0.5) /
+                        (frequency + 0.5))
+        for identifier, words in counts.items():
+            tf = words.get(word)
+            if tf:
+                length = sum(words.values())
+                scores[identifier] = scores.get(identifier, 0.0) + \
+                    idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length /
+                                                        average))
+    return scores
+
+
+@pytest.fixture(scope='module')
+def records():
+    return list(datasetmd.synthetic.records(400, seed=8))
+
+
+def queries(records, rng):
+    words = sorted({word for md in records
+                    for field, text in datasetmd.search._fields(md)
+                    for word in datasetmd.search.tokenise(text)})
+    for count in (1, 2, 3, 5, 8):
+        for trial in range(6):
+            yield ' '.join(rng.sample(words, count))
+
+
+def check(index, counts, query, limit):
+    expected = exhaustive(counts, query)
+    found = index.search(query, limit=limit)
+    best = sorted(expected.values(), reverse=True)[:limit]
+    assert [score for identifier, score in found] == pytest.approx(best)
+    for identifier, score in found:
+        assert score == pytest.approx(expected[identifier])
+
+
+@pytest.mark.parametrize('limit', [1, 10, 1000])
+def test_search_matches_exhaustive_scoring(records, limit):
+    index = datasetmd.search.SearchIndex()
+    index.update(records)
+    counts = weighted_counts(records)
+    for query in queries(records, random.Random(limit)):
+        check(index, counts, query, limit)
+
+
+def test_remove_replace_save_and_load(records, tmp_path):
+    index = datasetmd.search.SearchIndex()
+    index.update(records)
+    for md in records[:50]:
+        assert index.remove(md.base.identifier)
+    assert not index.remove(records[0].base.identifier)
+    replacement = datasetmd.DatasetMD(base=datasetmd.Base(
+                    identifier=records[60].base.identifier,
+                    title='Zooplankton survey'))
+    index.add(replacement)
+    current = [replacement] + records[50:60] + records[61:]
+    assert len(index) == len(current)
+    path = str(tmp_path / 'index.json.gz')
+    index.save(path)
+    loaded = datasetmd.search.SearchIndex.load(path)
+    counts = weighted_counts(current)
+    for query in list(queries(current, random.Random(9)))[:10] + [
+                    'zooplankton']:
+        check(index, counts, query, 10)
+        assert loaded.search(query) == index.search(query)
+
+
+def test_nothing_found(records):
+    index = datasetmd.search.SearchIndex()
+    assert index.search('ocean') == []
+    index.update(records[:5])
+    assert index.search('') == []
+    assert index.search('ocean', limit=0) == []
+    with pytest.raises(ValueError):
+        index.add(datasetmd.DatasetMD())
+
+
+def test_search_while_records_change(records):
+    rng = random.Random(10)
+    index = datasetmd.search.SearchIndex()
+    current = {md.base.identifier: md for md in records[:300]}
+    index.update(current.values())
+    searches = list(queries(records, rng))[:12]
+    for step in range(30):
+        for trial in range(rng.randint(1, 8)):
+            md = rng.choice(records)
+            identifier = md.base.identifier
+            if identifier in current and rng.random() < 0.4:
+                index.remove(identifier)
+                del current[identifier]
+            else:
+                if rng.random() < 0.3:
+                    # Replace a record with the words of another
+                    md = datasetmd.DatasetMD(base=datasetmd.Base(
+                                identifier=identifier,
+                                title=rng.choice(records).base.title,
+                                abstract=rng.choice(records).base.abstract))
+                index.add(md)
+                current[identifier] = md
+        counts = weighted_counts(current.values())
+        for query in rng.sample(searches, 3):
+            check(index, counts, query, rng.choice([1, 5, 20]))
+
+
+def test_records_added_after_searching(records):
+    index = datasetmd.search.SearchIndex()
+    index.update(records)
+    assert index.search('sediment', limit=3)
+    index.add(datasetmd.DatasetMD(base=datasetmd.Base(identifier='new',
+                                        title='Sediment sediment sediment')))
+    assert index.search('sediment', limit=1)[0][0] == 'new'
+    index.remove('new')
+    assert 'new' not in dict(index.search('sediment', limit=1000))
+
+
+def test_average_length_drift(records):
+    rng = random.Random(11)
+    index = datasetmd.search.SearchIndex()
+    index.update(records)
+    searches = list(queries(records, rng))
+    for query in searches:
+        index.search(query)
+    # Long records without the words searched for raise the average length
+    # a little, which changes the scores of every record
+    current = list(records)
+    for i in range(12):
+        md = datasetmd.DatasetMD(base=datasetmd.Base(
+                                        identifier='long-{}'.format(i),
+                                        abstract=' '.join(['zzz'] * 300)))
+        index.add(md)
+        current.append(md)
+    counts = weighted_counts(current)
+    for query in searches:
+        for limit in (1, 3, 10):
+            check(index, counts, query, limit)
+
+
+def test_order_kept_while_the_average_length_grows():
+    def record(identifier, text):
+        return datasetmd.DatasetMD(base=datasetmd.Base(identifier=identifier,
+                                                        abstract=text))
+    index = datasetmd.search.SearchIndex()
+    index.add(record('a', 'alpha alpha' + ' x' * 76))
+    index.add(record('b', 'alpha' + ' y' * 34))
+    for i in range(20):
+        index.add(record('filler-{}'.format(i), ' '.join(['filler'] * 20)))
+    assert index.search('alpha', limit=1)[0][0] == 'b'
+    # A longer average favours the longer record a, whose score now passes
+    # that of b, although the order of the records was worked out before
+    index.add(record('long', ' '.join(['zzz'] * 40)))
+    assert index.search('alpha', limit=1)[0][0] == 'a'
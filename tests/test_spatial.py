@@ -0,0 +1,114 @@
+import math, random
+import pytest
+import datasetmd, datasetmd.spatial
+
+
+def random_box(rng):
+    west = rng.randint(-180, 180)
+    east = west + 360 if rng.random() < 0.02 else rng.randint(-180, 180)
+    south = rng.randint(-90, 90)
+    return west, south, east, rng.randint(south, 90)
+
+
+def record(position, box):
+    feature = None
+    if box is not None:
+        west, south, east, north = box
+        feature = datasetmd.Feature(latitude_northernmost=north,
+                                    latiude_southernmost=south,
+                                    longitude_easternmost=east,
+                                    longitude_westernmost=west)
+    return datasetmd.DatasetMD(base=datasetmd.Base(identifier=str(position)),
+                                feature=feature)
+
+
+def longitudes(west, east):
+    """Returns the half degrees of longitude which an arc covers, which
+    include a point within every gap between arcs with whole-degree ends"""
+    width = 360 if east - west >= 360 else (east - west) % 360
+    return {(2 * west + offset) % 720 for offset in range(2 * width + 1)}
+
+
+def points(box):
+    """Returns the longitudes and latitudes which a box covers, which are
+    compared separately since a box is their product"""
+    west, south, east, north = box
+    return longitudes(west, east), set(range(south, north + 1))
+
+
+def distance(box, longitude, latitude):
+    west, south, east, north = box
+    if east - west >= 360 or west > east:
+        parts = datasetmd.spatial._parts(west, south, east, north)
+    else:
+        parts = [(west, south, east, north)]
+    return min(math.hypot(datasetmd.spatial._longitude_distance(longitude,
+                                                                w, e),
+                            max(s - latitude, 0.0, latitude - n))
+                for w, s, e, n in parts)
+
+
+@pytest.fixture(scope='module')
+def indexed():
+    rng = random.Random(5)
+    boxes = [None if rng.random() < 0.05 else random_box(rng)
+                for i in range(1500)]
+    records = [record(position, box) for position, box in enumerate(boxes)]
+    return boxes, records, datasetmd.spatial.SpatialIndex(records,
+                                                            node_capacity=8)
+
+
+def identifiers(records):
+    return [md.base.identifier for md in records]
+
+
+def test_length(indexed):
+    boxes, records, index = indexed
+    assert len(index) == sum(box is not None for box in boxes)
+
+
+def test_queries_match_brute_force(indexed):
+    boxes, records, index = indexed
+    covers = [None if box is None else points(box) for box in boxes]
+    rng = random.Random(6)
+    for query in [random_box(rng) for i in range(30)] + [
+                    (170, -10, -170, 10), (12, 3, 12, 3)]:
+        inside = points(query)
+        expected = {'intersects': [], 'contains': [], 'within': []}
+        for md, covered in zip(records, covers):
+            if covered is None:
+                continue
+            if covered[0] & inside[0] and covered[1] & inside[1]:
+                expected['intersects'].append(md.base.identifier)
+            if inside[0] <= covered[0] and inside[1] <= covered[1]:
+                expected['contains'].append(md.base.identifier)
+            if covered[0] <= inside[0] and covered[1] <= inside[1]:
+                expected['within'].append(md.base.identifier)
+        for name, found in expected.items():
+            assert identifiers(getattr(index, name)(*query)) == found, name
+
+
+def test_nearest_matches_brute_force(indexed):
+    boxes, records, index = indexed
+    rng = random.Random(7)
+    for trial in range(30):
+        longitude = rng.uniform(-180, 180)
+        latitude = rng.uniform(-90, 90)
+        distances = sorted(distance(box, longitude, latitude)
+                            for box in boxes if box is not None)
+        found = index.nearest(longitude, latitude, count=10)
+        assert [distance(boxes[int(md.base.identifier)], longitude,
+                            latitude) for md in found] == \
+                    pytest.approx(distances[:10])
+
+
+def test_empty_index():
+    index = datasetmd.spatial.SpatialIndex([record(0, None)])
+    assert len(index) == 0
+    assert index.intersects(-180, -90, 180, 90) == []
+    assert index.nearest(0, 0) == []
+
+
+def test_node_capacity():
+    with pytest.raises(ValueError):
+        datasetmd.spatial.SpatialIndex([], node_capacity=1)
@@ -0,0 +1,50 @@
+import io, xml.etree.ElementTree
+import pytest
+import datasetmd, datasetmd.reader, datasetmd.streaming, datasetmd.synthetic
+
+CSW = '{http://www.opengis.net/cat/csw/2.0.2}'
+
+
+@pytest.fixture(scope='module')
+def records():
+    return list(datasetmd.synthetic.records(12, seed=13))
+
+
+def test_streamed_record_equals_rendered_record(records, tmp_path):
+    for md in records:
+        expected = md.toISO19139()
+        assert ''.join(md.iterISO19139()) == expected
+        stream = io.StringIO()
+        assert md.toISO19139(stream=stream) is None
+        assert stream.getvalue() == expected
+        path = tmp_path / 'record.xml'
+        md.toISO19139(stream=str(path))
+        assert path.read_text(encoding='utf-8') == expected
+
+
+@pytest.mark.parametrize('count', [0, 1, 12])
+def test_collection(records, count):
+    stream = io.StringIO()
+    datasetmd.streaming.write_iso19139_collection(
+                    (md for md in records[:count]), stream, count)
+    document = stream.getvalue().encode('utf-8')
+    results = xml.etree.ElementTree.fromstring(document).find(
+                                                    CSW + 'SearchResults')
+    assert results.get('numberOfRecordsMatched') == str(count)
+    assert results.get('numberOfRecordsReturned') == str(count)
+    assert len(results) == count
+    read = list(datasetmd.reader.iter_iso19139(document))
+    assert [md.base.identifier for md in read] == \
+                [md.base.identifier for md in records[:count]]
+
+
+def test_collection_counts_sequences(records):
+    document = ''.join(datasetmd.streaming.iter_iso19139_collection(records))
+    results = xml.etree.ElementTree.fromstring(document.encode('utf-8')).find(
+                                                    CSW + 'SearchResults')
+    assert results.get('numberOfRecordsReturned') == str(len(records))
+
+
+def test_collection_needs_a_count_for_generators(records):
+    with pytest.raises(ValueError):
+        datasetmd.streaming.iter_iso19139_collection(md for md in records)